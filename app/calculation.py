@@ -2,20 +2,64 @@
 from dataclasses import dataclass, field
 import datetime
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 
 from app.exceptions import OperationError
+from app.opeartions import OperationFactory
+
+
+def parse_result(value: Union[str, Decimal]) -> Decimal:
+    """
+    Parse a persisted or formatted result back into a Decimal.
+
+    Formatted results may carry a display suffix (e.g. "20.00%" for
+    percentages); the suffix is dropped since it is re-applied on display.
+
+    Args:
+        value (Union[str, Decimal]): The stored result.
+
+    Returns:
+        Decimal: The numeric result.
+    """
+    if isinstance(value, Decimal):
+        return value
+    text = str(value).strip()
+    if text.endswith('%'):
+        text = text[:-1]
+    return Decimal(text)
+
 
 @dataclass
 class Calculation:
 
     operation: str          # The name of the operation (e.g., "Addition")
-    operand1: Decimal       # The first operand in the calculation
-    operand2: Decimal       # The second operand in the calculation
-    # I change this attribute to str thus the value would be given by operations.exec()
-    result: str             
+    operand1: Optional[Decimal]  # The first operand in the calculation; None for a reduction
+    operand2: Optional[Decimal]  # The second operand in the calculation; None for a reduction
+    # Kept numeric so results can be chained and aggregated; formatted only for display
+    result: Decimal
     timestamp: datetime.datetime = field(default_factory=datetime.datetime.now)  # Time when the calculation was performed
+    count: Optional[int] = None  # Number of values a reduction was applied to; None for binary operations
+
+
+    def __post_init__(self) -> None:
+        # Accept results given as text, e.g. rows written by older versions
+        if not isinstance(self.result, Decimal):
+            self.result = parse_result(self.result)
+
+    @property
+    def formatted_result(self) -> str:
+        """
+        Return the result formatted for display or persistence.
+
+        Returns:
+            str: The result as the operation presents it (e.g. "20.00%").
+        """
+        return OperationFactory.format_result(self.operation, self.result)
 
+    @property
+    def is_reduction(self) -> bool:
+        """True if the calculation reduced a sequence of values rather than two operands."""
+        return self.count is not None
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -27,11 +71,20 @@ class Calculation:
         Returns:
             Dict[str, Any]: A dictionary containing the calculation data in a serializable format.
         """
+        if self.is_reduction:
+            return {
+                'operation': self.operation,
+                'operand1': '',
+                'operand2': '',
+                'result': self.formatted_result,
+                'timestamp': self.timestamp.isoformat(),
+                'count': str(self.count)
+            }
         return {
             'operation': self.operation,
             'operand1': str(self.operand1),
             'operand2': str(self.operand2),
-            'result': self.result,
+            'result': self.formatted_result,
             'timestamp': self.timestamp.isoformat()
         }
 
@@ -53,13 +106,25 @@ class Calculation:
             OperationError: If data is invalid or missing required fields.
         """
         try:
-            # Create the calculation object with the original operands
-            calc = Calculation(
-                operation=data['operation'],
-                operand1=Decimal(data['operand1']),
-                operand2=Decimal(data['operand2']),
-                result=data['result']
-            )
+            # Reductions store their value count instead of operands; data
+            # written before counts existed has no 'count' at all
+            count = data.get('count')
+            if count not in (None, ''):
+                calc = Calculation(
+                    operation=data['operation'],
+                    operand1=None,
+                    operand2=None,
+                    result=data['result'],
+                    count=int(count)
+                )
+            else:
+                # Create the calculation object with the original operands
+                calc = Calculation(
+                    operation=data['operation'],
+                    operand1=Decimal(data['operand1']),
+                    operand2=Decimal(data['operand2']),
+                    result=data['result']
+                )
 
             # Set the timestamp from the saved data
             calc.timestamp = datetime.datetime.fromisoformat(data['timestamp'])
@@ -87,7 +152,9 @@ class Calculation:
         Returns:
             str: Formatted string showing the calculation and result.
         """
-        return f"({self.operand1} {self.operation} {self.operand2}) = {self.result}"
+        if self.is_reduction:
+            return f"({self.operation} of {self.count} values) = {self.formatted_result}"
+        return f"({self.operand1} {self.operation} {self.operand2}) = {self.formatted_result}"
 
     def __repr__(self) -> str:
         """
@@ -104,7 +171,8 @@ class Calculation:
             f"operand1={self.operand1}, "
             f"operand2={self.operand2}, "
             f"result={self.result}, "
-            f"timestamp='{self.timestamp.isoformat()}')"
+            f"timestamp='{self.timestamp.isoformat()}', "
+            f"count={self.count})"
         )
 
     def __eq__(self, other: object) -> bool:
@@ -126,5 +194,6 @@ class Calculation:
             self.operation == other.operation and
             self.operand1 == other.operand1 and
             self.operand2 == other.operand2 and
-            self.result == other.result
+            self.result == other.result and
+            self.count == other.count
         )
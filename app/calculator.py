@@ -1,31 +1,67 @@
 #记录操作历史，每一个元素都是calculation实例
 from app.history import HistoryObserver
+import datetime
 import logging
-import os
-from app.calculation import Calculation
+import threading
+from app.calculation import Calculation, parse_result
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
-from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, Union
+from decimal import Decimal, InvalidOperation
 from app.calculator_config import CalculatorConfig
-from app.calculator_memento import CalculatorMemento
-from app.opeartions import Operation
+from app.calculator_memento import HistoryDelta
+from app.opeartions import Operation, OperationFactory, ReductionOperation
 import pandas as pd
 from app.exceptions import OperationError, ValidationError
 from app.input_validators import InputValidator
+from app.interning import ValueInterner
+from app.history_analytics import HistoryAnalytics
+from app.history_columns import HistoryColumns
+from app.history_index import HistoryIndex
+from app.history_storage import AtomicFileWriter, HistoryStorage, create_history_storage, sibling_path
+from app.history_view import MmapHistoryView
+from app.undo_log import StackOp, UndoLog, history_fingerprint
 
 
 Number = Union[int, float, Decimal]
 CalculationResult = Union[Number, str]
+# Stack operations the undo log may carry beyond twice the live stacks before
+# a save compacts it
+UNDO_LOG_SLACK = 1000
+# Directories already created by Calculator.setup_environment in this process
+_prepared_directories: Set[Path] = set()
+# Plugins directories already registered with the OperationFactory
+_discovered_plugin_dirs: Set[Path] = set()
+_environment_lock = threading.Lock()
+
+
+def _logging_to(log_file: Path) -> bool:
+    """Tell whether the root logger already writes to log_file."""
+    target = str(log_file)
+    return any(
+        isinstance(handler, logging.FileHandler) and handler.baseFilename == target
+        for handler in logging.getLogger().handlers
+    )
+
 
 class Calculator:
 
-    def __init__(self, config: Optional[CalculatorConfig] = None):
+    def __init__(
+        self,
+        config: Optional[CalculatorConfig] = None,
+        storage: Optional[HistoryStorage] = None,
+        session: Optional[str] = None
+    ):
         """
         Initialize calculator with configuration.
 
         Args:
             config (Optional[CalculatorConfig], optional): Configuration settings for the calculator.
                 If not provided, default settings are loaded based on environment variables.
+            storage (Optional[HistoryStorage], optional): Where the history is saved. Defaults
+                to the backend selected by the configuration.
+            session (Optional[str], optional): Session name when the calculator is one of many
+                sharing a configuration (see SessionManager). Its undo log gets
+                its own file, and the shared directories and logging are left to the manager.
         """
         if config is None:
             # Determine the project root directory if no configuration is provided
@@ -36,46 +72,115 @@ class Calculator:
         # Assign the configuration and validate its parameters
         self.config = config
         self.config.validate()
-
-        # Ensure that the log directory exists
-        os.makedirs(self.config.log_dir, exist_ok=True)
-
-        # Set up the logging system
-        self._setup_logging()
+        self.validator = InputValidator(self.config)
+        # Repeated operands and results share one Decimal instance
+        self.interner = ValueInterner()
+        self.storage: HistoryStorage = storage if storage is not None else create_history_storage(self.config)
+        self.session = session
+        # Base name for the files kept next to the history (undo log)
+        history_file = self.config.history_file
+        if session is not None:
+            history_file = sibling_path(history_file, f"-{session}.csv")
+        self.history_file = history_file
+
+        if session is None:
+            # Create the log and history directories and set up logging
+            self.setup_environment(self.config)
 
         # Initialize calculation history and operation strategy
         self.history: List[Calculation] = []
+        # Typed column buffers kept in step with history for DataFrame export
+        self._columns = HistoryColumns()
+        # Secondary indexes for find(), maintained the same way
+        self._index = HistoryIndex()
+        # Aggregates for analytics(), built on first use and then kept in step
+        self._analytics: Optional[HistoryAnalytics] = None
         self.operation_strategy: Optional[Operation] = None
 
         # Initialize observer list for the Observer pattern
         self.observers: List[HistoryObserver] = []
 
-        # Initialize stacks for undo and redo functionality using the Memento pattern
-        self.undo_stack: List[CalculatorMemento] = []
-        self.redo_stack: List[CalculatorMemento] = []
+        # Initialize stacks for undo and redo functionality using the Memento pattern.
+        # Each memento is a HistoryDelta, so a step costs the size of the change.
+        self.undo_stack: List[HistoryDelta] = []
+        self.redo_stack: List[HistoryDelta] = []
+
+        # Locks guarding shared state when one calculator serves several threads.
+        # history, undo_stack and redo_stack always change together, so they share
+        # one lock; file I/O, observers and the operation strategy get their own
+        # so a slow save never blocks calculations.
+        self._state_lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._observer_lock = threading.Lock()
+        self._strategy_lock = threading.Lock()
+
+        # The stacks are persisted as a log of stack operations next to the
+        # history file. A session that loads a history whose save marker ends
+        # the log replays it lazily, on the first undo or redo.
+        self._undo_log = UndoLog(
+            self.config, AtomicFileWriter(self.config.fsync_policy, self.config.fsync_batch_size),
+            self.history_file
+        )
+        self._undo_pending: List[StackOp] = []
+        self._undo_resume: Optional[int] = None   # log offset still to be replayed
+        self._undo_log_rewrite = True             # the log does not describe this session
+        self._undo_log_ops: Optional[int] = None  # stack operations in the log, if known
+        self._undo_log_appended = 0               # stack operations appended since loading
+        self._undo_log_epoch = 0                  # bumped when the stacks are discarded
+        # Named states: undo stack depth and the delta on top of it at that point
+        self._checkpoints: Dict[str, Tuple[int, Optional[HistoryDelta]]] = {}
+
+
+    @classmethod
+    def setup_environment(cls, config: CalculatorConfig) -> None:
+        """
+        Prepare the directories and logging a calculator writes to.
 
-        # Create required directories for history management
-        self._setup_directories()
-        
+        This is process-level bootstrap: each directory is created once per
+        process, and logging is reconfigured only when it is not already
+        writing to the configured log file, so creating further calculators
+        neither touches the file system nor tears down logging handlers.
+        Operations in the plugins directory are registered by name the first
+        time the directory is seen; they are imported only when used.
+        A standalone calculator calls this when it is created; a
+        SessionManager calls it once for all of its sessions.
 
-    def _setup_directories(self) -> None:
+        Args:
+            config (CalculatorConfig): The configuration to prepare for.
+        """
+        with _environment_lock:
+            # Ensure that the log and history directories exist
+            for directory in (config.log_dir, config.history_dir):
+                if directory not in _prepared_directories:
+                    cls._setup_directories(directory)
+                    _prepared_directories.add(directory)
+
+            # Set up the logging system
+            if not _logging_to(config.log_file):
+                cls._setup_logging(config)
+
+            if config.plugin_dir not in _discovered_plugin_dirs:
+                OperationFactory.discover_plugins(config.plugin_dir)
+                _discovered_plugin_dirs.add(config.plugin_dir)
+
+    @staticmethod
+    def _setup_directories(directory: Path) -> None:
         """
         Create required directories.
 
-        Ensures that all necessary directories for history management exist.
+        Ensures that a directory for logs or history management exists.
         """
-        self.config.history_dir.mkdir(parents=True, exist_ok=True)
+        directory.mkdir(parents=True, exist_ok=True)
 
-    def _setup_logging(self) -> None:
+    @staticmethod
+    def _setup_logging(config: CalculatorConfig) -> None:
         """
         Configure the logging system.
 
         Sets up logging to a file with a specified format and log level.
         """
         try:
-            # Ensure the log directory exists
-            os.makedirs(self.config.log_dir, exist_ok=True)
-            log_file = self.config.log_file.resolve()
+            log_file = config.log_file.resolve()
 
             # Configure the basic logging settings
             logging.basicConfig(
@@ -93,55 +198,137 @@ class Calculator:
 
 #------------------CORE CALCULATE
 
-    def perform_op(self, a : Number, b : Number) -> CalculationResult:
-        
-        if not self.operation_strategy:
+    def perform_op(self, a : Number, b : Number, operation: Optional[Operation] = None) -> CalculationResult:
+        """
+        Perform a calculation and record it in the history.
+
+        The operation can be passed per call, which makes the evaluation
+        stateless and safe when several threads share one calculator. When it
+        is omitted the strategy chosen with set_operation is used.
+
+        Args:
+            a (Number): The first operand.
+            b (Number): The second operand.
+            operation (Optional[Operation], optional): Operation to apply. Defaults
+                to the current operation strategy.
+
+        Returns:
+            CalculationResult: The result of the calculation.
+
+        Raises:
+            OperationError: If no operation is available or the calculation fails.
+            ValidationError: If an operand is invalid.
+        """
+        if operation is None:
+            with self._strategy_lock:
+                operation = self.operation_strategy
+        if not operation:
             raise OperationError("No operation set")
         
         try:
             # Validate and convert inputs to Decimal
-            validated_a = InputValidator.validate_number(a, self.config)
-            validated_b = InputValidator.validate_number(b, self.config)
-            result = self.operation_strategy.execute(validated_a, validated_b)
+            validated_a = self.interner.intern(self.validator.validate(a))
+            validated_b = self.interner.intern(self.validator.validate(b))
+            result = self.interner.intern(operation.execute(validated_a, validated_b))
 
             # Create a new Calculation instance with the operation details
             calculation = Calculation(
-                operation=str(self.operation_strategy),
+                operation=operation.name,
                 operand1=validated_a,
                 operand2=validated_b,
                 result=result
             )
+            self._record(calculation)
 
-            # Save the current state to the undo stack before making changes
-            self.undo_stack.append(CalculatorMemento(self.history.copy()))
+            return result
+        
+        except ValidationError as e:
+            # Log and re-raise validation errors
+            logging.error(f"Validation error: {str(e)}")
+            raise
+        except Exception as e:
+            # Log and raise operation errors for any other exceptions
+            logging.error(f"Operation failed: {str(e)}")
+            raise OperationError(f"Operation failed: {str(e)}")
 
-            # Clear the redo stack since new operation invalidates the redo history
-            self.redo_stack.clear()
+    def perform_reduction(self, values: Iterable[Number], operation: Optional[Operation] = None) -> Decimal:
+        """
+        Reduce a sequence of values with an n-ary operation and record it.
 
-            # Append the new calculation to the history
-            self.history.append(calculation)
+        The values are validated and reduced in one call and recorded as a
+        single Calculation, instead of one calculation per chained pair. It
+        has no operands; its count is the number of values, which are not
+        kept in the history.
 
-            # Ensure the history does not exceed the maximum size
-            if len(self.history) > self.config.max_history_size:
-                self.history.pop(0)
+        Args:
+            values (Iterable[Number]): The operands, e.g. thousands of samples.
+            operation (Optional[Operation], optional): A ReductionOperation such as
+                Sum or Mean. Defaults to the current operation strategy.
+
+        Returns:
+            Decimal: The result of the reduction.
+
+        Raises:
+            OperationError: If the operation cannot reduce a sequence or the reduction fails.
+            ValidationError: If a value is invalid or there are no values.
+        """
+        if operation is None:
+            with self._strategy_lock:
+                operation = self.operation_strategy
+        if not isinstance(operation, ReductionOperation):
+            raise OperationError(f"{operation or 'No operation'} cannot reduce a sequence of values")
 
-            # Notify all observers about the new calculation
-            self.notify_observers(calculation)
+        try:
+            validated = self.validator.validate_many(values)
+            result = self.interner.intern(operation.reduce(validated))
+            calculation = Calculation(
+                operation=operation.name,
+                operand1=None,
+                operand2=None,
+                result=result,
+                count=len(validated)
+            )
+            self._record(calculation)
 
             return result
-        
+
         except ValidationError as e:
-            # Log and re-raise validation errors
             logging.error(f"Validation error: {str(e)}")
             raise
         except Exception as e:
-            # Log and raise operation errors for any other exceptions
             logging.error(f"Operation failed: {str(e)}")
             raise OperationError(f"Operation failed: {str(e)}")
 
+    def _record(self, calculation: Calculation) -> None:
+        """Append a new calculation to the history, undo stack and observers."""
+        with self._state_lock:
+            # Append the new calculation to the history
+            self.history.append(calculation)
+            self._columns.append(calculation)
+            self._index.append(calculation)
+            if self._analytics is not None:
+                self._analytics.add(calculation)
+
+            # Ensure the history does not exceed the maximum size
+            evicted = ()
+            if len(self.history) > self.config.max_history_size:
+                evicted = (self.history.pop(0),)
+                self._columns.pop_front()
+                self._index.pop_front()
+                if self._analytics is not None:
+                    self._analytics.remove(evicted[0])
+
+            # Record the change on the undo stack; a new operation
+            # invalidates the redo history
+            self._push_delta(HistoryDelta(evicted, (calculation,)))
+
+        # Notify all observers about the new calculation
+        self.notify_observers(calculation)
+
     def set_operation(self, operation : Operation):
 
-        self.operation_strategy = operation
+        with self._strategy_lock:
+            self.operation_strategy = operation
         logging.info(f"Set operation: {operation}")
 
 
@@ -157,7 +344,8 @@ class Calculator:
         Args:
             observer (HistoryObserver): The observer to be added.
         """
-        self.observers.append(observer)
+        with self._observer_lock:
+            self.observers.append(observer)
         logging.info(f"Added observer: {observer.__class__.__name__}")
 
     def remove_observer(self, observer: HistoryObserver) -> None:
@@ -169,7 +357,8 @@ class Calculator:
         Args:
             observer (HistoryObserver): The observer to be removed.
         """
-        self.observers.remove(observer)
+        with self._observer_lock:
+            self.observers.remove(observer)
         logging.info(f"Removed observer: {observer.__class__.__name__}")
 
     def notify_observers(self, calculation: Calculation) -> None:
@@ -182,46 +371,55 @@ class Calculator:
         Args:
             calculation (Calculation): The latest calculation performed.
         """
-        for observer in self.observers:
+        # Iterate over a snapshot so observers can be added or removed concurrently
+        with self._observer_lock:
+            observers = list(self.observers)
+        for observer in observers:
             observer.update(calculation)
 
 #---------------------------history
 
     def save_history(self) -> None:
         """
-        Save calculation history to a CSV file using pandas.
+        Save calculation history through the configured storage backend.
 
         Serializes the history of calculations and writes them to a CSV file for
-        persistent storage. Utilizes pandas DataFrames for efficient data handling.
+        persistent storage. The file is replaced atomically, so a crash during
+        the write never leaves a partially written history behind.
 
         Raises:
             OperationError: If saving the history fails.
         """
         try:
-            # Ensure the history directory exists
-            self.config.history_dir.mkdir(parents=True, exist_ok=True)
-
-            history_data = []
-            for calc in self.history:
-                # Serialize each Calculation instance to a dictionary
-                history_data.append({
-                    'operation': str(calc.operation),
-                    'operand1': str(calc.operand1),
-                    'operand2': str(calc.operand2),
-                    'result': str(calc.result),
-                    'timestamp': calc.timestamp.isoformat()
-                })
-
-            if history_data:
-                # Create a pandas DataFrame from the history data
-                df = pd.DataFrame(history_data)
-                # Write the DataFrame to a CSV file without the index
-                df.to_csv(self.config.history_file, index=False)
+            # Serialize writers so concurrent saves never interleave in the file
+            with self._io_lock:
+                # Work on a snapshot so calculations can continue while writing
+                with self._state_lock:
+                    snapshot = self.history.copy()
+                    pending, self._undo_pending = self._undo_pending, []
+                    rewrite = self._undo_log_rewrite or self._undo_log_bloated(len(pending))
+                    if rewrite:
+                        self._resume_undo_log()
+                        undo_stack, redo_stack = list(self.undo_stack), list(self.redo_stack)
+                    # Until the log is written it may not match this session
+                    self._undo_log_rewrite = True
+                    epoch = self._undo_log_epoch
+
+                self.storage.save(snapshot)
+                fingerprint = history_fingerprint(snapshot)
+                if rewrite:
+                    self._undo_log_ops = self._undo_log.rewrite(undo_stack, redo_stack, fingerprint)
+                else:
+                    self._undo_log.append(pending, fingerprint)
+                    self._undo_log_appended += len(pending)
+                    if self._undo_log_ops is not None:
+                        self._undo_log_ops += len(pending)
+                with self._state_lock:
+                    # A clear while writing leaves the log for the next save to rewrite
+                    self._undo_log_rewrite = self._undo_log_epoch != epoch
+            if snapshot:
                 logging.info(f"History saved successfully to {self.config.history_file}")
             else:
-                # If history is empty, create an empty CSV with headers
-                pd.DataFrame(columns=['operand1', 'operation','operand2', 'result', 'timestamp']
-                           ).to_csv(self.config.history_file, index=False)
                 logging.info("Empty history saved")
 
         except Exception as e:
@@ -231,7 +429,7 @@ class Calculator:
         
     def load_history(self) -> None:
         """
-        Load calculation history from a CSV file using pandas.
+        Load calculation history through the configured storage backend.
 
         Reads the calculation history from a CSV file and reconstructs the
         Calculation instances, restoring the calculator's history.
@@ -240,27 +438,19 @@ class Calculator:
             OperationError: If loading the history fails.
         """
         try:
-            if self.config.history_file.exists():
-                # Read the CSV file into a pandas DataFrame
-                df = pd.read_csv(self.config.history_file)
-                if not df.empty:
-                    # Deserialize each row into a Calculation instance
-                    self.history = [
-                        Calculation.from_dict({
-                            'operation': row['operation'],
-                            'operand1': row['operand1'],
-                            'operand2': row['operand2'],
-                            'result': row['result'],
-                            'timestamp': row['timestamp']
-                        })
-                        for _, row in df.iterrows()
-                    ]
-                    logging.info(f"Loaded {len(self.history)} calculations from history")
-                else:
-                    logging.info("Loaded empty history file")
-            else:
+            with self._io_lock:
+                history = self.storage.load()
+                if history is not None:
+                    history = self.interner.intern_history(history)
+                    with self._state_lock:
+                        self._install_history(history)
+            if history is None:
                 # If no history file exists, start with an empty history
                 logging.info("No history file found - starting with empty history")
+            elif history:
+                logging.info(f"Loaded {len(history)} calculations from history")
+            else:
+                logging.info("Loaded empty history file")
         except Exception as e:
             # Log and raise an OperationError if loading fails
             logging.error(f"Failed to load history: {e}")
@@ -270,22 +460,27 @@ class Calculator:
         """
         Get calculation history as a pandas DataFrame.
 
-        Converts the list of Calculation instances into a pandas DataFrame for
-        advanced data manipulation or analysis.
+        The frame wraps the column buffers the calculator maintains as
+        calculations are recorded, so no per-row objects are built. Operands
+        and results are kept as Decimal values so they can be aggregated
+        without reparsing; timestamps are a datetime64 column.
 
         Returns:
-            pd.DataFrame: DataFrame containing the calculation history.
-        """
-        history_data = []
-        for calc in self.history:
-            history_data.append({
-                'operation': str(calc.operation),
-                'operand1': str(calc.operand1),
-                'operand2': str(calc.operand2),
-                'result': str(calc.result),
-                'timestamp': calc.timestamp
-            })
-        return pd.DataFrame(history_data)
+            pd.DataFrame: DataFrame containing the calculation history. Its
+                columns are read-only; copy it before modifying values in place.
+        """
+        with self._state_lock:
+            if not self._columns.matches(self.history):
+                # history was replaced directly; bring the buffers back in step
+                self._columns.reset(self.history)
+            return self._columns.to_dataframe()
+
+    @staticmethod
+    def format_history_entry(calc: Calculation) -> str:
+        """Format one calculation the way the history command displays it."""
+        if calc.is_reduction:
+            return f"{calc.operation} of {calc.count} values\tresult:{calc.formatted_result}"
+        return f"{calc.operand1}\t{calc.operation}\t{calc.operand2}\tresult:{calc.formatted_result}"
 
     def show_history(self) -> List[str]:
         """
@@ -296,10 +491,235 @@ class Calculator:
         Returns:
             List[str]: List of formatted calculation history entries.
         """
-        return [
-            f"{calc.operand1}\t{calc.operation}\t{calc.operand2}\tresult:{calc.result}"
-            for calc in self.history
-        ]
+        return list(self.iter_history())
+
+    def iter_history(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """
+        Lazily format a window of the history.
+
+        Only the requested window is copied and each entry is formatted as it
+        is consumed, so showing one page of a long history costs one page.
+
+        Args:
+            start (int, optional): Index of the first entry; negative counts from the end.
+            stop (Optional[int], optional): Index after the last entry. Defaults to the end.
+
+        Yields:
+            str: Formatted calculation history entries, oldest first.
+        """
+        with self._state_lock:
+            window = self.history[start:stop]
+        for calc in window:
+            yield self.format_history_entry(calc)
+
+    def open_history_view(self) -> Optional[MmapHistoryView]:
+        """
+        Open a read-only view of the whole saved history, if it is larger.
+
+        With segmented storage the retained segments can hold far more than
+        max_history_size calculations. The view reaches them without loading
+        them and continues with the calculations not saved yet, so it ends
+        exactly where the in-memory history ends.
+
+        Returns:
+            Optional[MmapHistoryView]: The view, which the caller must close, or
+                None if the storage keeps nothing beyond the in-memory history.
+        """
+        with self._io_lock:
+            with self._state_lock:
+                snapshot = self.history.copy()
+            view = self.storage.open_view(snapshot)
+        if view is not None and len(view) <= len(snapshot):
+            view.close()
+            return None
+        return view
+
+    def _replace_history(self, history: List[Calculation]) -> None:
+        """
+        Install a new history list and bring the derived state in step.
+
+        Must be called with _state_lock held.
+
+        Args:
+            history (List[Calculation]): The history that replaces the current one.
+        """
+        self.history = history
+        self._index.reset(history)
+        self._columns.reset(history)
+        # rebuilt from the new history the next time analytics() is called
+        self._analytics = None
+
+    def _install_history(self, history: List[Calculation]) -> None:
+        """
+        Make a freshly loaded history the current one.
+
+        A calculator that has done nothing yet adopts it as its starting point
+        and, if the undo log ends with this history's save marker, resumes the
+        log's stacks on the first undo or redo; this includes an empty history,
+        e.g. one saved after undoing everything, whose redo stack is in the log.
+        Otherwise loading a non-empty history is itself a change that can be
+        undone, and an empty one leaves the current history alone. Must be
+        called with _io_lock and _state_lock held.
+
+        Args:
+            history (List[Calculation]): The loaded history.
+        """
+        if self.history or self.undo_stack or self.redo_stack or self._undo_pending:
+            if not history:
+                return
+            self._resume_undo_log()
+            delta = HistoryDelta(tuple(self.history), tuple(history))
+            self._push_delta(delta)
+            self._apply_delta(delta)
+            return
+
+        self._replace_history(history)
+        tail = self._undo_log.tail()
+        if tail is not None and tail[0] == history_fingerprint(history):
+            # Drop a torn append after the marker before appending again
+            self._undo_log.truncate(tail[1])
+            self._undo_resume = tail[1]
+            self._undo_log_rewrite = False
+            self._undo_log_ops = None
+            self._undo_log_appended = 0
+
+    def _resume_undo_log(self) -> None:
+        """
+        Replay the undo log into the stacks if a load left it pending.
+
+        Stack operations performed since loading stay on top of the replayed
+        ones. An unreadable log is logged and dropped, and rewritten on the
+        next save. Must be called with _state_lock held.
+        """
+        if self._undo_resume is None:
+            return
+        end, self._undo_resume = self._undo_resume, None
+        try:
+            undo_stack, redo_stack, count = self._undo_log.replay(end, self.interner.intern_calculation)
+        except Exception as e:
+            logging.warning(f"Could not restore undo history: {e}")
+            self._undo_log_rewrite = True
+            return
+        if not self.undo_stack:
+            # Nothing was pushed since loading, so the saved redo stack still applies
+            self.redo_stack = redo_stack
+        self.undo_stack[:0] = undo_stack
+        self._undo_log_ops = count + self._undo_log_appended
+
+    def _undo_log_bloated(self, pending: int) -> bool:
+        """Tell whether undone and discarded steps dominate the undo log."""
+        if self._undo_resume is not None or self._undo_log_ops is None:
+            return False
+        live = len(self.undo_stack) + len(self.redo_stack) + 1
+        return self._undo_log_ops + pending > 2 * live + UNDO_LOG_SLACK
+
+    def _push_delta(self, delta: HistoryDelta) -> None:
+        """Record a new change on the undo stack. Must be called with _state_lock held."""
+        self.undo_stack.append(delta)
+        self.redo_stack.clear()
+        self._undo_pending.append(('push', delta))
+
+    def _apply_delta(self, delta: HistoryDelta, forward: bool = True) -> None:
+        """
+        Apply or revert a delta on the history and the derived state, in place.
+
+        Must be called with _state_lock held.
+
+        Args:
+            delta (HistoryDelta): The change to apply.
+            forward (bool, optional): False to revert it instead.
+        """
+        if forward:
+            delta.apply(self.history)
+            for _ in delta.removed:
+                self._columns.pop_front()
+                self._index.pop_front()
+            for calc in delta.added:
+                self._columns.append(calc)
+                self._index.append(calc)
+        else:
+            delta.revert(self.history)
+            # Buffer slots are written once, so the columns are rebuilt on demand
+            self._columns.invalidate()
+            if delta.removed:
+                self._index.invalidate()
+            else:
+                for _ in delta.added:
+                    self._index.pop_last()
+        if self._analytics is not None:
+            for calc in (delta.removed if forward else delta.added):
+                self._analytics.remove(calc)
+            for calc in (delta.added if forward else delta.removed):
+                self._analytics.add(calc)
+            self._analytics.set_last(self.history[-1] if self.history else None)
+
+    def find(
+        self,
+        operation: Optional[str] = None,
+        operand: Optional[Number] = None,
+        result: Optional[CalculationResult] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Calculation]:
+        """
+        Find calculations in the history using its secondary indexes.
+
+        All given criteria must match. Lookups by operation, operand or result
+        go through hash indexes and time ranges through a sorted index, so the
+        cost depends on the number of matches rather than the history size.
+
+        Args:
+            operation (Optional[str], optional): Operator or operation name, e.g. 'pow' or 'Power'.
+            operand (Optional[Number], optional): Value of either operand.
+            result (Optional[CalculationResult], optional): Result value; a trailing '%' is ignored.
+            since (Optional[datetime.datetime], optional): Earliest timestamp, inclusive.
+            until (Optional[datetime.datetime], optional): Latest timestamp, inclusive.
+            limit (Optional[int], optional): Return only the newest limit matches.
+
+        Returns:
+            List[Calculation]: Matching calculations, oldest first.
+
+        Raises:
+            UnknownOperationError: If the operation is unknown.
+            ValidationError: If the operand or result is not a number.
+        """
+        name = OperationFactory.resolve_name(operation) if operation is not None else None
+        operand_value = self.validator.validate(operand) if operand is not None else None
+        result_value = None
+        if result is not None:
+            try:
+                result_value = parse_result(result)
+            except InvalidOperation as e:
+                raise ValidationError(f"Invalid number format: {result}") from e
+
+        with self._state_lock:
+            if not self._index.matches(self.history):
+                # history was replaced directly; rebuild the indexes
+                self._index.reset(self.history)
+            positions = self._index.positions(name, operand_value, result_value, since, until)
+            if limit is not None:
+                positions = positions[-limit:] if limit > 0 else []
+            return [self.history[position] for position in positions]
+
+    def analytics(self) -> HistoryAnalytics:
+        """
+        Get aggregate statistics of the calculations in the history.
+
+        The aggregates are built from the history on the first call and then
+        updated as calculations are recorded, evicted, undone, redone or
+        cleared, so they always describe the current history.
+
+        Returns:
+            HistoryAnalytics: Statistics per operation and per minute.
+        """
+        with self._state_lock:
+            if self._analytics is None:
+                self._analytics = HistoryAnalytics.from_history(self.history)
+            elif not self._analytics.matches(self.history):
+                # history was replaced directly; rebuild the aggregates
+                self._analytics.reset(self.history)
+            return self._analytics
 
     def clear_history(self) -> None:
         """
@@ -307,9 +727,15 @@ class Calculator:
 
         Empties the calculation history and clears the undo and redo stacks.
         """
-        self.history.clear()
-        self.undo_stack.clear()
-        self.redo_stack.clear()
+        with self._state_lock:
+            self._replace_history([])
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+            self._undo_pending.clear()
+            self._undo_resume = None
+            self._undo_log_rewrite = True
+            self._undo_log_epoch += 1
+            self._checkpoints.clear()
         logging.info("History cleared")
 
     def undo(self) -> bool:
@@ -322,15 +748,7 @@ class Calculator:
         Returns:
             bool: True if an operation was undone, False if there was nothing to undo.
         """
-        if not self.undo_stack:
-            return False
-        # Pop the last state from the undo stack
-        memento = self.undo_stack.pop()
-        # Push the current state onto the redo stack
-        self.redo_stack.append(CalculatorMemento(self.history.copy()))
-        # Restore the history from the memento
-        self.history = memento.history.copy()
-        return True
+        return self.undo_steps(1) == 1
 
     def redo(self) -> bool:
         """
@@ -341,12 +759,120 @@ class Calculator:
         Returns:
             bool: True if an operation was redone, False if there was nothing to redo.
         """
-        if not self.redo_stack:
-            return False
-        # Pop the last state from the redo stack
-        memento = self.redo_stack.pop()
-        # Push the current state onto the undo stack
-        self.undo_stack.append(CalculatorMemento(self.history.copy()))
-        # Restore the history from the memento
-        self.history = memento.history.copy()
-        return True
+        return self.redo_steps(1) == 1
+
+    def undo_steps(self, steps: int) -> int:
+        """
+        Undo up to steps operations at once.
+
+        Each step reverts one delta in place, so the cost is the size of the
+        changes undone, not of the history.
+
+        Args:
+            steps (int): Number of operations to undo.
+
+        Returns:
+            int: Number of operations actually undone.
+        """
+        with self._state_lock:
+            # A loaded session restores its saved stacks on first use
+            self._resume_undo_log()
+            steps = min(steps, len(self.undo_stack))
+            if steps <= 0:
+                return 0
+            for _ in range(steps):
+                # Move the last change to the redo stack and revert it
+                delta = self.undo_stack.pop()
+                self.redo_stack.append(delta)
+                self._apply_delta(delta, forward=False)
+            self._undo_pending.append(('undo', steps))
+            return steps
+
+    def redo_steps(self, steps: int) -> int:
+        """
+        Redo up to steps previously undone operations at once.
+
+        Args:
+            steps (int): Number of operations to redo.
+
+        Returns:
+            int: Number of operations actually redone.
+        """
+        with self._state_lock:
+            self._resume_undo_log()
+            steps = min(steps, len(self.redo_stack))
+            if steps <= 0:
+                return 0
+            for _ in range(steps):
+                # Move the change back to the undo stack and apply it again
+                delta = self.redo_stack.pop()
+                self.undo_stack.append(delta)
+                self._apply_delta(delta)
+            self._undo_pending.append(('redo', steps))
+            return steps
+
+    def checkpoint(self, name: str) -> None:
+        """
+        Name the current state so restore can jump back (or forward) to it.
+
+        Args:
+            name (str): Checkpoint name; an existing checkpoint is replaced.
+        """
+        with self._state_lock:
+            self._resume_undo_log()
+            depth = len(self.undo_stack)
+            self._checkpoints[name] = (depth, self.undo_stack[-1] if depth else None)
+
+    def checkpoints(self) -> List[str]:
+        """Return the checkpoint names, oldest first."""
+        with self._state_lock:
+            return list(self._checkpoints)
+
+    def restore(self, name: str) -> int:
+        """
+        Return to a checkpoint by undoing or redoing the steps in between.
+
+        Args:
+            name (str): Name given to checkpoint.
+
+        Returns:
+            int: Number of operations undone or redone.
+
+        Raises:
+            OperationError: If the checkpoint is unknown, or a new calculation
+                after undoing past it discarded the way back.
+        """
+        with self._state_lock:
+            if name not in self._checkpoints:
+                raise OperationError(f"Unknown checkpoint: {name}")
+            self._resume_undo_log()
+            depth, top = self._checkpoints[name]
+            current = len(self.undo_stack)
+            # The delta on top identifies the timeline the checkpoint was taken on
+            if depth <= current and (self.undo_stack[depth - 1] if depth else None) is top:
+                return self.undo_steps(current - depth)
+            ahead = depth - current
+            if 0 < ahead <= len(self.redo_stack) and self.redo_stack[-ahead] is top:
+                return self.redo_steps(ahead)
+            raise OperationError(f"Checkpoint {name} is no longer reachable")
+
+    def dump_undo_state(self, handle: TextIO) -> int:
+        """
+        Write the undo and redo stacks for diagnostics.
+
+        The dump uses the undo log's line format, so UndoLog.replay can read it
+        back. Only the stacks' delta references are copied under the lock;
+        each delta is encoded and written as it is reached, so the cost of a
+        dump follows the size of the changes, not copies of the history.
+
+        Args:
+            handle (TextIO): Destination, e.g. a file opened for writing text.
+
+        Returns:
+            int: Number of lines written.
+        """
+        with self._state_lock:
+            self._resume_undo_log()
+            ops = UndoLog.stack_ops(self.undo_stack, self.redo_stack)
+        UndoLog.write_ops(handle, ops)
+        return len(ops)
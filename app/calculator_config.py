@@ -16,6 +16,15 @@ from app.exceptions import ConfigurationError
 # Load environment variables from a .env file into the program's environment
 load_dotenv()
 
+# Accepted values for CALCULATOR_FSYNC_POLICY
+FSYNC_POLICIES = ('always', 'batched', 'never')
+
+# Accepted values for CALCULATOR_HISTORY_COMPRESSION
+HISTORY_COMPRESSIONS = ('none', 'gzip', 'bz2', 'xz', 'zstd', 'lz4')
+
+# Accepted values for CALCULATOR_HISTORY_STORAGE
+HISTORY_STORAGES = ('csv', 'segmented', 'dictionary', 'sqlite')
+
 
 def get_project_root() -> Path:
     """
@@ -33,6 +42,22 @@ def get_project_root() -> Path:
     return current_file.parent.parent
 
 
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """
+    Immutable, fully resolved file locations of a calculator configuration.
+
+    All environment lookups and path resolution happen once when the snapshot
+    is built, so reading a path afterwards is a plain attribute access. The
+    snapshot is rebuilt whenever the configuration's base_dir changes.
+    """
+
+    log_dir: Path
+    history_dir: Path
+    history_file: Path
+    log_file: Path
+
+
 @dataclass
 class CalculatorConfig:
     """
@@ -43,9 +68,17 @@ class CalculatorConfig:
     calculation precision, maximum input values, and default encoding.
 
     Configuration can be set via environment variables or by passing parameters
-    directly to the class constructor.
+    directly to the class constructor. Environment variables are read once, when
+    the configuration is created; call reload() to pick up later changes.
     """
 
+    __slots__ = (
+        'base_dir', 'max_history_size', 'auto_save', 'precision',
+        'max_input_value', 'default_encoding', 'fsync_policy', 'fsync_batch_size',
+        'history_compression', 'history_storage', 'segment_max_records', 'segment_max_bytes',
+        'segment_retention', 'snapshot', '_overrides'
+    )
+
     def __init__(
         self,
         base_dir: Optional[Path] = None,
@@ -53,7 +86,14 @@ class CalculatorConfig:
         auto_save: Optional[bool] = None,
         precision: Optional[int] = None,
         max_input_value: Optional[Number] = None,
-        default_encoding: Optional[str] = None
+        default_encoding: Optional[str] = None,
+        fsync_policy: Optional[str] = None,
+        fsync_batch_size: Optional[int] = None,
+        history_compression: Optional[str] = None,
+        history_storage: Optional[str] = None,
+        segment_max_records: Optional[int] = None,
+        segment_max_bytes: Optional[int] = None,
+        segment_retention: Optional[int] = None
     ):
         """
         Initialize configuration with environment variables and defaults.
@@ -65,39 +105,146 @@ class CalculatorConfig:
             precision (Optional[int], optional): Number of decimal places for calculations. Defaults to None.
             max_input_value (Optional[Number], optional): Maximum allowed input value. Defaults to None.
             default_encoding (Optional[str], optional): Default encoding for file operations. Defaults to None.
+            fsync_policy (Optional[str], optional): When history writes are flushed to disk:
+                'always', 'batched' or 'never'. Defaults to None.
+            fsync_batch_size (Optional[int], optional): Writes per fsync with the 'batched' policy.
+                Defaults to None.
+            history_compression (Optional[str], optional): Codec for saved history files:
+                'none', 'gzip', 'bz2', 'xz', 'zstd' or 'lz4'. Defaults to None.
+            history_storage (Optional[str], optional): History layout on disk: 'csv' for one
+                file, 'segmented' for rolling segments, 'dictionary' for one
+                dictionary-encoded file or 'sqlite' for a database shared by
+                sessions. Defaults to None.
+            segment_max_records (Optional[int], optional): Records per segment before rolling over.
+                Defaults to None.
+            segment_max_bytes (Optional[int], optional): Bytes per segment before rolling over.
+                Defaults to None.
+            segment_retention (Optional[int], optional): Segments kept on disk. Defaults to None.
         """
+        # Remember explicit arguments so reload() keeps them over the environment
+        self._overrides = (
+            base_dir, max_history_size, auto_save, precision, max_input_value, default_encoding,
+            fsync_policy, fsync_batch_size, history_compression, history_storage,
+            segment_max_records, segment_max_bytes, segment_retention
+        )
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Re-read environment variables and rebuild the resolved paths.
+
+        Values passed explicitly to the constructor keep taking precedence.
+        """
+        (base_dir, max_history_size, auto_save, precision, max_input_value, default_encoding,
+         fsync_policy, fsync_batch_size, history_compression, history_storage,
+         segment_max_records, segment_max_bytes, segment_retention) = self._overrides
+
         # Set base directory to project root by default
         project_root = get_project_root()
-        self.base_dir = base_dir or Path(
+        base_dir = base_dir or Path(
             os.getenv('CALCULATOR_BASE_DIR', str(project_root))
         ).resolve()
 
         # Maximum history size
-        self.max_history_size = max_history_size or int(
+        max_history_size = max_history_size or int(
             os.getenv('CALCULATOR_MAX_HISTORY_SIZE', '1000')
         )
 
         # Auto-save preference
         auto_save_env = os.getenv('CALCULATOR_AUTO_SAVE', 'true').lower()
-        self.auto_save = auto_save if auto_save is not None else (
+        auto_save = auto_save if auto_save is not None else (
             auto_save_env == 'true' or auto_save_env == '1'
         )
 
         # Calculation precision
-        self.precision = precision or int(
+        precision = precision or int(
             os.getenv('CALCULATOR_PRECISION', '10')
         )
 
         # Maximum input value allowed
-        self.max_input_value = max_input_value or Decimal(
+        max_input_value = max_input_value or Decimal(
             os.getenv('CALCULATOR_MAX_INPUT_VALUE', '1e999')
         )
 
         # Default encoding for file operations
-        self.default_encoding = default_encoding or os.getenv(
+        default_encoding = default_encoding or os.getenv(
             'CALCULATOR_DEFAULT_ENCODING', 'utf-8'
         )
 
+        # Durability of history writes
+        fsync_policy = (fsync_policy or os.getenv(
+            'CALCULATOR_FSYNC_POLICY', 'always'
+        )).lower()
+        fsync_batch_size = fsync_batch_size or int(
+            os.getenv('CALCULATOR_FSYNC_BATCH_SIZE', '10')
+        )
+
+        # Compression of saved history
+        history_compression = (history_compression or os.getenv(
+            'CALCULATOR_HISTORY_COMPRESSION', 'none'
+        )).lower()
+
+        # Layout of saved history
+        history_storage = (history_storage or os.getenv(
+            'CALCULATOR_HISTORY_STORAGE', 'csv'
+        )).lower()
+        segment_max_records = segment_max_records or int(
+            os.getenv('CALCULATOR_SEGMENT_MAX_RECORDS', '1000')
+        )
+        segment_max_bytes = segment_max_bytes or int(
+            os.getenv('CALCULATOR_SEGMENT_MAX_BYTES', str(1024 * 1024))
+        )
+        segment_retention = segment_retention or int(
+            os.getenv('CALCULATOR_SEGMENT_RETENTION', '50')
+        )
+
+        self.max_history_size = max_history_size
+        self.auto_save = auto_save
+        self.precision = precision
+        self.max_input_value = max_input_value
+        self.default_encoding = default_encoding
+        self.fsync_policy = fsync_policy
+        self.fsync_batch_size = fsync_batch_size
+        self.history_compression = history_compression
+        self.history_storage = history_storage
+        self.segment_max_records = segment_max_records
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_retention = segment_retention
+        # Resolves the file locations
+        self.base_dir = base_dir
+
+    def __setattr__(self, name: str, value) -> None:
+        object.__setattr__(self, name, value)
+        if name == 'base_dir':
+            # Keep the derived paths in step with the base directory
+            object.__setattr__(self, 'snapshot', self._resolve_paths(value))
+
+    @staticmethod
+    def _resolve_paths(base_dir: Path) -> ConfigSnapshot:
+        """Resolve the directory and file locations under base_dir."""
+        log_dir = Path(os.getenv(
+            'CALCULATOR_LOG_DIR',
+            str(base_dir / "logs")
+        )).resolve()
+        history_dir = Path(os.getenv(
+            'CALCULATOR_HISTORY_DIR',
+            str(base_dir / "history")
+        )).resolve()
+        history_file = Path(os.getenv(
+            'CALCULATOR_HISTORY_FILE',
+            str(history_dir / "calculator_history.csv")
+        )).resolve()
+        log_file = Path(os.getenv(
+            'CALCULATOR_LOG_FILE',
+            str(log_dir / "calculator.log")
+        )).resolve()
+        return ConfigSnapshot(
+            log_dir=log_dir,
+            history_dir=history_dir,
+            history_file=history_file,
+            log_file=log_file
+        )
+
     @property
     def log_dir(self) -> Path:
         """
@@ -108,10 +255,7 @@ class CalculatorConfig:
         Returns:
             Path: The log directory path.
         """
-        return Path(os.getenv(
-            'CALCULATOR_LOG_DIR',
-            str(self.base_dir / "logs")
-        )).resolve()
+        return self.snapshot.log_dir
 
     @property
     def history_dir(self) -> Path:
@@ -123,10 +267,7 @@ class CalculatorConfig:
         Returns:
             Path: The history directory path.
         """
-        return Path(os.getenv(
-            'CALCULATOR_HISTORY_DIR',
-            str(self.base_dir / "history")
-        )).resolve()
+        return self.snapshot.history_dir
 
     @property
     def history_file(self) -> Path:
@@ -138,10 +279,33 @@ class CalculatorConfig:
         Returns:
             Path: The history file path.
         """
-        return Path(os.getenv(
-            'CALCULATOR_HISTORY_FILE',
-            str(self.history_dir / "calculator_history.csv")
-        )).resolve()
+        return self.snapshot.history_file
+
+    @property
+    def input_history_file(self) -> Path:
+        """
+        Get the REPL input history file path.
+
+        Lines typed at the interactive prompt are kept here, next to the
+        calculation history, so they can be recalled in later sessions.
+
+        Returns:
+            Path: The input history file path.
+        """
+        return self.history_dir / "input_history"
+
+    @property
+    def plugin_dir(self) -> Path:
+        """
+        Get the plugins directory path.
+
+        Each <operator>.py file here adds an operation, imported the first
+        time the operator is used.
+
+        Returns:
+            Path: The plugins directory path.
+        """
+        return self.base_dir / "plugins"
 
     @property
     def log_file(self) -> Path:
@@ -153,10 +317,7 @@ class CalculatorConfig:
         Returns:
             Path: The log file path.
         """
-        return Path(os.getenv(
-            'CALCULATOR_LOG_FILE',
-            str(self.log_dir / "calculator.log")
-        )).resolve()
+        return self.snapshot.log_file
 
     def validate(self) -> None:
         """
@@ -174,3 +335,17 @@ class CalculatorConfig:
             raise ConfigurationError("precision must be positive")
         if self.max_input_value <= 0:
             raise ConfigurationError("max_input_value must be positive")
+        if self.fsync_policy not in FSYNC_POLICIES:
+            raise ConfigurationError(f"fsync_policy must be one of {', '.join(FSYNC_POLICIES)}")
+        if self.fsync_batch_size <= 0:
+            raise ConfigurationError("fsync_batch_size must be positive")
+        if self.history_compression not in HISTORY_COMPRESSIONS:
+            raise ConfigurationError(
+                f"history_compression must be one of {', '.join(HISTORY_COMPRESSIONS)}"
+            )
+        if self.history_storage not in HISTORY_STORAGES:
+            raise ConfigurationError(f"history_storage must be one of {', '.join(HISTORY_STORAGES)}")
+        if self.segment_max_records <= 0 or self.segment_max_bytes <= 0:
+            raise ConfigurationError("segment limits must be positive")
+        if self.segment_retention <= 0:
+            raise ConfigurationError("segment_retention must be positive")
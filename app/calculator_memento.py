@@ -4,7 +4,7 @@
 
 from dataclasses import dataclass, field
 import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from app.calculation import Calculation
 
@@ -54,3 +54,32 @@ class CalculatorMemento:
             history=[Calculation.from_dict(calc) for calc in data['history']],
             timestamp=datetime.datetime.fromisoformat(data['timestamp'])
         )
+
+
+@dataclass(frozen=True)
+class HistoryDelta:
+    """
+    Memento recording how one history state turned into the next.
+
+    Instead of a full copy of the history, a delta keeps only the calculations
+    dropped from the front and those appended at the end. A calculation is
+    one appended entry (plus the evicted oldest one when the history is
+    full); loading a file replaces everything. Applying or reverting a delta
+    costs the size of the delta, not the size of the history.
+    """
+
+    removed: Tuple[Calculation, ...]  # Calculations dropped from the front
+    added: Tuple[Calculation, ...]    # Calculations appended at the end
+
+    def apply(self, history: List[Calculation]) -> None:
+        """Turn the earlier state into the later one, in place."""
+        if self.removed:
+            del history[:len(self.removed)]
+        history.extend(self.added)
+
+    def revert(self, history: List[Calculation]) -> None:
+        """Turn the later state back into the earlier one, in place."""
+        if self.added:
+            del history[len(history) - len(self.added):]
+        if self.removed:
+            history[:0] = self.removed
@@ -2,14 +2,36 @@
 from app.opeartions import OperationFactory
 from app.calculator import Calculator
 from app.history import AutoSaveObserver, LoggingObserver
-from app.exceptions import UnknownOperationError, ValidationError
+from app.history_view import MmapHistoryView
+from app.profiling import SessionProfiler
+from app.repl_input import ReplInput
+from app.repl_output import TerminalWriter, writer_for
+from app.exceptions import OperationError, UnknownOperationError, ValidationError
 import logging
-import os
 import re
+import sys
+from typing import Iterable, Iterator, List, Optional
 import colorama
-from colorama import Fore, Back, Style
 
 COMMANDS = ["history", "help", "undo","redo","save","load","exit","clear"]
+# Entries shown by 'history tail', and per page of 'history'
+HISTORY_TAIL = 20
+HISTORY_PAGE_SIZE = 20
+# history, history tail, history page <k>, history <n>
+HISTORY_PATTERN = re.compile(r"^history(?:\s+(tail|page\s+\d+|\d+))?$")
+# search <operation> / search op=<operation> operand=<n> result=<n>
+SEARCH_PATTERN = re.compile(r"^search(?:\s+\S+)+$")
+# undo <n> / redo <n>
+STEPS_PATTERN = re.compile(r"^(undo|redo)\s+\d+$")
+# checkpoint <name> / restore <name>
+CHECKPOINT_PATTERN = re.compile(r"^(checkpoint|restore)\s+\S+$")
+# profile start / profile stop / profile dump
+PROFILE_PATTERN = re.compile(r"^profile\s+(start|stop|dump)$")
+# <operator> <n> <n> ..., e.g. sum 1 2 3 or mean 4, 5, 6
+REDUCTION_PATTERN = re.compile(r"^[a-z_]\w*(?:[\s,]+-?\d*\.?\d+)+$")
+# Words completed with Tab besides the operators
+COMPLETION_WORDS = COMMANDS + ["search", "checkpoint", "restore", "profile", "tail", "page", "start", "stop", "dump"]
+SEARCH_KEYS = {'op': 'operation', 'operation': 'operation', 'operand': 'operand', 'result': 'result'}
 
 helpDes ="""
 How to use:
@@ -18,26 +40,31 @@ accept operator : + - * / % pow root div abs pre
 % : modulo;  pow : exponentiation; root : root calculation
 div : integer division; abs : absolute difference
 pre: percentage calculation
+log : logarithm of op1 to base op2; gcd : greatest common divisor; hypot : hypotenuse
+Operations added as plugins are used the same way, by their operator.
+sum, mean, min, max, product also take any number of values: sum 1 2 3 4
 
 Available command:
-history : Display the calculation history.
+history : Display the calculation history, one page at a time.
+history <n> : Display the last n calculations.
+history tail : Display the last 20 calculations.
+history page <k> : Display page k of the history.
+search <criteria> : Find calculations, e.g. 'search pow', 'search result=8', 'search op=+ operand=2'.
 clear : clear the current calculation history.
 undo : undo the last performed calculationn.
 redo : redo the last undone calculation.
+undo <n> / redo <n> : undo or redo n calculations at once.
+checkpoint <name> : remember the current state under a name.
+restore <name> : return to a checkpoint.
+profile start|stop|dump : profile the session; dump writes reports to the log directory.
 save : save the history to local file.
 load : load calculation history from local file.
 exit : exit the application
 """
 
-def clear_console():
-    # 检测操作系统类型
-    if os.name == 'nt':
-        # 'nt' 表示 Windows 系统，使用 'cls' 命令清屏
-        _ = os.system('cls')
-    else:
-        # 其他系统 (如 macOS 和 Linux)，使用 'clear' 命令清屏
-        # os.name == 'posix' 适用于这些系统
-        _ = os.system('clear')
+def completion_words() -> List[str]:
+    """Commands and every registered operator, for Tab completion."""
+    return COMPLETION_WORDS + OperationFactory.symbols()
 
 def split_input(input_str: str) -> list[str]:
     """
@@ -46,6 +73,7 @@ def split_input(input_str: str) -> list[str]:
     合法格式包括：
     1. 二元运算: <数字> <操作符> <数字> [=]
     2. 命令: history, help, undo,save
+    3. 多元归约: <操作符> <数字> <数字> ...，如 sum 1 2 3，返回 ['reduce', 'sum', '1', '2', '3']
     
     操作符: +, -, *, /, %, div, root, pow, abs, per (全部作为二元操作符处理)
     数字: 整数、小数、负数。
@@ -68,6 +96,26 @@ def split_input(input_str: str) -> list[str]:
     if processed_input in COMMANDS:
         return [processed_input]
 
+    # history takes an optional window: tail, page <k> or a count
+    match_history = HISTORY_PATTERN.match(processed_input)
+    if match_history:
+        return processed_input.split()
+
+    # search takes one or more criteria
+    if SEARCH_PATTERN.match(processed_input):
+        return processed_input.split()
+
+    # undo/redo take a step count, checkpoint/restore a name
+    if STEPS_PATTERN.match(processed_input) or CHECKPOINT_PATTERN.match(processed_input):
+        return processed_input.split()
+
+    if PROFILE_PATTERN.match(processed_input):
+        return processed_input.split()
+
+    # n-ary reductions come back as ['reduce', <operator>, <n>, ...]
+    if REDUCTION_PATTERN.match(processed_input):
+        return ['reduce'] + re.split(r"[\s,]+", processed_input)
+
     # 预处理：移除末尾的等号（如果存在）
     if processed_input.endswith('='):
         processed_input = processed_input[:-1].strip()
@@ -81,7 +129,8 @@ def split_input(input_str: str) -> list[str]:
     # 定义所有二元操作符：
     # + - * / % mod root pow abs per
     # 注意：+ - * / % 必须转义或在字符集中
-    OPERATOR_PATTERN = r"(\+|-|\*|\/|%|div|root|pow|abs|per)"
+    # 字母操作符按名称匹配，插件操作（如 log、gcd）无需修改此处
+    OPERATOR_PATTERN = r"(\+|-|\*|\/|%|[a-z_]\w*)"
 
     # --- 2. 匹配二元运算 (数字 操作符 数字) ---
     # 模式: <数字> <操作符> <数字>
@@ -117,83 +166,263 @@ def split_input(input_str: str) -> list[str]:
     raise ValueError(f"输入格式不合法: '{input_str}'。合法格式为 '数字 操作符 数字 [=]' 或 '命令'。")
 
 
-def calculator_repl():
+def write_page(lines: Iterable[str], out: Optional[TerminalWriter] = None) -> None:
+    """Write one page of history entries with a single buffered write."""
+    with writer_for(out) as out:
+        out.lines('entry', lines)
 
-    
+
+def show_history_window(calc: Calculator, args: List[str], out: Optional[TerminalWriter] = None) -> None:
+    """
+    Handle the history command.
+
+    When the saved history is larger than the in-memory one (segmented
+    storage keeps more than max_history_size), the command pages through a
+    memory-mapped view of it, so older calculations can be shown without
+    loading them.
+
+    Args:
+        calc: The calculator whose history is shown.
+        args: The words after 'history': [], ['tail'], ['page', k] or [n].
+        out: Where to write; defaults to a writer over stdout.
+    """
+    view = calc.open_history_view()
+    try:
+        _show_history_window(calc, args, out, view)
+    finally:
+        if view is not None:
+            view.close()
+
+
+def _show_history_window(
+    calc: Calculator, args: List[str], out: Optional[TerminalWriter], view: Optional[MmapHistoryView]
+) -> None:
+    def window(start: int, stop: int) -> Iterator[str]:
+        if view is None:
+            return calc.iter_history(start, stop)
+        return (calc.format_history_entry(entry) for entry in view[start:stop])
+
+    with writer_for(out) as out:
+        total = len(calc.history) if view is None else len(view)
+        if not total:
+            out.write('error', "No calculations in history")
+            return
+        pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        logging.info(f'Show History {" ".join(args) or "all"} of {total} lines in total')
+
+        if not args:
+            out.write('heading', "\nCalculation History:")
+            for page in range(pages):
+                write_page(window(page * HISTORY_PAGE_SIZE, (page + 1) * HISTORY_PAGE_SIZE), out)
+                # Pause between pages only when someone is reading the terminal
+                if page + 1 < pages and sys.stdin.isatty() and sys.stdout.isatty():
+                    out.flush()
+                    answer = input(f"-- page {page + 1} of {pages}: Enter for more, q to stop --")
+                    if answer.strip().lower() == 'q':
+                        break
+            return
+
+        if args[0] == 'page':
+            page = int(args[1])
+            if not 1 <= page <= pages:
+                out.write('error', f"Page {page} out of range (1-{pages})")
+                return
+            out.write('heading', f"\nCalculation History (page {page} of {pages}):")
+            write_page(window((page - 1) * HISTORY_PAGE_SIZE, page * HISTORY_PAGE_SIZE), out)
+            return
+
+        count = HISTORY_TAIL if args[0] == 'tail' else int(args[0])
+        count = min(count, total)
+        out.write('heading', f"\nCalculation History (last {count} of {total}):")
+        if count:
+            write_page(window(total - count, total), out)
+
+
+def show_search_results(calc: Calculator, args: List[str], out: Optional[TerminalWriter] = None) -> None:
+    """
+    Handle the search command.
+
+    Args:
+        calc: The calculator whose history is searched.
+        args: Criteria after 'search': a bare operation, or key=value pairs
+            with keys op, operand and result.
+        out: Where to write; defaults to a writer over stdout.
+    """
+    with writer_for(out) as out:
+        criteria = {}
+        for arg in args:
+            key, sep, value = arg.partition('=')
+            if not sep:
+                key, value = 'op', arg
+            if key not in SEARCH_KEYS or not value:
+                out.write('error', f"Unknown search criterion: {arg}")
+                return
+            criteria[SEARCH_KEYS[key]] = value
+        try:
+            matches = calc.find(**criteria)
+        except (UnknownOperationError, ValidationError) as e:
+            out.write('error', f"{e}")
+            return
+        logging.info(f'Search {" ".join(args)}: {len(matches)} matches')
+        if not matches:
+            out.write('error', "No matching calculations")
+            return
+        shown = matches[-HISTORY_PAGE_SIZE:]
+        out.write('heading', f"\n{len(matches)} matching calculations (showing last {len(shown)}):")
+        write_page((calc.format_history_entry(entry) for entry in shown), out)
+
+
+def run_profile_command(profiler: SessionProfiler, action: str, out: Optional[TerminalWriter] = None) -> None:
+    """
+    Handle 'profile start', 'profile stop' and 'profile dump'.
+
+    Args:
+        profiler (SessionProfiler): The session's profiler.
+        action (str): start, stop or dump.
+        out (Optional[TerminalWriter], optional): Where to write; defaults to stdout.
+    """
+    with writer_for(out) as out:
+        try:
+            if action == 'start':
+                profiler.start()
+                out.write('success', "Profiling started")
+            elif action == 'stop':
+                profiler.stop()
+                out.write('success', "Profiling stopped; use 'profile dump' to write the reports")
+            else:
+                stats_path, report_path = profiler.dump()
+                out.write('success', f"Profile written to {stats_path} and {report_path}")
+                logging.info(f'Profile dumped to {stats_path}')
+        except OperationError as e:
+            out.write('error', f"{e}")
+
+
+def calculator_repl(profile: bool = False):
+    """
+    Run the interactive calculator.
+
+    Args:
+        profile (bool, optional): Profile the whole session and write the
+            reports to the log directory on exit.
+    """
+    repl_input = None
+    profiler = None
+    # Output is collected per command and written with a single flush
+    out = TerminalWriter()
     try:
         calc = Calculator()
         calc.add_observer(LoggingObserver())
         calc.add_observer(AutoSaveObserver(calc))
-        print(Fore.GREEN + "Welcome to my calculator, input help for HELP" + Style.RESET_ALL)
+        profiler = SessionProfiler(calc.config.log_dir)
+        if profile:
+            profiler.start()
+        # Let ANSI colours and clear-screen sequences work on legacy Windows consoles
+        colorama.just_fix_windows_console()
+        # Line editing, input history and completion when run in a terminal
+        repl_input = ReplInput(calc.config.input_history_file, completion_words)
+        repl_input.install()
+        out.write('success', "Welcome to my calculator, input help for HELP")
         while True:
             try:
+                out.flush()
                 inputstr = input()
                 arr = split_input(inputstr)
-                clear_console()
-                print('\n')
+                out.clear_screen()
+                out.write('plain', '\n')
                 if(arr[0] == 'help'):
-                    print(Fore.YELLOW+ helpDes+Style.RESET_ALL)
+                    out.write('help', helpDes)
                     logging.info('Show help')
                     continue
                 if(arr[0] == 'exit'):
                     # Attempt to save history before exiting
                     try:
                         calc.save_history()
-                        print(Fore.GREEN+"History saved successfully."+Style.RESET_ALL)
+                        out.write('success', "History saved successfully.")
                     except Exception as e:
-                        print(f"Warning: Could not save history: {e}")
-                    print(Back.GREEN+"Goodbye!"+Style.RESET_ALL)
+                        out.write('plain', f"Warning: Could not save history: {e}")
+                    out.write('farewell', "Goodbye!")
                     break
                 if(arr[0] == 'clear'):
                     # Clear calculation history
                     calc.clear_history()
-                    print(Fore.GREEN+"History cleared"+Style.RESET_ALL)
+                    out.write('success', "History cleared")
                     logging.info('Clear History')
                     continue
+                if(arr[0] in ('undo', 'redo') and len(arr) == 2):
+                    # Undo or redo several calculations at once
+                    steps = int(arr[1])
+                    done = calc.undo_steps(steps) if arr[0] == 'undo' else calc.redo_steps(steps)
+                    if done:
+                        out.write('success', f"{done} operations {arr[0]}ne")
+                        logging.info(f'{arr[0].capitalize()} {done} operations')
+                    else:
+                        out.write('error', f"Nothing to {arr[0]}")
+                    continue
+                if(arr[0] == 'checkpoint'):
+                    calc.checkpoint(arr[1])
+                    out.write('success', f"Checkpoint {arr[1]} saved")
+                    logging.info(f'Checkpoint {arr[1]}')
+                    continue
+                if(arr[0] == 'restore'):
+                    try:
+                        done = calc.restore(arr[1])
+                        out.write('success', f"Restored checkpoint {arr[1]} ({done} operations)")
+                        logging.info(f'Restore checkpoint {arr[1]}')
+                    except OperationError as e:
+                        out.write('error', f"{e}")
+                    continue
                 if(arr[0] == 'undo'):
                     # Undo the last calculation
                     if calc.undo():
-                        print(Fore.GREEN+"Operation undone"+Style.RESET_ALL)
+                        out.write('success', "Operation undone")
                         logging.info('Undo Operation')
                     else:
-                        print(Fore.RED+"Nothing to undo"+Style.RESET_ALL)
+                        out.write('error', "Nothing to undo")
                     continue
                 if(arr[0] == 'redo'):
                     # Redo the last undone calculation
                     if calc.redo():
-                        print(Fore.GREEN+"Operation redone"+Style.RESET_ALL)
+                        out.write('success', "Operation redone")
                         logging.info('Redo operation')
                     else:
-                        print(Fore.RED+"Nothing to redo"+Style.RESET_ALL)
+                        out.write('error', "Nothing to redo")
                     continue
                 if(arr[0] == 'load'):
                     # Load calculation history from file
                     try:
                         calc.load_history()
-                        print(Fore.GREEN+"History loaded successfully"+Style.RESET_ALL)
+                        out.write('success', "History loaded successfully")
                         logging.info('Load Histtory')
                     except Exception as e:
                         logging.error(f"Error loading history: {e}")
-                        print(Fore.RED+ f"Error loading history: {e}"+Style.RESET_ALL)
+                        out.write('error', f"Error loading history: {e}")
                     continue
                 if(arr[0] == 'save'):
                     # Save calculation history to file
                     try:
                         calc.save_history()
-                        print(Fore.GREEN+"History saved successfully"+Style.RESET_ALL)
+                        out.write('success', "History saved successfully")
                     except Exception as e:
                         logging.error(f"Error saving history: {e}")
-                        print(Fore.RED+ f"Error saving history: {e}"+Style.RESET_ALL)
+                        out.write('error', f"Error saving history: {e}")
                     continue
                 if(arr[0] == 'history'):
-                    history = calc.show_history()
-                    if not history:
-                        print(Fore.RED+ "No calculations in history"+Style.RESET_ALL)
-                    else:
-                        print(Fore.BLUE+ "\nCalculation History:"+Style.RESET_ALL)
-                        logging.info(f'Show History {len(history)} lines in total')
-                        for i, entry in enumerate(history, 1):
-                            print(Back.BLUE+f"{entry}"+Style.RESET_ALL)
+                    show_history_window(calc, arr[1:], out)
+                    continue
+                if(arr[0] == 'search'):
+                    show_search_results(calc, arr[1:], out)
+                    continue
+                if(arr[0] == 'profile'):
+                    run_profile_command(profiler, arr[1], out)
+                    continue
+                if(arr[0] == 'reduce'):
+                    try:
+                        operation = OperationFactory.create_operation(arr[1])
+                        result = calc.perform_reduction(arr[2:], operation)
+                        out.write('result', f"{arr[1]} of {len(arr) - 2} values = {operation.format_result(result)} \n")
+                    except (UnknownOperationError, ValidationError, OperationError) as e:
+                        out.write('error', f"{e}")
+                        logging.error(f'Error {e}')
                     continue
 #---------------create operation
                 if len(arr) == 3:
@@ -201,19 +430,28 @@ def calculator_repl():
                         operation = OperationFactory.create_operation(arr[1])
                         calc.set_operation(operation)
                         result = calc.perform_op(arr[0],arr[2])
-                        print(Back.YELLOW + arr[0],arr[1],arr[2],'=',result,'\n' +Style.RESET_ALL)
+                        out.write('result', f"{arr[0]} {arr[1]} {arr[2]} = {operation.format_result(result)} \n")
                     except (UnknownOperationError, ValidationError) as e:
-                        print(Fore.RED+f"{e}"+Style.RESET_ALL)
+                        out.write('error', f"{e}")
                         logging.error(f'Error {e}')
                         continue
 
                 
 #-----------------
             except ValueError:
-                print(Fore.RED+ "Imput Error"+Style.RESET_ALL)
+                out.write('error', "Imput Error")
                 logging.info('User input error')
                 continue
     except Exception as e:
-        print(Fore.RED+ f"error:{e}" +Style.RESET_ALL)
+        out.write('error', f"error:{e}")
         logging.error(f'Error {e}')
-        pass
\ No newline at end of file
+        pass
+    finally:
+        # Write the profile however the session ends: exit, end of input,
+        # Ctrl-C or an unexpected error
+        if profiler is not None and profiler.active:
+            profiler.stop()
+            run_profile_command(profiler, 'dump', out)
+        out.flush()
+        if repl_input is not None:
+            repl_input.close()
\ No newline at end of file
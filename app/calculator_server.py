@@ -0,0 +1,329 @@
+########################
+# Calculator Server    #
+########################
+
+import argparse
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+import logging
+from typing import Dict, List, Optional
+
+from app.calculator import Calculator
+from app.calculator_repl import split_input
+from app.exceptions import CalculatorError
+from app.history import LoggingObserver
+from app.opeartions import OperationFactory
+
+# Operators whose cost grows with the operands (large exponents, float roots);
+# these run in the executor so they never stall the event loop.
+HEAVY_OPERATIONS = frozenset({'pow', 'root'})
+
+# Commands that touch the history file and therefore also run in the executor
+IO_COMMANDS = frozenset({'save', 'load'})
+
+# Maximum number of requests in flight per connection before reading pauses
+DEFAULT_PIPELINE_DEPTH = 64
+
+# Longest request line accepted; longer lines are discarded with an ERR reply
+DEFAULT_MAX_REQUEST_BYTES = 64 * 1024
+
+# Queued in place of a request line that exceeded the limit
+_OVERSIZED = object()
+
+
+class CalculatorServer:
+    """
+    asyncio front-end exposing a Calculator over a local socket.
+
+    Clients send newline-delimited expressions ("2 + 3") or commands ("undo")
+    and receive one response line per request, in request order:
+    "OK <result>" on success or "ERR <message>" on failure. Requests are
+    pipelined, so a client may send many lines without waiting for replies;
+    each connection's requests are still evaluated one after another, so a
+    later "undo" always sees the calculations sent before it. All connections
+    share one thread-safe Calculator.
+    """
+
+    def __init__(
+        self,
+        calculator: Optional[Calculator] = None,
+        executor: Optional[Executor] = None,
+        pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+        max_request_bytes: int = DEFAULT_MAX_REQUEST_BYTES
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            calculator (Optional[Calculator], optional): Calculator shared by all
+                connections. A new one with a logging observer is created if omitted.
+            executor (Optional[Executor], optional): Executor for heavy operations
+                and file I/O. Defaults to a thread pool owned by the server.
+            pipeline_depth (int, optional): Requests in flight per connection.
+            max_request_bytes (int, optional): Longest accepted request line.
+        """
+        if calculator is None:
+            calculator = Calculator()
+            calculator.add_observer(LoggingObserver())
+        self.calculator = calculator
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="calculator")
+        self.pipeline_depth = pipeline_depth
+        self.max_request_bytes = max_request_bytes
+        self._servers: List[asyncio.AbstractServer] = []
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        """
+        Start listening on a localhost TCP socket.
+
+        Args:
+            host (str, optional): Interface to bind. Defaults to loopback.
+            port (int, optional): Port to bind, 0 picks a free port.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        server = await asyncio.start_server(self.handle_client, host, port, limit=self.max_request_bytes)
+        self._servers.append(server)
+        logging.info(f"Calculator server listening on {server.sockets[0].getsockname()}")
+        return server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """
+        Start listening on a Unix domain socket.
+
+        Args:
+            path (str): Filesystem path of the socket.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        server = await asyncio.start_unix_server(self.handle_client, path, limit=self.max_request_bytes)
+        self._servers.append(server)
+        logging.info(f"Calculator server listening on {path}")
+        return server
+
+    async def close(self) -> None:
+        """
+        Stop all listeners, close open connections and release the executor
+        if the server owns it.
+        """
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        # Closing the transports makes every handler see end-of-stream and finish
+        for writer in list(self._connections.values()):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve one connection.
+
+        A reader loop queues every request as soon as its line arrives and a
+        worker evaluates the queued requests one at a time, in the order they
+        came in, sending each response before starting the next request. The
+        bounded queue between them applies backpressure to clients that
+        pipeline faster than the calculator can answer. A line longer than
+        max_request_bytes is discarded and answered with an ERR response,
+        and the requests after it are still served.
+
+        Args:
+            reader (asyncio.StreamReader): Stream of request lines.
+            writer (asyncio.StreamWriter): Stream for response lines.
+        """
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_depth)
+        worker = asyncio.create_task(self._serve_requests(pending, writer))
+        try:
+            while True:
+                line = await self._read_line(reader)
+                if line is None:
+                    await pending.put(_OVERSIZED)
+                    continue
+                if not line:
+                    break
+                request = line.decode('utf-8', errors='replace').strip()
+                if not request:
+                    continue
+                if request.lower() == 'exit':
+                    break
+                await pending.put(request)
+        except ConnectionError as e:
+            logging.info(f"Client disconnected: {e}")
+        finally:
+            await pending.put(None)
+            await worker
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._connections.pop(task, None)
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Read one request line.
+
+        Returns:
+            Optional[bytes]: The line, b'' at end of stream, or None if the line
+                exceeded the reader's limit and was discarded up to its newline.
+        """
+        try:
+            return await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError:
+            pass
+        while True:
+            try:
+                await reader.readuntil(b'\n')
+                return None
+            except asyncio.LimitOverrunError as e:
+                # e.consumed bytes hold no newline; drop them and keep looking
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                return None
+
+    async def _serve_requests(self, pending: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        """
+        Evaluate queued requests in order and write their responses, until
+        the end-of-stream marker.
+
+        A request is finished, including any work handed to the executor,
+        before the next one starts.
+
+        Args:
+            pending (asyncio.Queue): Request lines.
+            writer (asyncio.StreamWriter): Stream for response lines.
+        """
+        while True:
+            request = await pending.get()
+            if request is None:
+                break
+            if request is _OVERSIZED:
+                response = f"ERR Request longer than {self.max_request_bytes} bytes"
+            else:
+                response = await self.evaluate(request)
+            if writer.is_closing():
+                continue
+            writer.write(response.encode('utf-8') + b'\n')
+            # Only wait for the socket when nothing else is ready to send
+            if pending.empty():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+
+    async def evaluate(self, request: str) -> str:
+        """
+        Evaluate a single request line.
+
+        Args:
+            request (str): An expression such as "2 pow 8" or "sum 1 2 3", or a command.
+
+        Returns:
+            str: The response line without the trailing newline.
+        """
+        try:
+            arr = split_input(request)
+        except ValueError:
+            return f"ERR Invalid input: {request}"
+
+        try:
+            if len(arr) == 3:
+                operation = OperationFactory.create_operation(arr[1])
+                if arr[1] in HEAVY_OPERATIONS:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        self.executor, self.calculator.perform_op, arr[0], arr[2], operation
+                    )
+                else:
+                    result = self.calculator.perform_op(arr[0], arr[2], operation)
+                return f"OK {operation.format_result(result)}"
+            if arr[0] == 'reduce':
+                # Cost grows with the number and size of the values, so it
+                # never runs on the event loop
+                operation = OperationFactory.create_operation(arr[1])
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.executor, self.calculator.perform_reduction, arr[2:], operation
+                )
+                return f"OK {operation.format_result(result)}"
+            return await self._run_command(arr[0])
+        except CalculatorError as e:
+            return f"ERR {e}"
+        except Exception as e:
+            logging.error(f"Unexpected error serving '{request}': {e}")
+            return f"ERR {e}"
+
+    async def _run_command(self, command: str) -> str:
+        """
+        Run a history command.
+
+        Args:
+            command (str): The command name returned by split_input.
+
+        Returns:
+            str: The response line without the trailing newline.
+        """
+        if command == 'undo':
+            return "OK undone" if self.calculator.undo() else "ERR Nothing to undo"
+        if command == 'redo':
+            return "OK redone" if self.calculator.redo() else "ERR Nothing to redo"
+        if command == 'clear':
+            self.calculator.clear_history()
+            return "OK cleared"
+        if command in IO_COMMANDS:
+            loop = asyncio.get_running_loop()
+            action = self.calculator.save_history if command == 'save' else self.calculator.load_history
+            await loop.run_in_executor(self.executor, action)
+            return "OK saved" if command == 'save' else "OK loaded"
+        return f"ERR Unsupported command: {command}"
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, unix_path: Optional[str] = None) -> None:
+    """
+    Run a calculator server until cancelled, saving history on shutdown.
+
+    Args:
+        host (str, optional): TCP interface to bind.
+        port (int, optional): TCP port to bind.
+        unix_path (Optional[str], optional): Serve on this Unix socket instead of TCP.
+    """
+    server = CalculatorServer()
+    listener = await (server.start_unix(unix_path) if unix_path else server.start_tcp(host, port))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        try:
+            server.calculator.save_history()
+        except CalculatorError as e:
+            logging.error(f"Could not save history on shutdown: {e}")
+        await server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command-line entry point: python -m app.calculator_server [--port N | --unix PATH].
+    """
+    parser = argparse.ArgumentParser(description="Serve the calculator over a local socket.")
+    parser.add_argument('--host', default='127.0.0.1', help="TCP interface to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port to bind (default: 8765)")
+    parser.add_argument('--unix', dest='unix_path', help="Serve on a Unix domain socket at this path")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix_path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
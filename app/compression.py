@@ -0,0 +1,180 @@
+########################
+# History Compression  #
+########################
+
+import bz2
+from dataclasses import dataclass
+import gzip
+import io
+import lzma
+import shutil
+from pathlib import Path
+from typing import IO, Callable, Dict, Optional
+
+# zstd and lz4 are optional; the stdlib codecs are always available
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - depends on the environment
+    lz4_frame = None
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    A compression format for history files.
+
+    Attributes:
+        name: Value used in CALCULATOR_HISTORY_COMPRESSION.
+        suffix: File name suffix added to compressed files.
+        magic: Leading bytes identifying the format, used to detect it on load.
+        opener: Opens a binary file object as a (de)compressing stream, or None
+            if the codec's module is not installed.
+    """
+
+    name: str
+    suffix: str
+    magic: bytes
+    opener: Optional[Callable[[IO[bytes], str], IO[bytes]]]
+
+    @property
+    def available(self) -> bool:
+        return self.name == 'none' or self.opener is not None
+
+
+def _zstd_open(fileobj: IO[bytes], mode: str) -> IO[bytes]:
+    return zstandard.open(fileobj, mode, closefd=False)
+
+
+def _lz4_open(fileobj: IO[bytes], mode: str) -> IO[bytes]:
+    return lz4_frame.open(fileobj, mode)
+
+
+CODECS: Dict[str, Codec] = {
+    'none': Codec('none', '', b'', None),
+    'gzip': Codec('gzip', '.gz', b'\x1f\x8b', lambda f, mode: gzip.GzipFile(fileobj=f, mode=mode, compresslevel=6)),
+    'bz2': Codec('bz2', '.bz2', b'BZh', lambda f, mode: bz2.BZ2File(f, mode)),
+    'xz': Codec('xz', '.xz', b'\xfd7zXZ\x00', lambda f, mode: lzma.LZMAFile(f, mode)),
+    'zstd': Codec('zstd', '.zst', b'\x28\xb5\x2f\xfd', _zstd_open if zstandard else None),
+    'lz4': Codec('lz4', '.lz4', b'\x04\x22\x4d\x18', _lz4_open if lz4_frame else None),
+}
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Look up a codec by name.
+
+    Args:
+        name (str): Codec name, e.g. 'gzip'.
+
+    Returns:
+        Codec: The codec.
+
+    Raises:
+        KeyError: If the name is unknown.
+    """
+    return CODECS[name]
+
+
+def compressed_path(path: Path, codec: Codec) -> Path:
+    """Return path with the codec's suffix appended, unless it is already there."""
+    if not codec.suffix or path.name.endswith(codec.suffix):
+        return path
+    return path.with_name(path.name + codec.suffix)
+
+
+def detect_codec(path: Path) -> Codec:
+    """
+    Identify the compression of a file from its leading bytes.
+
+    Args:
+        path (Path): The file to inspect.
+
+    Returns:
+        Codec: The matching codec, or the 'none' codec for plain files.
+    """
+    with open(path, 'rb') as handle:
+        head = handle.read(6)
+    for codec in CODECS.values():
+        if codec.magic and head.startswith(codec.magic):
+            return codec
+    return CODECS['none']
+
+
+def wrap_binary(fileobj: IO[bytes], codec: Codec, mode: str) -> IO[bytes]:
+    """
+    Wrap an open binary file in the codec's streaming (de)compressor.
+
+    The returned stream never closes fileobj, so callers can still flush and
+    fsync the underlying file after finishing the compressed stream.
+
+    Args:
+        fileobj (IO[bytes]): The underlying binary file.
+        codec (Codec): The codec to apply.
+        mode (str): 'rb' or 'wb'.
+
+    Returns:
+        IO[bytes]: A binary stream, or fileobj itself for the 'none' codec.
+    """
+    if codec.name == 'none':
+        return fileobj
+    if not codec.available:
+        raise RuntimeError(f"Compression codec '{codec.name}' is not installed")
+    return codec.opener(fileobj, mode)
+
+
+def open_text(path: Path, encoding: str = 'utf-8', codec: Optional[Codec] = None) -> IO[str]:
+    """
+    Open a possibly compressed file for streaming text reads.
+
+    Args:
+        path (Path): The file to read.
+        encoding (str, optional): Text encoding of the decompressed content.
+        codec (Optional[Codec], optional): Codec to use; detected from the file if omitted.
+
+    Returns:
+        IO[str]: A text stream that decompresses while it is read.
+    """
+    codec = codec or detect_codec(path)
+    raw = open(path, 'rb')
+    try:
+        stream = wrap_binary(raw, codec, 'rb')
+    except Exception:
+        raw.close()
+        raise
+    return _ClosingTextWrapper(stream, raw, encoding)
+
+
+class _ClosingTextWrapper(io.TextIOWrapper):
+    """Text stream that also closes the raw file underneath a decompressor."""
+
+    def __init__(self, stream: IO[bytes], raw: IO[bytes], encoding: str):
+        super().__init__(stream, encoding=encoding, newline='')
+        self._raw = raw
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def compress_file(source: Path, target: Path, codec: Codec) -> None:
+    """
+    Stream source into target through codec, e.g. when archiving history.
+
+    Args:
+        source (Path): The uncompressed file.
+        target (Path): The compressed file to create.
+        codec (Codec): The codec to apply.
+    """
+    with open(source, 'rb') as src, open(target, 'wb') as raw:
+        stream = wrap_binary(raw, codec, 'wb')
+        shutil.copyfileobj(src, stream, 1024 * 1024)
+        if stream is not raw:
+            stream.close()
+
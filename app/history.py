@@ -45,9 +45,14 @@ class LoggingObserver(HistoryObserver):
         """
         if calculation is None:
             raise AttributeError("Calculation cannot be None")
+        if calculation.operand1 is None:
+            # a reduction records how many values it took instead of operands
+            operands = f"{calculation.count} values"
+        else:
+            operands = f"{calculation.operand1}, {calculation.operand2}"
         logging.info(
             f"Calculation performed: {calculation.operation} "
-            f"({calculation.operand1}, {calculation.operand2}) = "
+            f"({operands}) = "
             f"{calculation.result}"
         )
 
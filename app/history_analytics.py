@@ -0,0 +1,323 @@
+########################
+# History Analytics    #
+########################
+
+from bisect import bisect_left, insort
+import datetime
+from decimal import Decimal
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.calculation import Calculation
+
+
+class RunningStats:
+    """
+    Count, sum, min, max and percentiles of a multiset of Decimal values.
+
+    The values are kept sorted, so a value can be removed again as well as
+    added, and every query is answered from the stored state without
+    rescanning: min, max and percentiles are positions in the sorted list.
+    """
+
+    __slots__ = ('total', '_values')
+
+    def __init__(self):
+        self.total = Decimal(0)
+        self._values: List[Decimal] = []
+
+    def add(self, value: Decimal) -> None:
+        """Record one value."""
+        self.total += value
+        insort(self._values, value)
+
+    def remove(self, value: Decimal) -> None:
+        """
+        Forget one previously recorded value.
+
+        Raises:
+            ValueError: If the value was never recorded.
+        """
+        position = bisect_left(self._values, value)
+        if position == len(self._values) or self._values[position] != value:
+            raise ValueError(f"{value} was not recorded")
+        del self._values[position]
+        self.total -= value
+        if not self._values:
+            # drop any rounding residue so an emptied group starts over cleanly
+            self.total = Decimal(0)
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def minimum(self) -> Optional[Decimal]:
+        return self._values[0] if self._values else None
+
+    @property
+    def maximum(self) -> Optional[Decimal]:
+        return self._values[-1] if self._values else None
+
+    @property
+    def mean(self) -> Optional[Decimal]:
+        return self.total / self.count if self._values else None
+
+    def percentile(self, p: float) -> Optional[Decimal]:
+        """
+        Return the p-th percentile (nearest rank) of the recorded values.
+
+        Args:
+            p (float): Percentile between 0 and 100.
+
+        Returns:
+            Optional[Decimal]: The percentile, or None if no values are recorded.
+        """
+        if not 0 <= p <= 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if not self._values:
+            return None
+        rank = max(1, math.ceil(p / 100 * len(self._values)))
+        return self._values[rank - 1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class OperationStats:
+    """
+    Statistics of the operands and results of a group of calculations.
+
+    Reductions have no operands, so they count towards the results only.
+    """
+
+    __slots__ = ('result', 'operand1', 'operand2')
+
+    def __init__(self):
+        self.result = RunningStats()
+        self.operand1 = RunningStats()
+        self.operand2 = RunningStats()
+
+    @property
+    def count(self) -> int:
+        return self.result.count
+
+    def add(self, calculation: Calculation) -> None:
+        self.result.add(calculation.result)
+        if not calculation.is_reduction:
+            self.operand1.add(calculation.operand1)
+            self.operand2.add(calculation.operand2)
+
+    def remove(self, calculation: Calculation) -> None:
+        self.result.remove(calculation.result)
+        if not calculation.is_reduction:
+            self.operand1.remove(calculation.operand1)
+            self.operand2.remove(calculation.operand2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'result': self.result.to_dict(),
+            'operand1': self.operand1.to_dict(),
+            'operand2': self.operand2.to_dict(),
+        }
+
+
+class HistoryAnalytics:
+    """
+    Aggregates over the calculations currently in a history.
+
+    Statistics are kept overall, per operation, and per operation within
+    fixed time buckets (one minute by default), so questions like "mean
+    result per operation" or "Power calls per minute" are answered from
+    precomputed aggregates instead of scanning the history.
+
+    Calculations are added and removed as the history changes, so the
+    aggregates always describe the history itself: Calculator.analytics()
+    keeps them in step with new calculations, evictions, undo, redo, clear
+    and load.
+    """
+
+    def __init__(self, bucket_seconds: int = 60):
+        """
+        Initialize empty analytics.
+
+        Args:
+            bucket_seconds (int, optional): Width of a time bucket. Defaults to 60.
+        """
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+        self.totals = OperationStats()
+        self._by_operation: Dict[str, OperationStats] = {}
+        # bucket start -> operation -> stats
+        self._buckets: Dict[datetime.datetime, Dict[str, OperationStats]] = {}
+        # Newest calculation in the history, for matches()
+        self._last: Optional[Calculation] = None
+
+    @classmethod
+    def from_history(cls, history: Iterable[Calculation], **kwargs: Any) -> 'HistoryAnalytics':
+        """Create analytics that describe the given calculations."""
+        analytics = cls(**kwargs)
+        for calculation in history:
+            analytics.add(calculation)
+        return analytics
+
+    def bucket_start(self, timestamp: datetime.datetime) -> datetime.datetime:
+        """Return the start of the time bucket containing timestamp."""
+        midnight = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds = int((timestamp - midnight).total_seconds())
+        return midnight + datetime.timedelta(seconds=seconds - seconds % self.bucket_seconds)
+
+    def matches(self, history: List[Calculation]) -> bool:
+        """
+        Cheaply check that the aggregates still describe history.
+
+        Args:
+            history (List[Calculation]): The calculator's history list.
+
+        Returns:
+            bool: False if the history was replaced without going through the analytics.
+        """
+        if len(history) != self.totals.count:
+            return False
+        return not history or history[-1] is self._last
+
+    def set_last(self, calculation: Optional[Calculation]) -> None:
+        """Record the newest calculation after the history changed at its end, e.g. an undo."""
+        self._last = calculation
+
+    def add(self, calculation: Calculation) -> None:
+        """
+        Add a calculation to every aggregate it belongs to.
+
+        Args:
+            calculation (Calculation): The calculation that entered the history.
+        """
+        if calculation is None:
+            raise AttributeError("Calculation cannot be None")
+        bucket = self.bucket_start(calculation.timestamp)
+        with self._lock:
+            self.totals.add(calculation)
+            self._stats(self._by_operation, calculation.operation).add(calculation)
+            self._stats(self._buckets.setdefault(bucket, {}), calculation.operation).add(calculation)
+            self._last = calculation
+
+    def remove(self, calculation: Calculation) -> None:
+        """
+        Take a calculation back out of every aggregate it belongs to.
+
+        Groups left empty are dropped, so operations() and by_bucket() only
+        report what is still in the history.
+
+        Args:
+            calculation (Calculation): The calculation that left the history.
+        """
+        bucket = self.bucket_start(calculation.timestamp)
+        with self._lock:
+            self.totals.remove(calculation)
+            self._discard(self._by_operation, calculation)
+            operations = self._buckets[bucket]
+            self._discard(operations, calculation)
+            if not operations:
+                del self._buckets[bucket]
+            if calculation is self._last:
+                self._last = None
+
+    def reset(self, history: Iterable[Calculation]) -> None:
+        """Rebuild the aggregates from scratch for history."""
+        with self._lock:
+            self.totals = OperationStats()
+            self._by_operation = {}
+            self._buckets = {}
+            self._last = None
+        for calculation in history:
+            self.add(calculation)
+
+    @staticmethod
+    def _stats(groups: Dict[str, OperationStats], key: str) -> OperationStats:
+        stats = groups.get(key)
+        if stats is None:
+            stats = groups[key] = OperationStats()
+        return stats
+
+    @staticmethod
+    def _discard(groups: Dict[str, OperationStats], calculation: Calculation) -> None:
+        stats = groups[calculation.operation]
+        stats.remove(calculation)
+        if not stats.count:
+            del groups[calculation.operation]
+
+    def operations(self) -> List[str]:
+        """Return the names of the operations in the history."""
+        with self._lock:
+            return sorted(self._by_operation)
+
+    def by_operation(self, operation: str) -> Optional[OperationStats]:
+        """
+        Return the statistics of one operation.
+
+        Args:
+            operation (str): Operation name, e.g. 'Power'.
+
+        Returns:
+            Optional[OperationStats]: The statistics, or None if the history has none.
+        """
+        with self._lock:
+            return self._by_operation.get(operation)
+
+    def by_bucket(self, operation: Optional[str] = None) -> List[Tuple[datetime.datetime, int]]:
+        """
+        Return calculation counts per time bucket, oldest first.
+
+        Args:
+            operation (Optional[str], optional): Count only this operation.
+
+        Returns:
+            List[Tuple[datetime.datetime, int]]: Bucket start and count for every
+                bucket with at least one matching calculation.
+        """
+        with self._lock:
+            counts = []
+            for start in sorted(self._buckets):
+                groups = self._buckets[start]
+                if operation is None:
+                    count = sum(stats.count for stats in groups.values())
+                else:
+                    count = groups[operation].count if operation in groups else 0
+                if count:
+                    counts.append((start, count))
+            return counts
+
+    def bucket(self, timestamp: datetime.datetime, operation: str) -> Optional[OperationStats]:
+        """
+        Return the statistics of one operation in the bucket containing timestamp.
+
+        Args:
+            timestamp (datetime.datetime): Any time within the bucket.
+            operation (str): Operation name.
+
+        Returns:
+            Optional[OperationStats]: The statistics, or None if there are none.
+        """
+        with self._lock:
+            return self._buckets.get(self.bucket_start(timestamp), {}).get(operation)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return overall and per-operation statistics as plain dictionaries."""
+        with self._lock:
+            return {
+                'total': self.totals.to_dict(),
+                'operations': {name: stats.to_dict() for name, stats in sorted(self._by_operation.items())},
+            }
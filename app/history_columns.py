@@ -0,0 +1,141 @@
+########################
+# History Columns      #
+########################
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.calculation import Calculation
+from app.history_storage import HISTORY_COLUMNS
+
+# Timestamps are stored at the resolution datetime.datetime carries
+TIMESTAMP_DTYPE = 'datetime64[us]'
+MIN_CAPACITY = 64
+
+
+class HistoryColumns:
+    """
+    Typed column buffers that mirror the calculation history.
+
+    The calculator appends to these as calculations are recorded, so exporting
+    the history as a DataFrame wraps slices of the existing arrays instead of
+    building one dict per row. Operation names, operands and results are kept
+    as object arrays (operands and results stay Decimal); timestamps are a
+    native datetime64 array.
+
+    A slot is written exactly once. Growing, trimming past the start or
+    resetting always moves to fresh arrays, so a DataFrame handed out earlier
+    keeps seeing the rows it was created with.
+    """
+
+    def __init__(self, history: Iterable[Calculation] = ()):
+        """
+        Initialize the buffers.
+
+        Args:
+            history (Iterable[Calculation], optional): Calculations to start with.
+        """
+        self.reset(history)
+
+    def reset(self, history: Iterable[Calculation]) -> None:
+        """
+        Replace the buffers with the given calculations.
+
+        Used when the history is replaced wholesale (load, undo, redo, clear).
+
+        Args:
+            history (Iterable[Calculation]): The new history, oldest first.
+        """
+        history = list(history)
+        self._columns = self._allocate(max(MIN_CAPACITY, 2 * len(history)))
+        self._start = 0
+        self._end = 0
+        self._last: Optional[Calculation] = None
+        self._stale = False
+        for calc in history:
+            self.append(calc)
+
+    @staticmethod
+    def _allocate(capacity: int) -> Dict[str, np.ndarray]:
+        columns = {name: np.empty(capacity, dtype=object) for name in HISTORY_COLUMNS}
+        columns['timestamp'] = np.empty(capacity, dtype=TIMESTAMP_DTYPE)
+        return columns
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def append(self, calc: Calculation) -> None:
+        """
+        Add one calculation at the end.
+
+        Args:
+            calc (Calculation): The calculation to record.
+        """
+        if self._stale:
+            return
+        if self._end == len(self._columns['timestamp']):
+            self._grow()
+        end = self._end
+        columns = self._columns
+        columns['operation'][end] = calc.operation
+        columns['operand1'][end] = calc.operand1
+        columns['operand2'][end] = calc.operand2
+        columns['result'][end] = calc.result
+        columns['timestamp'][end] = np.datetime64(calc.timestamp, 'us')
+        columns['count'][end] = calc.count
+        self._end = end + 1
+        self._last = calc
+
+    def _grow(self) -> None:
+        """Move the live rows into fresh arrays with room to append."""
+        size = len(self)
+        columns = self._allocate(max(MIN_CAPACITY, 2 * size))
+        for name, column in self._columns.items():
+            columns[name][:size] = column[self._start:self._end]
+        self._columns = columns
+        self._start = 0
+        self._end = size
+
+    def pop_front(self) -> None:
+        """Drop the oldest calculation, as the history does when it is full."""
+        if not self._stale and self._start < self._end:
+            # The slot is left in place for DataFrames that still reference it;
+            # the next growth copies only the live rows
+            self._start += 1
+
+    def invalidate(self) -> None:
+        """Mark the buffers out of date, e.g. after an undo; the next reset rebuilds them."""
+        self._stale = True
+
+    def matches(self, history: list) -> bool:
+        """
+        Cheaply check that the buffers still mirror history.
+
+        Args:
+            history (list): The calculator's history list.
+
+        Returns:
+            bool: False if the history was replaced without going through the buffers.
+        """
+        if self._stale or len(history) != len(self):
+            return False
+        return not history or history[-1] is self._last
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Wrap the live rows in a DataFrame without copying them.
+
+        The columns are read-only views of the buffers; call .copy() on the
+        frame before modifying values in place.
+
+        Returns:
+            pd.DataFrame: One row per calculation, in HISTORY_COLUMNS order.
+        """
+        data = {}
+        for name, column in self._columns.items():
+            view = column[self._start:self._end]
+            view.flags.writeable = False
+            data[name] = view
+        return pd.DataFrame(data, columns=HISTORY_COLUMNS, copy=False)
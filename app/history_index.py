@@ -0,0 +1,196 @@
+########################
+# History Index        #
+########################
+
+from bisect import bisect_left, bisect_right, insort
+import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.calculation import Calculation
+
+# Compact the position lists once this many evicted entries have piled up
+COMPACT_AFTER = 4096
+
+
+class HistoryIndex:
+    """
+    Secondary indexes over the calculation history.
+
+    Every calculation gets a sequence number when it is appended; its position
+    in the history is that number minus the sequence number of the oldest
+    entry. Evicting the oldest entry therefore only moves that base, and the
+    stale numbers left at the front of each list are skipped with a bisect
+    and dropped in bulk now and then.
+
+    Indexes:
+        operation name -> sequence numbers
+        result value -> sequence numbers
+        operand value (either operand) -> sequence numbers
+        (timestamp, sequence number) pairs sorted by time
+    """
+
+    def __init__(self, history: Iterable[Calculation] = ()):
+        self.reset(history)
+
+    def reset(self, history: Iterable[Calculation]) -> None:
+        """
+        Rebuild the indexes for a history that was replaced wholesale.
+
+        Args:
+            history (Iterable[Calculation]): The new history, oldest first.
+        """
+        self._first = 0
+        self._next = 0
+        self._by_operation: Dict[str, List[int]] = {}
+        self._by_result: Dict[Decimal, List[int]] = {}
+        self._by_operand: Dict[Decimal, List[int]] = {}
+        self._by_time: List[Tuple[datetime.datetime, int]] = []
+        self._entries: Dict[int, Calculation] = {}
+        self._stale = False
+        for calc in history:
+            self.append(calc)
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    def append(self, calc: Calculation) -> None:
+        """Index a calculation added at the end of the history."""
+        if self._stale:
+            return
+        seq = self._next
+        self._next += 1
+        self._entries[seq] = calc
+        self._by_operation.setdefault(calc.operation, []).append(seq)
+        self._by_result.setdefault(calc.result, []).append(seq)
+        if not calc.is_reduction:
+            self._by_operand.setdefault(calc.operand1, []).append(seq)
+            if calc.operand2 != calc.operand1:
+                self._by_operand.setdefault(calc.operand2, []).append(seq)
+        entry = (calc.timestamp, seq)
+        if not self._by_time or entry >= self._by_time[-1]:
+            self._by_time.append(entry)
+        else:
+            insort(self._by_time, entry)
+
+    def pop_front(self) -> None:
+        """Forget the oldest calculation, as the history does when it is full."""
+        if self._stale or self._first == self._next:
+            return
+        del self._entries[self._first]
+        self._first += 1
+        if self._first % COMPACT_AFTER == 0:
+            self._compact()
+
+    def pop_last(self) -> None:
+        """Forget the newest calculation, e.g. after an undo."""
+        if self._stale or self._first == self._next:
+            return
+        self._next -= 1
+        seq = self._next
+        calc = self._entries.pop(seq)
+        self._discard(self._by_operation, calc.operation, seq)
+        self._discard(self._by_result, calc.result, seq)
+        self._discard(self._by_operand, calc.operand1, seq)
+        self._discard(self._by_operand, calc.operand2, seq)
+        entry = (calc.timestamp, seq)
+        if self._by_time[-1] == entry:
+            self._by_time.pop()
+        else:
+            self._by_time.remove(entry)
+
+    @staticmethod
+    def _discard(index: Dict, key, seq: int) -> None:
+        seqs = index.get(key)
+        if seqs and seqs[-1] == seq:
+            seqs.pop()
+            if not seqs:
+                del index[key]
+
+    def _compact(self) -> None:
+        """Drop evicted sequence numbers from every index."""
+        first = self._first
+        for index in (self._by_operation, self._by_result, self._by_operand):
+            for key in list(index):
+                seqs = index[key]
+                live = seqs[bisect_left(seqs, first):]
+                if live:
+                    index[key] = live
+                else:
+                    del index[key]
+        self._by_time = [entry for entry in self._by_time if entry[1] >= first]
+
+    def invalidate(self) -> None:
+        """Mark the indexes out of date; the next reset rebuilds them."""
+        self._stale = True
+
+    def matches(self, history: List[Calculation]) -> bool:
+        """
+        Cheaply check that the indexes still describe history.
+
+        Args:
+            history (List[Calculation]): The calculator's history list.
+
+        Returns:
+            bool: False if the history was replaced without going through the indexes.
+        """
+        if self._stale or len(history) != len(self):
+            return False
+        return not history or self._entries[self._next - 1] is history[-1]
+
+    def _live(self, seqs: List[int]) -> List[int]:
+        return seqs[bisect_left(seqs, self._first):]
+
+    def positions(
+        self,
+        operation: Optional[str] = None,
+        operand: Optional[Decimal] = None,
+        result: Optional[Decimal] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None
+    ) -> List[int]:
+        """
+        Return the history positions of calculations matching every criterion.
+
+        The smallest matching index list drives the search; the remaining
+        criteria are checked only against its entries.
+
+        Args:
+            operation (Optional[str], optional): Operation name, e.g. 'Power'.
+            operand (Optional[Decimal], optional): Value of either operand.
+            result (Optional[Decimal], optional): Result value.
+            since (Optional[datetime.datetime], optional): Earliest timestamp, inclusive.
+            until (Optional[datetime.datetime], optional): Latest timestamp, inclusive.
+
+        Returns:
+            List[int]: Matching positions, oldest first.
+        """
+        candidates = []
+        if operation is not None:
+            candidates.append(self._live(self._by_operation.get(operation, [])))
+        if operand is not None:
+            candidates.append(self._live(self._by_operand.get(operand, [])))
+        if result is not None:
+            candidates.append(self._live(self._by_result.get(result, [])))
+
+        if candidates:
+            candidates.sort(key=len)
+            seqs = candidates[0]
+            for other in candidates[1:]:
+                members = set(other)
+                seqs = [seq for seq in seqs if seq in members]
+            if since is not None or until is not None:
+                entries = self._entries
+                seqs = [
+                    seq for seq in seqs
+                    if (since is None or entries[seq].timestamp >= since)
+                    and (until is None or entries[seq].timestamp <= until)
+                ]
+        elif since is not None or until is not None:
+            by_time = self._by_time
+            low = bisect_left(by_time, (since, -1)) if since is not None else 0
+            high = bisect_right(by_time, (until, self._next)) if until is not None else len(by_time)
+            seqs = sorted(seq for _, seq in by_time[low:high] if seq >= self._first)
+        else:
+            seqs = range(self._first, self._next)
+        return [seq - self._first for seq in seqs]
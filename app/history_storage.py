@@ -0,0 +1,840 @@
+########################
+# History Storage      #
+########################
+
+from abc import ABC, abstractmethod
+from array import array
+import csv
+import datetime
+from decimal import Decimal
+import io
+from itertools import islice
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import sys
+import tempfile
+import threading
+from typing import IO, Any, Callable, Dict, List, Optional, TextIO
+
+import pandas as pd
+
+from app.calculation import Calculation
+from app.calculator_config import CalculatorConfig
+from app.exceptions import ConfigurationError, OperationError
+from app.compression import (
+    CODECS, Codec, compress_file, compressed_path, detect_codec, get_codec, open_text, wrap_binary
+)
+from app.history_view import OFFSET_TYPECODE, OFFSET_SIZE, MmapHistoryView, SegmentRef
+
+# Column order used for every history file. Reductions leave the operands
+# empty and fill count; files written before it existed have no count column.
+HISTORY_COLUMNS = ['operation', 'operand1', 'operand2', 'result', 'timestamp', 'count']
+# Session used by a calculator that stores its history in SQLite on its own
+DEFAULT_SESSION = 'default'
+
+
+def sibling_path(history_file: Path, suffix: str) -> Path:
+    """
+    Return the file named after history_file's stem with suffix, next to it.
+
+    Every file kept beside the history (segments, dictionary file, SQLite
+    database, undo log, session histories) is named this way, e.g.
+    calculator_history.csv -> calculator_history.undo.jsonl.
+    """
+    return history_file.with_name(f"{history_file.stem}{suffix}")
+
+
+def remove_other_codecs(base_path: Path, kept: Path) -> None:
+    """
+    Delete copies of base_path written with other codecs than kept's.
+
+    Called after a successful save, so switching the compression setting
+    back and forth never leaves an older file that a later load would pick.
+    """
+    for codec in CODECS.values():
+        candidate = compressed_path(base_path, codec)
+        if candidate != kept:
+            try:
+                candidate.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def calculation_to_row(calc: Calculation) -> List[str]:
+    """Serialize a calculation into a history row, in HISTORY_COLUMNS order."""
+    if calc.is_reduction:
+        return [str(calc.operation), '', '', calc.formatted_result, calc.timestamp.isoformat(), str(calc.count)]
+    return [
+        str(calc.operation),
+        str(calc.operand1),
+        str(calc.operand2),
+        calc.formatted_result,
+        calc.timestamp.isoformat(),
+        ''
+    ]
+
+
+class AtomicFileWriter:
+    """
+    Replaces files atomically with a configurable fsync policy.
+
+    Content is written to a temporary file in the target directory and then
+    renamed over the target, so readers and a crashing process only ever see
+    the old file or the complete new one. The fsync policy decides what a
+    write costs in durability terms:
+
+    - always:  fsync the file and its directory on every write; the old or
+               the new file survives a power failure too
+    - batched: fsync on every Nth write
+    - never:   leave flushing to the operating system
+
+    With 'batched' (between synced writes) and 'never' the replacement is
+    atomic against process crashes only. Without an fsync before the rename,
+    a power failure can leave the renamed file empty or truncated on common
+    file systems.
+    """
+
+    def __init__(self, policy: str = 'always', batch_size: int = 10):
+        """
+        Initialize the writer.
+
+        Args:
+            policy (str, optional): 'always', 'batched' or 'never'.
+            batch_size (int, optional): Writes per fsync with the 'batched' policy.
+        """
+        self.policy = policy
+        self.batch_size = batch_size
+        self._unsynced_writes = 0
+
+    def should_sync(self) -> bool:
+        """Decide whether the current write must reach the disk."""
+        if self.policy == 'always':
+            return True
+        if self.policy == 'batched':
+            self._unsynced_writes += 1
+            if self._unsynced_writes >= self.batch_size:
+                self._unsynced_writes = 0
+                return True
+        return False
+
+    def write(
+        self,
+        path: Path,
+        write_content: Callable[[TextIO], None],
+        encoding: str = 'utf-8',
+        codec: Optional[Codec] = None
+    ) -> None:
+        """
+        Atomically replace path with the content produced by write_content.
+
+        Args:
+            path (Path): The file to replace.
+            write_content (Callable[[TextIO], None]): Writes the content to the given handle.
+            encoding (str, optional): Text encoding of the file.
+            codec (Optional[Codec], optional): Compress the content while writing.
+        """
+        def fill(raw: IO[bytes]) -> None:
+            stream = wrap_binary(raw, codec, 'wb') if codec else raw
+            handle = io.TextIOWrapper(stream, encoding=encoding, newline='')
+            write_content(handle)
+            handle.detach()
+            if stream is not raw:
+                # Finish the compressed stream; the raw file stays open for fsync
+                stream.close()
+
+        self._replace(path, fill)
+
+    def _replace(self, path: Path, fill: Callable[[IO[bytes]], None]) -> None:
+        """Write a temporary file with fill, then rename it over path."""
+        try:
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        except FileNotFoundError:
+            # The directory vanished since start-up; recreate it once
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+
+        sync = self.should_sync()
+        try:
+            # mkstemp creates private files; keep the permissions of the file being replaced
+            try:
+                os.chmod(temp_name, os.stat(path).st_mode & 0o777)
+            except FileNotFoundError:
+                pass
+            with os.fdopen(fd, 'wb') as raw:
+                fill(raw)
+                raw.flush()
+                if sync:
+                    os.fsync(raw.fileno())
+            os.replace(temp_name, path)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+
+        if sync:
+            self.sync_directory(path.parent)
+
+    @staticmethod
+    def sync_directory(directory: Path) -> None:
+        """Persist the rename itself by syncing the containing directory."""
+        if os.name != 'posix':
+            return  # pragma: no cover
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class HistoryStorage(ABC):
+    """
+    Abstract base class for calculation history persistence.
+
+    Implementations decide the on-disk format; the Calculator only hands over
+    a snapshot of its history to save and receives a list back on load.
+    """
+
+    @abstractmethod
+    def save(self, history: List[Calculation]) -> None:
+        """
+        Persist the given history, replacing what was stored before.
+
+        Args:
+            history (List[Calculation]): The calculations to store.
+        """
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def load(self) -> Optional[List[Calculation]]:
+        """
+        Read the stored history.
+
+        Returns:
+            Optional[List[Calculation]]: The stored calculations, or None if
+                nothing has been stored yet.
+        """
+        pass  # pragma: no cover
+
+    def open_view(self, history: List[Calculation]) -> Optional[MmapHistoryView]:
+        """
+        Open a read-only view of the stored history continued by history.
+
+        Only storages that keep more than the in-memory history on disk
+        provide one.
+
+        Args:
+            history (List[Calculation]): The current in-memory history.
+
+        Returns:
+            Optional[MmapHistoryView]: The view, which the caller must close,
+                or None if this storage has none or history does not continue it.
+        """
+        return None
+
+
+class FileHistoryStorage(HistoryStorage):
+    """
+    Base class for storages that write files next to the configured history file.
+
+    Holds the AtomicFileWriter and the compression codec every file format
+    uses, and finds a saved file whichever codec wrote it.
+    """
+
+    def __init__(self, config: CalculatorConfig):
+        """
+        Initialize the storage.
+
+        Args:
+            config (CalculatorConfig): Supplies the history location,
+                encoding, compression and fsync policy.
+
+        Raises:
+            ConfigurationError: If the configured codec is not installed.
+        """
+        self.config = config
+        self.writer = AtomicFileWriter(config.fsync_policy, config.fsync_batch_size)
+        self.codec = get_codec(config.history_compression)
+        if not self.codec.available:
+            raise ConfigurationError(f"Compression codec '{self.codec.name}' is not installed")
+
+    def _find_existing(self, base_path: Path) -> Optional[Path]:
+        """Return the copy of base_path to load, preferring the configured codec's."""
+        candidates = [compressed_path(base_path, self.codec)]
+        candidates.extend(compressed_path(base_path, codec) for codec in CODECS.values())
+        for candidate in dict.fromkeys(candidates):
+            if candidate.exists():
+                return candidate
+        return None
+
+
+class CsvHistoryStorage(FileHistoryStorage):
+    """
+    Stores history in a single CSV file written through an AtomicFileWriter.
+
+    With CALCULATOR_HISTORY_COMPRESSION set, the file is compressed while it
+    is written and gets the codec's suffix (e.g. calculator_history.csv.gz).
+    Loading detects the compression from the file contents and decompresses
+    while pandas parses, so any earlier format is still readable.
+    """
+
+    @property
+    def path(self) -> Path:
+        """The file this storage writes to."""
+        return compressed_path(self.config.history_file, self.codec)
+
+    def save(self, history: List[Calculation]) -> None:
+        # An empty history still produces a file with headers
+        df = pd.DataFrame([calculation_to_row(calc) for calc in history], columns=HISTORY_COLUMNS)
+        self.writer.write(
+            self.path,
+            lambda handle: df.to_csv(handle, index=False),
+            encoding=self.config.default_encoding,
+            codec=self.codec
+        )
+        remove_other_codecs(self.config.history_file, self.path)
+
+    def load(self) -> Optional[List[Calculation]]:
+        history_file = self._find_existing(self.config.history_file)
+        if history_file is None:
+            return None
+        df = self._read_frame(history_file)
+        return [
+            Calculation.from_dict({
+                'operation': row['operation'],
+                'operand1': row['operand1'],
+                'operand2': row['operand2'],
+                'result': row['result'],
+                'timestamp': row['timestamp'],
+                'count': row.get('count')
+            })
+            for _, row in df.iterrows()
+        ]
+
+    def _read_frame(self, history_file: Path) -> pd.DataFrame:
+        """
+        Parse a history file, decompressing it as a stream if needed.
+
+        Every field is read as text so numbers are parsed exactly by Decimal,
+        and empty fields stay empty strings rather than NaN.
+        """
+        encoding = self.config.default_encoding
+        try:
+            codec = detect_codec(history_file)
+        except OSError:
+            # Unreadable here; let pandas open it and report the problem
+            return pd.read_csv(history_file, dtype=str, keep_default_na=False, encoding=encoding)
+        if codec.name == 'none':
+            return pd.read_csv(history_file, dtype=str, keep_default_na=False, encoding=encoding)
+        with open_text(history_file, encoding, codec) as handle:
+            return pd.read_csv(handle, dtype=str, keep_default_na=False)
+
+
+class SegmentedHistoryStorage(FileHistoryStorage):
+    """
+    Stores history as a series of append-only CSV segments plus a manifest.
+
+    Each save appends only the calculations added since the previous save to
+    the active segment. A segment is sealed (and compressed, if configured)
+    once it reaches segment_max_records records or segment_max_bytes bytes,
+    and only the newest segment_retention segments are kept. Loading reads
+    just the newest segments needed to fill max_history_size, so start-up
+    cost does not grow with the total amount of history on disk.
+
+    When the in-memory history no longer continues what was saved (after an
+    undo, clear or load), a new generation starts: later segments hold the
+    current history, and older ones are kept only as archives.
+
+    Every segment has a row offset index (segment-NNNNNN.idx) appended along
+    with it, so open_view can reach any record of the retained segments of
+    the current generation without reading the rest.
+
+    The manifest (manifest.json) is replaced atomically after every save and
+    its record counts are authoritative, so rows from an interrupted append
+    are ignored and overwritten. Files the new manifest no longer lists
+    (plain segments that were compressed, segments past retention) are only
+    deleted after it has been written, so a crash never leaves the manifest
+    on disk pointing at a missing file.
+    """
+
+    MANIFEST_NAME = 'manifest.json'
+    # Segments are always UTF-8 so appends never need encoding state (e.g. BOMs)
+    SEGMENT_ENCODING = 'utf-8'
+
+    def __init__(self, config: CalculatorConfig):
+        """
+        Initialize the storage.
+
+        Args:
+            config (CalculatorConfig): Supplies the history location, segment
+                limits, retention, compression and fsync policy.
+        """
+        super().__init__(config)
+        self._manifest: Optional[Dict[str, Any]] = None
+        # Files to delete once the manifest that stops listing them is written
+        self._obsolete: List[Path] = []
+        # Last calculation known to be on disk, used to find what is new
+        self._last_saved: Optional[Calculation] = None
+
+    @property
+    def directory(self) -> Path:
+        """Directory holding the segments, next to the configured history file."""
+        return sibling_path(self.config.history_file, "_segments")
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / self.MANIFEST_NAME
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Read the manifest from disk, or None if nothing was saved yet."""
+        if not self.manifest_path.exists():
+            return None
+        with open(self.manifest_path, encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def _get_manifest(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            self._manifest = self._read_manifest() or {'next_id': 1, 'generation_start': 1, 'segments': []}
+        return self._manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        self.writer.write(self.manifest_path, lambda handle: json.dump(manifest, handle, indent=1))
+
+    @staticmethod
+    def _current_generation(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+        start = manifest['generation_start']
+        return [entry for entry in manifest['segments'] if entry['id'] >= start]
+
+    def _newest_needed(self, manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Newest segments of the current generation holding max_history_size records."""
+        needed = []
+        total = 0
+        for entry in reversed(self._current_generation(manifest)):
+            if total >= self.config.max_history_size:
+                break
+            needed.append(entry)
+            total += entry['records']
+        needed.reverse()
+        return needed
+
+    def _resume_index(self, manifest: Dict[str, Any], history: List[Calculation]) -> Optional[int]:
+        """
+        Find where the unsaved part of history starts.
+
+        Returns:
+            Optional[int]: Index of the first unsaved calculation, or None if
+                history does not continue what is on disk.
+        """
+        if self._last_saved is None:
+            saved_records = sum(entry['records'] for entry in self._current_generation(manifest))
+            return 0 if saved_records == 0 else None
+        # The last saved calculation is normally at or near the end
+        for index in range(len(history) - 1, -1, -1):
+            if history[index] is self._last_saved:
+                return index + 1
+        return None
+
+    def save(self, history: List[Calculation]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = self._get_manifest()
+
+        start = self._resume_index(manifest, history)
+        if start is None:
+            # History was rewritten; archive what is on disk and start over
+            for entry in self._current_generation(manifest):
+                if not entry['sealed']:
+                    self._seal(entry)
+            manifest['generation_start'] = manifest['next_id']
+            start = 0
+            logging.info("History diverged from saved segments - starting a new generation")
+
+        self._append(manifest, history[start:])
+        self._apply_retention(manifest)
+        self._write_manifest(manifest)
+        for path in self._obsolete:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._obsolete.clear()
+        self._last_saved = history[-1] if history else None
+
+    def _new_segment(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            'id': manifest['next_id'],
+            'name': f"segment-{manifest['next_id']:06d}.csv",
+            'index': f"segment-{manifest['next_id']:06d}.idx",
+            'records': 0,
+            'bytes': 0,
+            'sealed': False,
+            'columns': len(HISTORY_COLUMNS)
+        }
+        manifest['next_id'] += 1
+        manifest['segments'].append(entry)
+        return entry
+
+    def _append(self, manifest: Dict[str, Any], calculations: List[Calculation]) -> None:
+        """Append calculations to the active segment, rolling over as limits are reached."""
+        if not calculations:
+            return
+        generation = self._current_generation(manifest)
+        entry = generation[-1] if generation and not generation[-1]['sealed'] else None
+        if entry is not None and entry.get('columns', 5) != len(HISTORY_COLUMNS):
+            # Its header predates the current columns; rows must not be appended under it
+            self._seal(entry)
+            entry = None
+        if entry is None:
+            entry = self._new_segment(manifest)
+        max_records = self.config.segment_max_records
+        max_bytes = self.config.segment_max_bytes
+
+        # Rows are encoded here so segment sizes are tracked exactly
+        buffer = io.StringIO()
+        row_writer = csv.writer(buffer)
+
+        def encode(row: List[str]) -> bytes:
+            buffer.seek(0)
+            buffer.truncate()
+            row_writer.writerow(row)
+            return buffer.getvalue().encode(self.SEGMENT_ENCODING)
+
+        remaining = iter(calculations)
+        pending = next(remaining, None)
+        while pending is not None:
+            path = self.directory / entry['name']
+            if path.exists():
+                # Drop rows from an append the manifest never recorded
+                os.truncate(path, entry['bytes'])
+            offsets = array(OFFSET_TYPECODE)
+            with open(path, 'ab') as handle:
+                size = entry['bytes']
+                if size == 0:
+                    size += handle.write(encode(HISTORY_COLUMNS))
+                while pending is not None and entry['records'] < max_records and size < max_bytes:
+                    offsets.append(size)
+                    size += handle.write(encode(calculation_to_row(pending)))
+                    entry['records'] += 1
+                    pending = next(remaining, None)
+                handle.flush()
+                if self.writer.should_sync():
+                    os.fsync(handle.fileno())
+                entry['bytes'] = size
+            self._append_offsets(entry, offsets)
+            if entry['records'] >= max_records or entry['bytes'] >= max_bytes:
+                self._seal(entry)
+                if pending is not None:
+                    entry = self._new_segment(manifest)
+
+    def _append_offsets(self, entry: Dict[str, Any], offsets: array) -> None:
+        """
+        Extend a segment's row offset index.
+
+        The index is a cache for open_view and is never synced; a view checks
+        its length and scans the segment instead if it falls short.
+        """
+        if 'index' not in entry:
+            return  # segment written before indexes existed
+        path = self.directory / entry['index']
+        recorded = (entry['records'] - len(offsets)) * OFFSET_SIZE
+        with open(path, 'ab') as handle:
+            if handle.tell() < recorded:
+                # Offsets went missing; views scan this segment from now on
+                del entry['index']
+                self._obsolete.append(path)
+                return
+            # Drop offsets of rows the manifest never recorded
+            handle.truncate(recorded)
+            handle.write(offsets.tobytes())
+
+    def _seal(self, entry: Dict[str, Any]) -> None:
+        """Close a segment for writing, compressing it if a codec is configured."""
+        entry['sealed'] = True
+        if self.codec.name == 'none':
+            return
+        plain = self.directory / entry['name']
+        archive = compressed_path(plain, self.codec)
+        compress_file(plain, archive, self.codec)
+        if self.config.fsync_policy != 'never':
+            with open(archive, 'rb') as handle:
+                os.fsync(handle.fileno())
+        self._obsolete.append(plain)
+        entry['name'] = archive.name
+        entry['bytes'] = archive.stat().st_size
+
+    def _apply_retention(self, manifest: Dict[str, Any]) -> None:
+        """Drop the oldest segments beyond the retention limit, never ones still needed."""
+        keep = max(self.config.segment_retention, len(self._newest_needed(manifest)))
+        segments = manifest['segments']
+        while len(segments) > keep:
+            entry = segments.pop(0)
+            self._obsolete.append(self.directory / entry['name'])
+            if 'index' in entry:
+                self._obsolete.append(self.directory / entry['index'])
+
+    def load(self) -> Optional[List[Calculation]]:
+        manifest = self._read_manifest()
+        if manifest is None:
+            return None
+        self._manifest = manifest
+
+        history: List[Calculation] = []
+        for entry in self._newest_needed(manifest):
+            history.extend(self._read_segment(entry))
+        history = history[-self.config.max_history_size:]
+        self._last_saved = history[-1] if history else None
+        return history
+
+    def open_view(self, history: List[Calculation]) -> Optional[MmapHistoryView]:
+        manifest = self._get_manifest()
+        start = self._resume_index(manifest, history)
+        if start is None:
+            return None
+        segments = [
+            SegmentRef(
+                self.directory / entry['name'],
+                self.directory / entry['index'] if 'index' in entry else None,
+                entry['records']
+            )
+            for entry in self._current_generation(manifest)
+        ]
+        return MmapHistoryView(segments, history[start:])
+
+    def _read_segment(self, entry: Dict[str, Any]) -> List[Calculation]:
+        """Read the records the manifest lists for one segment."""
+        with open_text(self.directory / entry['name'], self.SEGMENT_ENCODING) as handle:
+            reader = csv.DictReader(handle)
+            return [Calculation.from_dict(row) for row in islice(reader, entry['records'])]
+
+
+class DictionaryHistoryStorage(FileHistoryStorage):
+    """
+    Stores history in one dictionary-encoded JSON file.
+
+    Operation names and operand/result values are each written once, in
+    tables at the top of the file. Every calculation is then a row of table
+    indexes plus its timestamp as a microsecond delta from the previous row,
+    so repetitive histories take a fraction of the CSV size. A reduction
+    has null operands and its value count as a sixth element. Loading builds
+    one Decimal per table entry, so calculations with equal values share
+    them in memory as well.
+
+    The file sits next to the configured history file as <stem>.dict.json
+    and is compressed and replaced atomically like the CSV file.
+    """
+
+    FORMAT = 'calculator-history-dict'
+    VERSION = 2
+    # Versions load() understands; version 1 has no reductions
+    READABLE_VERSIONS = (1, 2)
+    # JSON is UTF-8 by definition
+    ENCODING = 'utf-8'
+    EPOCH = datetime.datetime(1970, 1, 1)
+    MICROSECOND = datetime.timedelta(microseconds=1)
+
+    @property
+    def base_path(self) -> Path:
+        """The uncompressed file name, next to the configured history file."""
+        return sibling_path(self.config.history_file, ".dict.json")
+
+    @property
+    def path(self) -> Path:
+        """The file this storage writes to."""
+        return compressed_path(self.base_path, self.codec)
+
+    def save(self, history: List[Calculation]) -> None:
+        operations: Dict[str, int] = {}
+        values: Dict[str, int] = {}
+        rows = []
+        previous = 0
+        for calc in history:
+            operation = operations.setdefault(calc.operation, len(operations))
+            result = values.setdefault(str(calc.result), len(values))
+            timestamp = (calc.timestamp - self.EPOCH) // self.MICROSECOND
+            if calc.is_reduction:
+                rows.append(f"[{operation},null,null,{result},{timestamp - previous},{calc.count}]")
+            else:
+                operand1 = values.setdefault(str(calc.operand1), len(values))
+                operand2 = values.setdefault(str(calc.operand2), len(values))
+                rows.append(f"[{operation},{operand1},{operand2},{result},{timestamp - previous}]")
+            previous = timestamp
+
+        def write_content(handle: TextIO) -> None:
+            handle.write(f'{{"format": "{self.FORMAT}", "version": {self.VERSION},\n')
+            handle.write(f'"operations": {json.dumps(list(operations))},\n')
+            handle.write(f'"values": {json.dumps(list(values))},\n')
+            handle.write('"rows": [\n')
+            handle.write(',\n'.join(rows))
+            handle.write('\n]}\n')
+
+        self.writer.write(self.path, write_content, encoding=self.ENCODING, codec=self.codec)
+        remove_other_codecs(self.base_path, self.path)
+
+    def load(self) -> Optional[List[Calculation]]:
+        path = self._find_existing(self.base_path)
+        if path is None:
+            return None
+        with open_text(path, self.ENCODING) as handle:
+            data = json.load(handle)
+        if data.get('format') != self.FORMAT or data.get('version') not in self.READABLE_VERSIONS:
+            raise OperationError(f"Unsupported history file format: {path}")
+
+        operations = [sys.intern(name) for name in data['operations']]
+        values = [Decimal(text) for text in data['values']]
+        history = []
+        timestamp = 0
+        for operation, operand1, operand2, result, delta, *count in data['rows']:
+            timestamp += delta
+            history.append(Calculation(
+                operation=operations[operation],
+                operand1=None if operand1 is None else values[operand1],
+                operand2=None if operand2 is None else values[operand2],
+                result=values[result],
+                timestamp=self.EPOCH + timestamp * self.MICROSECOND,
+                count=count[0] if count else None
+            ))
+        return history
+
+
+class SqliteHistoryStore:
+    """
+    One SQLite database holding the histories of many sessions.
+
+    All sessions share a single connection, guarded by a lock, so hosting
+    many calculators in one process costs one open file rather than one
+    history file (and file handle) each. Saving a session replaces its rows
+    in one transaction. The database sits next to the configured history
+    file as <stem>.sqlite3; SQLite's synchronous setting follows the fsync
+    policy.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS calculations (
+            session TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            operation TEXT NOT NULL,
+            operand1 TEXT NOT NULL,
+            operand2 TEXT NOT NULL,
+            result TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            count TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (session, seq)
+        );
+    """
+    SYNCHRONOUS = {'always': 'FULL', 'batched': 'NORMAL', 'never': 'OFF'}
+
+    def __init__(self, path: Path, fsync_policy: str = 'always'):
+        """
+        Open (or create) the database.
+
+        Args:
+            path (Path): The database file.
+            fsync_policy (str, optional): 'always', 'batched' or 'never'.
+        """
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode; save() manages its own transaction
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={self.SYNCHRONOUS.get(fsync_policy, 'FULL')}")
+        self._connection.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(calculations)")}
+        if 'count' not in columns:
+            # Databases created before reductions kept a value count
+            self._connection.execute("ALTER TABLE calculations ADD COLUMN count TEXT NOT NULL DEFAULT ''")
+
+    @classmethod
+    def for_config(cls, config: CalculatorConfig) -> 'SqliteHistoryStore':
+        """Open the database that belongs to config's history file."""
+        return cls(sibling_path(config.history_file, ".sqlite3"), config.fsync_policy)
+
+    def session(self, session_id: str) -> 'SqliteHistoryStorage':
+        """Return the HistoryStorage for one session."""
+        return SqliteHistoryStorage(self, session_id)
+
+    def session_ids(self) -> List[str]:
+        """Return the sessions that have saved a history."""
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT session FROM sessions ORDER BY session")]
+
+    def save(self, session_id: str, history: List[Calculation]) -> None:
+        """Replace the stored history of one session."""
+        rows = [(session_id, seq, *calculation_to_row(calc)) for seq, calc in enumerate(history)]
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("INSERT OR IGNORE INTO sessions (session) VALUES (?)", (session_id,))
+                connection.execute("DELETE FROM calculations WHERE session = ?", (session_id,))
+                connection.executemany("INSERT INTO calculations VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def load(self, session_id: str) -> Optional[List[Calculation]]:
+        """Read one session's history, or None if it never saved one."""
+        with self._lock:
+            connection = self._connection
+            known = connection.execute("SELECT 1 FROM sessions WHERE session = ?", (session_id,)).fetchone()
+            if known is None:
+                return None
+            rows = connection.execute(
+                "SELECT operation, operand1, operand2, result, timestamp, count FROM calculations "
+                "WHERE session = ? ORDER BY seq",
+                (session_id,)
+            ).fetchall()
+        return [Calculation.from_dict(dict(zip(HISTORY_COLUMNS, row))) for row in rows]
+
+    def close(self) -> None:
+        """Close the shared connection."""
+        with self._lock:
+            self._connection.close()
+
+
+class SqliteHistoryStorage(HistoryStorage):
+    """The history of one session in a SqliteHistoryStore."""
+
+    def __init__(self, store: SqliteHistoryStore, session_id: str):
+        """
+        Initialize the storage.
+
+        Args:
+            store (SqliteHistoryStore): The shared database.
+            session_id (str): The session whose history this is.
+        """
+        self.store = store
+        self.session_id = session_id
+
+    def save(self, history: List[Calculation]) -> None:
+        self.store.save(self.session_id, history)
+
+    def load(self) -> Optional[List[Calculation]]:
+        return self.store.load(self.session_id)
+
+
+def create_history_storage(config: CalculatorConfig) -> HistoryStorage:
+    """
+    Create the storage backend selected by CALCULATOR_HISTORY_STORAGE.
+
+    Args:
+        config (CalculatorConfig): The calculator configuration.
+
+    Returns:
+        HistoryStorage: A CsvHistoryStorage, SegmentedHistoryStorage,
+            DictionaryHistoryStorage or the default session of a SqliteHistoryStore.
+    """
+    if config.history_storage == 'segmented':
+        return SegmentedHistoryStorage(config)
+    if config.history_storage == 'dictionary':
+        return DictionaryHistoryStorage(config)
+    if config.history_storage == 'sqlite':
+        return SqliteHistoryStore.for_config(config).session(DEFAULT_SESSION)
+    return CsvHistoryStorage(config)
@@ -0,0 +1,183 @@
+########################
+# History View         #
+########################
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+import csv
+import mmap
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union, overload
+
+from app.calculation import Calculation
+from app.compression import CODECS, compressed_path, detect_codec, wrap_binary
+
+# Row offsets are stored in the native byte order; the index is a local
+# cache next to its segment, not an exchange format
+OFFSET_TYPECODE = 'Q'
+OFFSET_SIZE = array(OFFSET_TYPECODE).itemsize
+
+
+class SegmentRef(NamedTuple):
+    """A saved segment as listed in the manifest."""
+
+    path: Path                  # The segment's CSV file, possibly compressed
+    index_path: Optional[Path]  # Its row offset index, if one was written
+    records: int                # Records the manifest counts in it
+
+
+class _LoadedSegment:
+    """The bytes, column names and row offsets of one segment."""
+
+    __slots__ = ('data', 'columns', 'offsets', 'mapped')
+
+    def __init__(self, data: Union[mmap.mmap, bytes], columns: List[str], offsets: array, mapped: bool):
+        self.data = data
+        self.columns = columns
+        self.offsets = offsets
+        self.mapped = mapped
+
+
+class MmapHistoryView(Sequence):
+    """
+    Read-only, random-access view of a saved history.
+
+    The view spans the segments SegmentedHistoryStorage keeps on disk, which
+    may hold far more records than max_history_size, followed by the
+    calculations not saved yet. Only the segments an index, slice or tail
+    touches are opened: plain segments are memory-mapped and compressed ones
+    are decompressed one at a time, and only the requested records are
+    turned into Calculation instances. Each segment's row offsets come from
+    the index written next to it, or from one scan for segments without one.
+
+    The view is a snapshot: later saves are not reflected in it.
+    """
+
+    def __init__(self, segments: List[SegmentRef], tail: List[Calculation] = ()):
+        """
+        Create the view.
+
+        Args:
+            segments (List[SegmentRef]): Saved segments, oldest first.
+            tail (List[Calculation], optional): Calculations after the last saved one.
+        """
+        self._segments = [segment for segment in segments if segment.records]
+        # Position of the first record of every segment, then the saved total
+        self._starts = [0]
+        for segment in self._segments:
+            self._starts.append(self._starts[-1] + segment.records)
+        self._tail = list(tail)
+        self._count = self._starts[-1] + len(self._tail)
+        self._loaded: Dict[int, _LoadedSegment] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def saved(self) -> int:
+        """Number of records read from disk rather than from the unsaved tail."""
+        return self._starts[-1]
+
+    @overload
+    def __getitem__(self, index: int) -> Calculation: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Calculation]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Calculation, List[Calculation]]:
+        if isinstance(index, slice):
+            return [self._calculation(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history view index out of range")
+        return self._calculation(index)
+
+    def tail(self, count: int) -> List[Calculation]:
+        """
+        Return the newest calculations.
+
+        Args:
+            count (int): Maximum number of calculations to return.
+
+        Returns:
+            List[Calculation]: Up to count calculations, oldest first.
+        """
+        return self[max(0, self._count - count):]
+
+    def _calculation(self, index: int) -> Calculation:
+        saved = self._starts[-1]
+        if index >= saved:
+            return self._tail[index - saved]
+        number = bisect_right(self._starts, index) - 1
+        segment = self._load(number)
+        row = index - self._starts[number]
+        start = segment.offsets[row]
+        if row + 1 < len(segment.offsets):
+            end = segment.offsets[row + 1]
+        else:
+            end = segment.data.find(b'\n', start) + 1 or len(segment.data)
+        fields = next(csv.reader([segment.data[start:end].decode('utf-8')]))
+        return Calculation.from_dict(dict(zip(segment.columns, fields)))
+
+    def _load(self, number: int) -> _LoadedSegment:
+        segment = self._loaded.get(number)
+        if segment is not None:
+            return segment
+        ref = self._segments[number]
+        path = self._existing_path(ref.path)
+        codec = detect_codec(path)
+        if codec.name == 'none':
+            with open(path, 'rb') as handle:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Keep at most one decompressed segment in memory
+            for loaded_number in [n for n, loaded in self._loaded.items() if not loaded.mapped]:
+                del self._loaded[loaded_number]
+            with open(path, 'rb') as raw, wrap_binary(raw, codec, 'rb') as stream:
+                data = stream.read()
+        header_end = data.find(b'\n') + 1
+        columns = next(csv.reader([data[:header_end].decode('utf-8')]))
+        offsets = self._read_offsets(ref, data, header_end)
+        segment = self._loaded[number] = _LoadedSegment(data, columns, offsets, codec.name == 'none')
+        return segment
+
+    @staticmethod
+    def _existing_path(path: Path) -> Path:
+        """Return path, or the compressed file it became when its segment was sealed."""
+        if path.exists():
+            return path
+        for codec in CODECS.values():
+            candidate = compressed_path(path, codec)
+            if candidate.exists():
+                return candidate
+        raise FileNotFoundError(f"History segment not found: {path}")
+
+    @staticmethod
+    def _read_offsets(ref: SegmentRef, data: Union[mmap.mmap, bytes], header_end: int) -> array:
+        offsets = array(OFFSET_TYPECODE)
+        size = ref.records * OFFSET_SIZE
+        if ref.index_path is not None and ref.index_path.exists() and ref.index_path.stat().st_size >= size:
+            with open(ref.index_path, 'rb') as handle:
+                offsets.frombytes(handle.read(size))
+            return offsets
+        # Segments written before indexes existed: find the rows once
+        position = header_end
+        for _ in range(ref.records):
+            offsets.append(position)
+            position = data.find(b'\n', position) + 1
+        return offsets
+
+    def close(self) -> None:
+        """Unmap the segments. The view cannot be used afterwards."""
+        for segment in self._loaded.values():
+            if segment.mapped:
+                segment.data.close()
+        self._loaded.clear()
+
+    def __enter__(self) -> 'MmapHistoryView':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -2,37 +2,106 @@
 # Input Validation     #
 ########################
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from decimal import Decimal, InvalidOperation
-from typing import Any
+from typing import Any, Iterable, List
 from app.calculator_config import CalculatorConfig
 from app.exceptions import ValidationError
 
+
+def _to_bound(max_input_value: Any) -> Decimal:
+    """Convert a configured maximum into the Decimal used for comparisons."""
+    if type(max_input_value) is Decimal:
+        return max_input_value
+    return Decimal(str(max_input_value))
+
+
+def _validate(value: Any, bound: Any) -> Decimal:
+    """
+    Convert one value to a normalized Decimal and check it against bound.
+
+    Decimals are used as they are and ints are converted directly; only other
+    types take the string round-trip. bool is excluded from the int fast path
+    on purpose, since Decimal(str(True)) has always been rejected.
+    """
+    try:
+        value_type = type(value)
+        if value_type is Decimal:
+            number = value
+        elif value_type is int:
+            number = Decimal(value)
+        else:
+            if value_type is str:
+                value = value.strip()
+            number = Decimal(str(value))
+        if number.copy_abs() > bound:
+            raise ValidationError(f"Value exceeds maximum allowed: {bound}")
+        return number.normalize()
+    except InvalidOperation as e:
+        raise ValidationError(f"Invalid number format: {value}") from e
+
+
 @dataclass
 class InputValidator:
-    """Validates and sanitizes calculator inputs."""
-    
+    """
+    Validates and sanitizes calculator inputs.
+
+    An instance is bound to one configuration and keeps its maximum input
+    value as a ready-made Decimal, so per-operand validation does no config
+    lookups or conversions. validate_number remains available for one-off
+    checks against any configuration.
+    """
+
+    config: CalculatorConfig
+    max_bound: Decimal = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.max_bound = _to_bound(self.config.max_input_value)
+
+    def validate(self, value: Any) -> Decimal:
+        """
+        Validate and convert input to Decimal using the precomputed bound.
+
+        Args:
+            value: Input value to validate
+
+        Returns:
+            Decimal: Validated and converted number
+
+        Raises:
+            ValidationError: If input is invalid
+        """
+        return _validate(value, self.max_bound)
+
+    def validate_many(self, values: Iterable[Any]) -> List[Decimal]:
+        """
+        Validate and convert a sequence of inputs.
+
+        Args:
+            values: Input values to validate
+
+        Returns:
+            List[Decimal]: Validated and converted numbers, in input order
+
+        Raises:
+            ValidationError: On the first invalid input
+        """
+        bound = self.max_bound
+        return [_validate(value, bound) for value in values]
+
     @staticmethod
     def validate_number(value: Any, config: CalculatorConfig) -> Decimal:
         """
         Validate and convert input to Decimal.
-        
+
         Args:
             value: Input value to validate
             config: Calculator configuration
-            
+
         Returns:
             Decimal: Validated and converted number
-            
+
         Raises:
             ValidationError: If input is invalid
         """
-        try:
-            if isinstance(value, str):
-                value = value.strip()
-            number = Decimal(str(value))
-            if abs(number) > config.max_input_value:
-                raise ValidationError(f"Value exceeds maximum allowed: {config.max_input_value}")
-            return number.normalize()
-        except InvalidOperation as e:
-            raise ValidationError(f"Invalid number format: {value}") from e
+        return _validate(value, config.max_input_value)
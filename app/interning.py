@@ -0,0 +1,77 @@
+########################
+# Value Interning      #
+########################
+
+from decimal import Decimal
+import sys
+from typing import Dict, Iterable, List
+
+from app.calculation import Calculation
+
+# Distinct values remembered; later new values are used as they are
+DEFAULT_MAX_VALUES = 100_000
+
+
+class ValueInterner:
+    """
+    Shares one Decimal object per distinct operand or result value.
+
+    Repetitive workloads produce the same numbers over and over; interning
+    makes every Calculation holding 2 (or 12.50) point at the same Decimal
+    instead of keeping its own copy. Values are matched by representation,
+    not just numerically, so Decimal('2') and Decimal('2.0') stay distinct.
+    Operation names are interned with sys.intern.
+    """
+
+    def __init__(self, max_values: int = DEFAULT_MAX_VALUES):
+        """
+        Initialize the interner.
+
+        Args:
+            max_values (int, optional): Upper bound on remembered values.
+        """
+        self.max_values = max_values
+        self._values: Dict[Decimal, Decimal] = {}
+        # Numerically equal values with another representation, by text
+        self._variants: Dict[str, Decimal] = {}
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._variants)
+
+    def intern(self, value: Decimal) -> Decimal:
+        """
+        Return the shared Decimal equal to value in number and representation.
+
+        Args:
+            value (Decimal): The value to share.
+
+        Returns:
+            Decimal: The shared instance, or value itself if it is new.
+        """
+        shared = self._values.get(value)
+        if shared is None:
+            if len(self) < self.max_values:
+                self._values[value] = value
+            return value
+        if shared is value or shared.compare_total(value) == 0:
+            return shared
+        text = str(value)
+        shared = self._variants.get(text)
+        if shared is None:
+            if len(self) < self.max_values:
+                self._variants[text] = value
+            return value
+        return shared
+
+    def intern_calculation(self, calc: Calculation) -> Calculation:
+        """Point calc's fields at shared instances, in place, and return it."""
+        calc.operation = sys.intern(calc.operation)
+        if not calc.is_reduction:
+            calc.operand1 = self.intern(calc.operand1)
+            calc.operand2 = self.intern(calc.operand2)
+        calc.result = self.intern(calc.result)
+        return calc
+
+    def intern_history(self, history: Iterable[Calculation]) -> List[Calculation]:
+        """Intern every calculation of a loaded history, in place."""
+        return [self.intern_calculation(calc) for calc in history]
@@ -1,45 +1,93 @@
 from abc import ABC, abstractmethod
 from decimal import Decimal
-from typing import Dict
+from functools import partial
+import importlib
+import importlib.util
+from importlib.metadata import entry_points
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Union
 from app.exceptions import UnknownOperationError, ValidationError, OperationError
 import math
+
+# Entry point group under which installed packages publish operations,
+# e.g. log = "mypackage.operations:Logarithm"
+PLUGIN_ENTRY_POINT_GROUP = 'calculator.operations'
+
+
+def _import_target(target: str) -> type:
+    """Import 'package.module:Class' and return the class."""
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _bundled_plugins() -> Dict[str, Callable[[], type]]:
+    """Map each module in the app.plugins package to a loader for its OPERATION."""
+    directory = Path(__file__).with_name('plugins')
+    return {
+        path.stem.lower(): partial(_import_target, f"app.plugins.{path.stem}:OPERATION")
+        for path in sorted(directory.glob("*.py"))
+        if not path.stem.startswith('_')
+    }
+
+
+def _import_plugin_file(path: Path) -> type:
+    """Import a plugins-directory module and return its OPERATION class."""
+    spec = importlib.util.spec_from_file_location(f"calculator_plugins.{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.OPERATION
+
+
 class Operation(ABC):
 
+    # Display name recorded in each Calculation, computed once per class
+    name: str = 'Operation'
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'name' not in cls.__dict__:
+            cls.name = cls.__name__
+
     @abstractmethod
-    def execute(self, a: Decimal, b : Decimal) -> str:
+    def execute(self, a: Decimal, b : Decimal) -> Decimal:
 
         pass
 
+    def format_result(self, result: Decimal) -> str:
+        # Results stay numeric until they are displayed or persisted
+        return str(result)
+
     def validate_operands(self, a :Decimal , b:Decimal) -> None:
 
         pass
 
     def __str__(self):
-        return self.__class__.__name__
+        return self.name
     
 
 class Addition(Operation):
     
     def execute(self, a, b):
         self.validate_operands(a,b)
-        return str(a+b)
+        return a+b
     
 
 class Subtraction(Operation):
 
     def execute(self, a, b):
         self.validate_operands(a,b)
-        return str(a-b)
+        return a-b
     
 
 class Multiplication(Operation):
     def execute(self, a, b):
-        return str(a*b)
+        return a*b
     
 class Division(Operation):
     def execute(self, a, b):
         self.validate_operands(a,b)
-        return str(a/b)
+        return a/b
     
     def validate_operands(self, a, b):
         super().validate_operands(a, b)
@@ -49,7 +97,7 @@ class Division(Operation):
 class Modulus(Operation):
     def execute(self, a, b):
         self.validate_operands(a,b)
-        return str(a%b)
+        return a%b
     
     def validate_operands(self, a, b):
         super().validate_operands(a, b)
@@ -59,7 +107,7 @@ class Modulus(Operation):
 class Int_Division(Operation):
     def execute(self, a, b):
         self.validate_operands(a,b)
-        return str(a//b)
+        return a//b
     
     def validate_operands(self, a, b):
         super().validate_operands(a, b)
@@ -68,7 +116,7 @@ class Int_Division(Operation):
         
 class Power(Operation):
     def execute(self, a, b):
-        return str(a**b)
+        return a**b
         
 
 class Root(Operation):
@@ -81,11 +129,12 @@ class Root(Operation):
         if a < 0 and root_degree % 2 != 0:
             abs_base = abs(base)
             result = math.pow(abs_base, 1 / root_degree)
-            return str(-result)
+            return Decimal(repr(-result))
 
         try:
             result = math.pow(base, 1 / root_degree)
-            return str(result)
+            # repr keeps the float's shortest form, e.g. 2.0 rather than 2
+            return Decimal(repr(result))
         except ValueError as e:
             # 捕获 pow 函数可能抛出的错误（如 x < 0 且 y 是偶数）
             raise OperationError(f"Root calculation failed: {e}")
@@ -109,12 +158,69 @@ class Percentage(Operation):
         
     def execute(self, a, b):
         result = a/b*100
-        return str(result.quantize(Decimal('1.00'))) + '%'
+        return result.quantize(Decimal('1.00'))
+
+    def format_result(self, result):
+        return f"{result}%"
     
 
 class AbsDiff(Operation):
     def execute(self, a, b):
-        return str(abs(a-b))
+        return abs(a-b)
+
+
+class ReductionOperation(Operation):
+    """
+    N-ary operation that reduces a whole sequence of operands in one call.
+
+    The values stay Decimal and are accumulated by the C-level builtins
+    (sum, min, max, math.prod), so a reduction over thousands of values is
+    one call rather than a chain of binary calculations. There is no float
+    conversion, but Decimal arithmetic still rounds to the context precision
+    (28 significant digits by default), so sums of large values, products
+    and means can be rounded. Used as a binary operation it reduces the pair.
+    """
+
+    def execute(self, a, b):
+        return self.reduce((a, b))
+
+    def reduce(self, values: Sequence[Decimal]) -> Decimal:
+        self.validate_values(values)
+        return self._reduce(values)
+
+    @abstractmethod
+    def _reduce(self, values: Sequence[Decimal]) -> Decimal:
+
+        pass
+
+    def validate_values(self, values: Sequence[Decimal]) -> None:
+        if not values:
+            raise ValidationError(f"{self.name} needs at least one value")
+
+
+class Sum(ReductionOperation):
+    def _reduce(self, values):
+        return sum(values, Decimal(0))
+
+
+class Mean(ReductionOperation):
+    def _reduce(self, values):
+        return sum(values, Decimal(0)) / len(values)
+
+
+class Minimum(ReductionOperation):
+    def _reduce(self, values):
+        return min(values)
+
+
+class Maximum(ReductionOperation):
+    def _reduce(self, values):
+        return max(values)
+
+
+class Product(ReductionOperation):
+    def _reduce(self, values):
+        return math.prod(values, start=Decimal(1))
 
 class OperationFactory:
 
@@ -128,19 +234,217 @@ class OperationFactory:
         'div' : Int_Division,
         'abs' : AbsDiff,
         'root' : Root,
-        'per' : Percentage
+        'per' : Percentage,
+        'sum' : Sum,
+        'mean' : Mean,
+        'min' : Minimum,
+        'max' : Maximum,
+        'product' : Product
     }
 
+    # Operations imported on first use: operator -> loader returning the class
+    _lazy: Dict[str, Callable[[], type]] = _bundled_plugins()
+    # Installed entry points are looked up once, the first time they can matter
+    _entry_points_scanned = False
+
+    # Operations are stateless, so one shared instance per operator is enough
+    _instances: Dict[str, Operation] = {}
+    _dispatch: Optional[Dict[str, Callable[[Decimal, Decimal], Decimal]]] = None
+    _by_name: Optional[Dict[str, Operation]] = None
+
 
     @classmethod
     def create_operation(cls, operation_type: str) -> Operation:
+        operation = cls._instances.get(operation_type)
+        if operation is not None:
+            return operation
         operation_class = cls._operations.get(operation_type)
         if not operation_class:
-            raise UnknownOperationError(f"Unknown operation: {operation_class}")
-        return operation_class()
+            cls._scan_entry_points()
+            if operation_type not in cls._lazy:
+                raise UnknownOperationError(f"Unknown operation: {operation_type}")
+            operation_class = cls._load_lazy(operation_type)
+        return cls._instances.setdefault(operation_type, operation_class())
+
+    @classmethod
+    def register_lazy_operation(cls, name: str, target: Union[str, Callable[[], type]]) -> None:
+        """
+        Register an operation that is imported the first time it is used.
+
+        Args:
+            name (str): The operator, e.g. 'log'.
+            target (Union[str, Callable[[], type]]): 'package.module:Class', or a
+                callable returning the Operation subclass.
+        """
+        name = name.lower()
+        cls._lazy[name] = partial(_import_target, target) if isinstance(target, str) else target
+        cls._operations.pop(name, None)
+        cls._instances.pop(name, None)
+        cls._dispatch = None
+        cls._by_name = None
+
+    @classmethod
+    def discover_plugins(cls, directory: Optional[Path]) -> List[str]:
+        """
+        Register the operations found in a plugins directory.
+
+        Every <operator>.py file in the directory is a plugin whose module
+        defines OPERATION, its Operation subclass. Only the names are
+        recorded here: a plugin is imported when it is first used. Plugins
+        never replace an operator that is already registered.
+
+        Installed packages publishing operations in the 'calculator.operations'
+        entry point group are not looked up here; that scan is deferred until
+        an unknown operator or the list of operators is first asked for.
+
+        Args:
+            directory (Optional[Path]): Plugins directory; skipped if missing or None.
+
+        Returns:
+            List[str]: The operators registered by this call.
+        """
+        found: Dict[str, Callable[[], type]] = {}
+        if directory is not None and directory.is_dir():
+            for path in sorted(directory.glob("*.py")):
+                if not path.stem.startswith('_'):
+                    found.setdefault(path.stem.lower(), partial(_import_plugin_file, path))
+        return cls._register_plugins(found)
+
+    @classmethod
+    def _scan_entry_points(cls) -> None:
+        """Register the operations of installed packages, once per process."""
+        if cls._entry_points_scanned:
+            return
+        cls._entry_points_scanned = True
+        found: Dict[str, Callable[[], type]] = {}
+        for entry_point in entry_points(group=PLUGIN_ENTRY_POINT_GROUP):
+            found.setdefault(entry_point.name.lower(), entry_point.load)
+        cls._register_plugins(found)
+
+    @classmethod
+    def _register_plugins(cls, found: Dict[str, Callable[[], type]]) -> List[str]:
+        """Register plugin loaders lazily, skipping operators already taken."""
+        registered = []
+        for name, loader in found.items():
+            if name in cls._operations or name in cls._lazy:
+                logging.warning(f"Ignoring plugin operation '{name}': the operator is already registered")
+                continue
+            cls.register_lazy_operation(name, loader)
+            registered.append(name)
+        return registered
+
+    @classmethod
+    def _load_lazy(cls, name: str) -> type:
+        """
+        Import a lazily registered operation and register its class.
+
+        Raises:
+            OperationError: If the plugin cannot be imported or is not an Operation.
+        """
+        loader = cls._lazy.get(name)
+        if loader is None:
+            # Loaded meanwhile by another thread
+            return cls._operations[name]
+        try:
+            operation_class = loader()
+            cls.register_operation(name, operation_class)
+        except Exception as e:
+            raise OperationError(f"Failed to load operation '{name}': {e}")
+        return operation_class
+
+    @classmethod
+    def get_dispatch_table(cls) -> Dict[str, Callable[[Decimal, Decimal], Decimal]]:
+        """
+        Map every operator to the execute method of its shared instance.
+
+        Batch callers can look up and call the operation directly, skipping
+        the factory and the Operation object on every calculation. The table
+        is rebuilt after register_operation; lazily registered operations
+        join it once they have been used.
+        """
+        dispatch = cls._dispatch
+        if dispatch is None:
+            dispatch = {name: cls.create_operation(name).execute for name in cls._operations}
+            cls._dispatch = dispatch
+        return dispatch
     
+    @classmethod
+    def symbols(cls) -> List[str]:
+        """Return the operators that create_operation accepts, e.g. for completion."""
+        cls._scan_entry_points()
+        return list(cls._operations) + list(cls._lazy)
+
     @classmethod
     def register_operation(cls, name: str, operation_class: type) -> None:
         if not issubclass(operation_class, Operation):
             raise TypeError("Operation class must inherit from Operation")
-        cls._operations[name.lower()] = operation_class
\ No newline at end of file
+        name = name.lower()
+        cls._operations[name] = operation_class
+        cls._lazy.pop(name, None)
+        cls._instances.pop(name, None)
+        cls._dispatch = None
+        cls._by_name = None
+
+    @classmethod
+    def _names(cls) -> Dict[str, Operation]:
+        """
+        Map each operation's display name to its shared instance.
+
+        A name is only known once its class is imported, so this loads every
+        lazily registered operation; plugins that fail to load are skipped.
+        """
+        by_name = cls._by_name
+        if by_name is None:
+            by_name = {}
+            for symbol in cls.symbols():
+                try:
+                    operation = cls.create_operation(symbol)
+                except OperationError as e:
+                    logging.warning(str(e))
+                    continue
+                by_name.setdefault(operation.name, operation)
+            cls._by_name = by_name
+        return by_name
+
+    @classmethod
+    def resolve_name(cls, operation: str) -> str:
+        """
+        Return the display name of an operation given its symbol or name.
+
+        Args:
+            operation (str): An operator such as 'pow', or a name such as 'Power'
+                in any case.
+
+        Returns:
+            str: The name stored in calculations, e.g. 'Power'.
+
+        Raises:
+            UnknownOperationError: If no operation matches.
+        """
+        text = operation.strip()
+        if text.lower() in cls._operations:
+            return cls.create_operation(text.lower()).name
+        cls._scan_entry_points()
+        if text.lower() in cls._lazy:
+            return cls.create_operation(text.lower()).name
+        for name in cls._names():
+            if name.lower() == text.lower():
+                return name
+        raise UnknownOperationError(f"Unknown operation: {operation}")
+
+    @classmethod
+    def format_result(cls, operation_name: str, result: Decimal) -> str:
+        """
+        Format a result for display or persistence.
+
+        Args:
+            operation_name (str): Display name of the operation, as stored in a Calculation.
+            result (Decimal): The numeric result.
+
+        Returns:
+            str: The result formatted the way the operation presents it.
+        """
+        operation = cls._names().get(operation_name)
+        if operation is None:
+            return str(result)
+        return operation.format_result(result)
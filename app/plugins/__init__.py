@@ -0,0 +1,7 @@
+########################
+# Plugin Operations    #
+########################
+
+# Operations shipped with the calculator but imported on first use; see
+# OperationFactory.register_lazy_operation. One module per operator, named
+# after it and defining OPERATION, like a plugins-directory module.
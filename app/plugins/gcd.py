@@ -0,0 +1,22 @@
+from decimal import Decimal
+import math
+
+from app.exceptions import ValidationError
+from app.opeartions import Operation
+
+
+class GreatestCommonDivisor(Operation):
+    """Greatest common divisor of two integers."""
+
+    name = 'GCD'
+
+    def execute(self, a: Decimal, b: Decimal) -> Decimal:
+        self.validate_operands(a, b)
+        return Decimal(math.gcd(int(a), int(b)))
+
+    def validate_operands(self, a: Decimal, b: Decimal) -> None:
+        if a % 1 != 0 or b % 1 != 0:
+            raise ValidationError("GCD is only defined for integers")
+
+
+OPERATION = GreatestCommonDivisor
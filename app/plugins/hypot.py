@@ -0,0 +1,13 @@
+from decimal import Decimal
+
+from app.opeartions import Operation
+
+
+class Hypotenuse(Operation):
+    """Length of the hypotenuse of a right triangle with legs a and b."""
+
+    def execute(self, a: Decimal, b: Decimal) -> Decimal:
+        return (a * a + b * b).sqrt()
+
+
+OPERATION = Hypotenuse
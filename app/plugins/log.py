@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+from app.exceptions import ValidationError
+from app.opeartions import Operation
+
+
+class Logarithm(Operation):
+    """Logarithm of a to base b."""
+
+    def execute(self, a: Decimal, b: Decimal) -> Decimal:
+        self.validate_operands(a, b)
+        return a.log10() / b.log10()
+
+    def validate_operands(self, a: Decimal, b: Decimal) -> None:
+        if a <= 0:
+            raise ValidationError("Logarithm is only defined for positive numbers")
+        if b <= 0 or b == 1:
+            raise ValidationError("Logarithm base must be positive and not 1")
+
+
+OPERATION = Logarithm
@@ -0,0 +1,130 @@
+########################
+# Session Profiling    #
+########################
+
+import cProfile
+import datetime
+import io
+from pathlib import Path
+import pstats
+import tracemalloc
+from typing import Optional, Tuple
+
+from app.exceptions import OperationError
+
+# Functions and allocation sites listed in the text report
+DEFAULT_TOP = 25
+# Stack depth recorded per allocation; enough to see who called the allocator
+TRACE_FRAMES = 5
+
+
+class SessionProfiler:
+    """
+    Profiles a calculator session with cProfile and tracemalloc.
+
+    start() begins recording CPU time per function and the allocations made
+    from then on; dump() writes a pstats file (for pstats or snakeviz) and a
+    text report with the slowest functions and the largest allocation sites,
+    such as history copies or DataFrame construction, to the log directory.
+    dump() works while profiling is running and after stop().
+    """
+
+    def __init__(self, log_dir: Path, top: int = DEFAULT_TOP):
+        """
+        Initialize the profiler.
+
+        Args:
+            log_dir (Path): Directory the reports are written to.
+            top (int, optional): Entries listed per section of the text report.
+        """
+        self.log_dir = log_dir
+        self.top = top
+        self._profile: Optional[cProfile.Profile] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracing = False
+        self.active = False
+
+    def start(self) -> None:
+        """
+        Start profiling, discarding data from an earlier run.
+
+        Raises:
+            OperationError: If profiling is already running.
+        """
+        if self.active:
+            raise OperationError("Profiling is already running")
+        self._snapshot = None
+        # Leave tracing alone if someone else (e.g. python -X tracemalloc) started it
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        self.active = True
+
+    def stop(self) -> None:
+        """
+        Stop profiling and keep the data for dump().
+
+        Raises:
+            OperationError: If profiling is not running.
+        """
+        if not self.active:
+            raise OperationError("Profiling is not running")
+        self._profile.disable()
+        self._snapshot = tracemalloc.take_snapshot()
+        if self._owns_tracing:
+            tracemalloc.stop()
+        self.active = False
+
+    def dump(self) -> Tuple[Path, Path]:
+        """
+        Write the collected data to the log directory.
+
+        Returns:
+            Tuple[Path, Path]: The pstats file and the text report.
+
+        Raises:
+            OperationError: If nothing has been profiled yet.
+        """
+        if self._profile is None:
+            raise OperationError("No profile to dump; use 'profile start' first")
+        if self.active:
+            # Statistics can only be read from a disabled profiler
+            self._profile.disable()
+            try:
+                stats = pstats.Stats(self._profile)
+            finally:
+                self._profile.enable()
+            snapshot = tracemalloc.take_snapshot()
+        else:
+            stats = pstats.Stats(self._profile)
+            snapshot = self._snapshot
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"profile-{datetime.datetime.now():%Y%m%d-%H%M%S-%f}"
+        stats_path = self.log_dir / f"{stem}.pstats"
+        report_path = self.log_dir / f"{stem}.txt"
+        stats.dump_stats(stats_path)
+        report_path.write_text(self._report(stats, snapshot), encoding='utf-8')
+        return stats_path, report_path
+
+    def _report(self, stats: pstats.Stats, snapshot: tracemalloc.Snapshot) -> str:
+        """Render the slowest functions and the largest allocation sites."""
+        out = io.StringIO()
+        out.write(f"Top {self.top} functions by cumulative time\n\n")
+        stats.stream = out
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        # Allocations made by the profilers themselves are noise
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+        ))
+        out.write(f"\nTop {self.top} allocation sites by size\n\n")
+        for statistic in snapshot.statistics('traceback')[:self.top]:
+            out.write(f"{statistic.size / 1024:.1f} KiB in {statistic.count} blocks\n")
+            for line in statistic.traceback.format(most_recent_first=True):
+                out.write(f"    {line}\n")
+        return out.getvalue()
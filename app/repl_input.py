@@ -0,0 +1,101 @@
+########################
+# REPL Input           #
+########################
+
+import logging
+from pathlib import Path
+import sys
+from typing import Callable, Iterable, List, Optional
+
+# readline is missing on Windows unless pyreadline3 is installed; input()
+# then simply works without history or completion
+try:
+    import readline
+except ImportError:  # pragma: no cover - depends on the platform
+    readline = None
+
+# Lines kept in the input history file
+INPUT_HISTORY_LENGTH = 1000
+
+
+class ReplInput:
+    """
+    Line editing, persistent input history and Tab completion for the REPL.
+
+    Once installed, readline hooks into input() itself, so reading a line
+    costs nothing extra. The history file is read once at start and written
+    once at close. Completion candidates are looked up only when Tab is
+    pressed, from a words callable, so operators registered later are
+    offered too.
+    """
+
+    def __init__(self, history_file: Optional[Path], words: Callable[[], Iterable[str]]):
+        """
+        Initialize the input layer.
+
+        Args:
+            history_file (Optional[Path]): Where typed lines are kept between
+                sessions, or None for no persistent history.
+            words (Callable[[], Iterable[str]]): Returns the commands and
+                operators to complete.
+        """
+        self.history_file = history_file
+        self.words = words
+        self.enabled = False
+        self._matches: List[str] = []
+
+    def install(self) -> bool:
+        """
+        Configure readline for this session.
+
+        Nothing is done when readline is unavailable or stdin is not a
+        terminal, e.g. when commands are piped in.
+
+        Returns:
+            bool: True if line editing was enabled.
+        """
+        if readline is None or not sys.stdin.isatty():
+            return False
+        if self.history_file is not None:
+            try:
+                readline.read_history_file(self.history_file)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not read input history: {e}")
+        readline.set_history_length(INPUT_HISTORY_LENGTH)
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(" \t\n=")
+        # macOS ships libedit, which has its own binding syntax
+        if 'libedit' in (readline.__doc__ or ''):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+        self.enabled = True
+        return True
+
+    def complete(self, text: str, state: int) -> Optional[str]:
+        """
+        readline completer: return the state-th word starting with text.
+
+        Args:
+            text (str): The word being completed.
+            state (int): Index of the candidate requested.
+
+        Returns:
+            Optional[str]: The candidate, or None when there are no more.
+        """
+        if state == 0:
+            prefix = text.lower()
+            self._matches = sorted({word for word in self.words() if word.startswith(prefix)})
+        return self._matches[state] if state < len(self._matches) else None
+
+    def close(self) -> None:
+        """Write the input history file, if line editing was enabled."""
+        if not self.enabled or self.history_file is None:
+            return
+        try:
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            readline.write_history_file(self.history_file)
+        except OSError as e:
+            logging.warning(f"Could not save input history: {e}")
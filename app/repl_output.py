@@ -0,0 +1,133 @@
+########################
+# REPL Output          #
+########################
+
+from contextlib import contextmanager
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from colorama import Back, Fore, Style
+
+# Colour of each kind of message the REPL prints
+STYLES: Dict[str, str] = {
+    'plain': '',
+    'success': Fore.GREEN,
+    'error': Fore.RED,
+    'heading': Fore.BLUE,
+    'help': Fore.YELLOW,
+    'result': Back.YELLOW,
+    'entry': Back.BLUE,
+    'farewell': Back.GREEN,
+}
+# ANSI sequence that clears the screen and moves the cursor home
+CLEAR_SCREEN = "\033[2J\033[H"
+# Buffered text written out early so huge dumps do not pile up in memory
+FLUSH_THRESHOLD = 64 * 1024
+
+
+def build_templates(color: bool) -> Dict[str, str]:
+    """
+    Precompute one format template per message kind.
+
+    Args:
+        color (bool): Wrap messages in their ANSI colour codes.
+
+    Returns:
+        Dict[str, str]: Kind -> template with a single {} for the text.
+    """
+    if not color:
+        return {kind: "{}\n" for kind in STYLES}
+    return {
+        kind: f"{style}{{}}{Style.RESET_ALL}\n" if style else "{}\n"
+        for kind, style in STYLES.items()
+    }
+
+
+# Built once; every writer shares them
+COLOR_TEMPLATES = build_templates(True)
+PLAIN_TEMPLATES = build_templates(False)
+
+
+class TerminalWriter:
+    """
+    Buffered, template-based output for the REPL.
+
+    Messages are formatted from the precomputed template of their kind and
+    collected in memory; flush() hands everything to the stream in a single
+    write, which the REPL does once per command. Colours are left out when
+    the stream is not a terminal, so piped or redirected output stays plain.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, color: Optional[bool] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            stream (Optional[TextIO], optional): Destination. Defaults to sys.stdout.
+            color (Optional[bool], optional): Force colours on or off. Defaults to
+                on exactly when the stream is a terminal.
+        """
+        self.stream = stream if stream is not None else sys.stdout
+        if color is None:
+            isatty = getattr(self.stream, 'isatty', None)
+            color = bool(isatty and isatty())
+        self.color = color
+        self._templates = COLOR_TEMPLATES if color else PLAIN_TEMPLATES
+        self._buffer: List[str] = []
+        self._size = 0
+
+    def write(self, kind: str, text: str) -> None:
+        """
+        Queue one message.
+
+        Args:
+            kind (str): Message kind, a key of STYLES.
+            text (str): The message, without a trailing newline.
+        """
+        self._append(self._templates[kind].format(text))
+
+    def lines(self, kind: str, texts: Iterable[str]) -> None:
+        """Queue one message of the same kind per text, formatted in one pass."""
+        template = self._templates[kind]
+        self._append("".join(template.format(text) for text in texts))
+
+    def clear_screen(self) -> None:
+        """
+        Queue a clear-screen sequence, replacing a cls/clear subprocess per command.
+
+        Skipped when colours are off, i.e. the stream is not a terminal.
+        """
+        if self.color:
+            self._append(CLEAR_SCREEN)
+
+    def _append(self, chunk: str) -> None:
+        self._buffer.append(chunk)
+        self._size += len(chunk)
+        if self._size >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything queued with one call and flush the stream."""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer.clear()
+            self._size = 0
+        self.stream.flush()
+
+
+@contextmanager
+def writer_for(out: Optional[TerminalWriter]) -> Iterator[TerminalWriter]:
+    """
+    Yield out, or a temporary writer over sys.stdout that is flushed on exit.
+
+    Lets output helpers join the REPL's per-command buffer when given one and
+    still work on their own.
+    """
+    if out is not None:
+        yield out
+        return
+    out = TerminalWriter()
+    try:
+        yield out
+    finally:
+        out.flush()
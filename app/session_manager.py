@@ -0,0 +1,111 @@
+########################
+# Session Manager      #
+########################
+
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.exceptions import OperationError
+from app.history_storage import SqliteHistoryStore
+
+# Session ids also name the session's undo log file
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionManager:
+    """
+    Hosts many calculator sessions in one process.
+
+    Every session is a Calculator, but they share one configuration, the
+    process-wide operation registry, one logging setup and one SQLite
+    database (a SqliteHistoryStore) for their histories. Directories and
+    logging are set up once by the manager instead of by each calculator,
+    so opening a session only builds the calculator's in-memory state and
+    loads its history.
+    """
+
+    def __init__(self, config: Optional[CalculatorConfig] = None, store: Optional[SqliteHistoryStore] = None):
+        """
+        Initialize the manager.
+
+        Args:
+            config (Optional[CalculatorConfig], optional): Configuration shared by all sessions.
+                Defaults to one built from the environment.
+            store (Optional[SqliteHistoryStore], optional): Database holding the histories.
+                Defaults to <history stem>.sqlite3 next to the configured history file.
+        """
+        if config is None:
+            config = CalculatorConfig(base_dir=Path(__file__).parent.parent)
+        config.validate()
+        self.config = config
+
+        # Shared environment, prepared once for every session
+        Calculator.setup_environment(config)
+
+        self.store = store if store is not None else SqliteHistoryStore.for_config(config)
+        self._sessions: Dict[str, Calculator] = {}
+        self._lock = threading.Lock()
+
+    def session(self, session_id: str) -> Calculator:
+        """
+        Return the calculator of a session, opening it on first use.
+
+        A newly opened session loads the history it saved earlier, if any.
+
+        Args:
+            session_id (str): Letters, digits, '_' or '-', at most 64 characters.
+
+        Returns:
+            Calculator: The session's calculator.
+
+        Raises:
+            OperationError: If the session id is invalid.
+        """
+        calc = self._sessions.get(session_id)
+        if calc is not None:
+            return calc
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise OperationError(f"Invalid session id: {session_id!r}")
+        with self._lock:
+            calc = self._sessions.get(session_id)
+            if calc is None:
+                calc = Calculator(self.config, storage=self.store.session(session_id), session=session_id)
+                calc.load_history()
+                self._sessions[session_id] = calc
+                logging.info(f"Opened session {session_id}")
+        return calc
+
+    def sessions(self) -> List[str]:
+        """Return the ids of the open sessions."""
+        with self._lock:
+            return list(self._sessions)
+
+    def close(self, session_id: str, save: bool = True) -> None:
+        """
+        Close a session, saving its history first.
+
+        Args:
+            session_id (str): The session to close.
+            save (bool, optional): Save the history before closing. Defaults to True.
+        """
+        with self._lock:
+            calc = self._sessions.pop(session_id, None)
+        if calc is not None and save:
+            calc.save_history()
+
+    def close_all(self, save: bool = True) -> None:
+        """Close every session and the shared database."""
+        for session_id in self.sessions():
+            self.close(session_id, save)
+        self.store.close()
+
+    def __enter__(self) -> 'SessionManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close_all()
@@ -0,0 +1,209 @@
+########################
+# Undo Log             #
+########################
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+from app.calculation import Calculation
+from app.calculator_config import CalculatorConfig
+from app.calculator_memento import HistoryDelta
+from app.history_storage import HISTORY_COLUMNS, AtomicFileWriter, calculation_to_row, sibling_path
+
+# One pending stack operation: ('push', delta), ('undo', steps) or ('redo', steps)
+StackOp = Tuple
+
+
+def history_fingerprint(history: Sequence[Calculation]) -> str:
+    """Identify a saved history by its length and its newest calculation."""
+    if not history:
+        return "0"
+    return f"{len(history)}:" + "|".join(calculation_to_row(history[-1]))
+
+
+class UndoLog:
+    """
+    Append-only log of undo/redo stack operations, kept next to the history file.
+
+    Each line is one JSON array:
+
+        ["p", [removed rows], [added rows]]   a HistoryDelta was pushed
+        ["u", n] / ["r", n]                   n undos / redos (n omitted when 1)
+        ["s", "<fingerprint>"]                the history was saved here
+
+    A save appends the operations since the previous save followed by a save
+    marker, so the log only ever describes saved histories and grows by the
+    size of each change rather than by a copy of the history. Replaying the
+    pushes, undos and redos rebuilds both stacks; anything after the last
+    complete save marker (a torn append) is ignored.
+    """
+
+    ENCODING = 'utf-8'
+    # Bytes read from the end of the log to find the last save marker
+    TAIL_BYTES = 4096
+
+    def __init__(self, config: CalculatorConfig, writer: AtomicFileWriter, history_file: Optional[Path] = None):
+        """
+        Initialize the log.
+
+        Args:
+            config (CalculatorConfig): Supplies the history file location.
+            writer (AtomicFileWriter): Used for full rewrites and the fsync policy.
+            history_file (Optional[Path], optional): History file to sit next to, e.g.
+                a session's; defaults to the configured one.
+        """
+        history_file = history_file or config.history_file
+        self.path: Path = sibling_path(history_file, ".undo.jsonl")
+        self.writer = writer
+
+    @staticmethod
+    def _encode(op: StackOp) -> str:
+        if op[0] == 'push':
+            delta = op[1]
+            line = ['p', [calculation_to_row(c) for c in delta.removed], [calculation_to_row(c) for c in delta.added]]
+        elif op[0] in ('undo', 'redo'):
+            line = [op[0][0]]
+            if len(op) > 1 and op[1] != 1:
+                line.append(op[1])
+        else:
+            line = ['s', op[1]]
+        return json.dumps(line, separators=(',', ':')) + "\n"
+
+    def tail(self) -> Optional[Tuple[str, int]]:
+        """
+        Find the last save marker without reading the whole log.
+
+        Returns:
+            Optional[Tuple[str, int]]: The marker's fingerprint and the offset
+                just past it, or None if there is no readable marker.
+        """
+        try:
+            with open(self.path, 'rb') as handle:
+                size = handle.seek(0, os.SEEK_END)
+                start = max(0, size - self.TAIL_BYTES)
+                handle.seek(start)
+                chunk = handle.read()
+        except FileNotFoundError:
+            return None
+        end = len(chunk)
+        while end > 0:
+            newline = chunk.rfind(b"\n", 0, end)
+            if newline < 0:
+                return None
+            line_start = chunk.rfind(b"\n", 0, newline) + 1
+            if line_start == 0 and start > 0:
+                return None  # the line does not fit in the chunk
+            try:
+                entry = json.loads(chunk[line_start:newline])
+            except ValueError:
+                entry = None
+            if isinstance(entry, list) and entry and entry[0] == 's':
+                return entry[1], start + newline + 1
+            end = line_start
+        return None
+
+    def truncate(self, end: int) -> None:
+        """Drop anything after offset end, e.g. a torn append, before appending again."""
+        with open(self.path, 'r+b') as handle:
+            if handle.seek(0, os.SEEK_END) > end:
+                handle.truncate(end)
+
+    def append(self, ops: Sequence[StackOp], fingerprint: str) -> None:
+        """
+        Append stack operations followed by a save marker.
+
+        Args:
+            ops (Sequence[StackOp]): Operations since the previous save.
+            fingerprint (str): Fingerprint of the history just saved.
+        """
+        text = "".join(self._encode(op) for op in ops) + self._encode(('save', fingerprint))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding=self.ENCODING, newline='') as handle:
+            handle.write(text)
+            handle.flush()
+            if self.writer.should_sync():
+                os.fsync(handle.fileno())
+
+    @staticmethod
+    def stack_ops(undo_stack: Sequence[HistoryDelta], redo_stack: Sequence[HistoryDelta]) -> List[StackOp]:
+        """
+        Return the shortest operation sequence that rebuilds the given stacks.
+
+        Everything is pushed in timeline order, then undone back to the
+        current state.
+
+        Args:
+            undo_stack (Sequence[HistoryDelta]): Undo deltas, oldest first.
+            redo_stack (Sequence[HistoryDelta]): Redo deltas, the next redo last.
+        """
+        ops: List[StackOp] = [('push', delta) for delta in undo_stack]
+        ops.extend(('push', delta) for delta in reversed(redo_stack))
+        if redo_stack:
+            ops.append(('undo', len(redo_stack)))
+        return ops
+
+    @classmethod
+    def write_ops(cls, handle: TextIO, ops: Iterable[StackOp]) -> None:
+        """Write stack operations as log lines, encoding one at a time."""
+        handle.writelines(cls._encode(op) for op in ops)
+
+    def rewrite(self, undo_stack: Sequence[HistoryDelta], redo_stack: Sequence[HistoryDelta], fingerprint: str) -> int:
+        """
+        Replace the log with the shortest one that rebuilds the given stacks.
+
+        Args:
+            undo_stack (Sequence[HistoryDelta]): Undo deltas, oldest first.
+            redo_stack (Sequence[HistoryDelta]): Redo deltas, the next redo last.
+            fingerprint (str): Fingerprint of the history just saved.
+
+        Returns:
+            int: Number of log entries written, excluding the save marker.
+        """
+        ops = self.stack_ops(undo_stack, redo_stack)
+
+        def write_content(handle: TextIO) -> None:
+            self.write_ops(handle, ops)
+            handle.write(self._encode(('save', fingerprint)))
+
+        self.writer.write(self.path, write_content, encoding=self.ENCODING)
+        return len(ops)
+
+    def replay(
+        self, end: int, to_calculation: Callable[[Calculation], Calculation]
+    ) -> Tuple[List[HistoryDelta], List[HistoryDelta], int]:
+        """
+        Rebuild the undo and redo stacks from the first end bytes of the log.
+
+        Args:
+            end (int): Offset just past the save marker to replay up to.
+            to_calculation (Callable[[Calculation], Calculation]): Applied to each
+                decoded calculation, e.g. to intern its values.
+
+        Returns:
+            Tuple[List[HistoryDelta], List[HistoryDelta], int]: The undo stack,
+                the redo stack and the number of log entries replayed.
+        """
+        def decode(rows: List[List[str]]) -> Tuple[Calculation, ...]:
+            return tuple(to_calculation(Calculation.from_dict(dict(zip(HISTORY_COLUMNS, row)))) for row in rows)
+
+        undo_stack: List[HistoryDelta] = []
+        redo_stack: List[HistoryDelta] = []
+        count = 0
+        with open(self.path, 'rb') as handle:
+            data = handle.read(end)
+        for line in data.decode(self.ENCODING).splitlines():
+            entry = json.loads(line)
+            kind = entry[0]
+            if kind == 'p':
+                undo_stack.append(HistoryDelta(decode(entry[1]), decode(entry[2])))
+                redo_stack.clear()
+            elif kind in ('u', 'r'):
+                source, target = (undo_stack, redo_stack) if kind == 'u' else (redo_stack, undo_stack)
+                for _ in range(entry[1] if len(entry) > 1 else 1):
+                    target.append(source.pop())
+            else:
+                continue
+            count += 1
+        return undo_stack, redo_stack, count
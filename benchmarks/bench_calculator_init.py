@@ -0,0 +1,56 @@
+########################
+# Construction Bench   #
+########################
+#
+# Run from the project root: python -m benchmarks.bench_calculator_init
+#
+# Measures how many calculators can be created per second. The first
+# calculator for a directory pays for the one-time bootstrap (directories,
+# logging); later ones only build their in-memory state.
+
+from pathlib import Path
+import tempfile
+import timeit
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.session_manager import SessionManager
+
+INSTANCES = 2_000
+REPEAT = 5
+
+
+def _best(statement) -> float:
+    """Return the best time in seconds over REPEAT runs of statement."""
+    return min(timeit.repeat(statement, number=1, repeat=REPEAT))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base = Path(temp_dir)
+        config = CalculatorConfig(base_dir=base)
+        counter = iter(range(10 ** 9))
+
+        def bootstrapping() -> None:
+            # A fresh directory each time: every calculator bootstraps
+            for _ in range(INSTANCES // 10):
+                Calculator(CalculatorConfig(base_dir=base / str(next(counter))))
+
+        def repeated() -> None:
+            for _ in range(INSTANCES):
+                Calculator(config)
+
+        with SessionManager(config) as manager:
+            def sessions() -> None:
+                for _ in range(INSTANCES):
+                    Calculator(config, storage=manager.store.session("bench"), session="bench")
+
+            print(f"Creating calculators, best of {REPEAT} (instances/second)")
+            print(f"{'case':<28}{'rate':>12}")
+            print(f"{'bootstrap every time':<28}{INSTANCES // 10 / _best(bootstrapping):>12,.0f}")
+            print(f"{'same config':<28}{INSTANCES / _best(repeated):>12,.0f}")
+            print(f"{'session calculators':<28}{INSTANCES / _best(sessions):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+########################
+# History Write Bench  #
+########################
+#
+# Run from the project root: python -m benchmarks.bench_history_write
+#
+# Measures save latency for each fsync policy. Numbers depend heavily on the
+# disk: run it on the storage the history directory actually lives on.
+
+from decimal import Decimal
+from pathlib import Path
+import statistics
+import tempfile
+import time
+
+from app.calculation import Calculation
+from app.calculator_config import CalculatorConfig
+from app.history_storage import CsvHistoryStorage
+
+HISTORY_SIZE = 500
+SAVES = 50
+
+
+def main() -> None:
+    history = [
+        Calculation(operation="Addition", operand1=Decimal(i), operand2=Decimal(i + 1), result=Decimal(2 * i + 1))
+        for i in range(HISTORY_SIZE)
+    ]
+
+    print(f"Saving {HISTORY_SIZE} calculations {SAVES} times per policy (milliseconds)")
+    print(f"{'policy':<10}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>10}")
+    for policy in ('always', 'batched', 'never'):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = CalculatorConfig(base_dir=Path(temp_dir), fsync_policy=policy, fsync_batch_size=10)
+            config.history_dir.mkdir(parents=True, exist_ok=True)
+            storage = CsvHistoryStorage(config)
+            latencies = []
+            for _ in range(SAVES):
+                start = time.perf_counter()
+                storage.save(history)
+                latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{policy:<10}{statistics.mean(latencies):>10.2f}{statistics.median(latencies):>10.2f}"
+              f"{p99:>10.2f}{latencies[-1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+########################
+# Validator Benchmark  #
+########################
+#
+# Run from the project root: python -m benchmarks.bench_validators
+
+from decimal import Decimal
+import timeit
+
+from app.calculator_config import CalculatorConfig
+from app.input_validators import InputValidator
+
+SAMPLE_SIZE = 10_000
+REPEAT = 5
+
+
+def _best(statement) -> float:
+    """Return the best time in seconds over REPEAT runs of statement."""
+    return min(timeit.repeat(statement, number=1, repeat=REPEAT))
+
+
+def main() -> None:
+    config = CalculatorConfig(max_input_value=Decimal('1e100'))
+    validator = InputValidator(config)
+    inputs = {
+        'str': [str(i * 7 % 997) + '.25' for i in range(SAMPLE_SIZE)],
+        'int': [i * 7 % 997 for i in range(SAMPLE_SIZE)],
+        'Decimal': [Decimal(i * 7 % 997) / 4 for i in range(SAMPLE_SIZE)],
+    }
+
+    print(f"Validating {SAMPLE_SIZE} operands, best of {REPEAT} (operands/second)")
+    print(f"{'input':<10}{'validate_number':>18}{'validate':>14}{'validate_many':>16}")
+    for kind, values in inputs.items():
+        static = _best(lambda: [InputValidator.validate_number(v, config) for v in values])
+        bound = _best(lambda: [validator.validate(v) for v in values])
+        bulk = _best(lambda: validator.validate_many(values))
+        print(f"{kind:<10}{SAMPLE_SIZE / static:>18,.0f}{SAMPLE_SIZE / bound:>14,.0f}{SAMPLE_SIZE / bulk:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
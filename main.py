@@ -1,4 +1,12 @@
+import argparse
+
 from app.calculator_repl import calculator_repl
 
 if __name__ == "__main__":
-    calculator_repl()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Command-line calculator")
+    parser.add_argument(
+        '--profile', action='store_true',
+        help="profile the session with cProfile and tracemalloc; reports go to the log directory"
+    )
+    args = parser.parse_args()
+    calculator_repl(profile=args.profile)
\ No newline at end of file
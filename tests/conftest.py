@@ -0,0 +1,35 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Return a factory for configurations rooted in tmp_path unless base_dir is given."""
+    def make(**kwargs):
+        kwargs.setdefault('base_dir', tmp_path)
+        # Ignore path variables other test modules put in the environment
+        with patch.dict(os.environ, {}, clear=True):
+            return CalculatorConfig(**kwargs)
+    return make
+
+
+@pytest.fixture
+def config(make_config):
+    """A default configuration rooted in tmp_path."""
+    return make_config()
+
+
+@pytest.fixture
+def make_calculator(make_config):
+    """Return a factory for calculators rooted in tmp_path; load_history=True also loads the saved history."""
+    def make(load_history=False, **kwargs):
+        calc = Calculator(make_config(**kwargs))
+        if load_history:
+            calc.load_history()
+        return calc
+    return make
@@ -1,10 +1,12 @@
 import datetime
+import logging
 from pathlib import Path
 import pandas as pd
 import pytest
 from unittest.mock import Mock, patch, PropertyMock
 from decimal import Decimal
 from tempfile import TemporaryDirectory
+from app.calculation import Calculation
 from app.calculator import Calculator
 from app.calculator_repl import calculator_repl
 from app.calculator_config import CalculatorConfig
@@ -140,7 +142,7 @@ def test_load_history(mock_exists, mock_read_csv, calculator):
         assert calculator.history[0].operation == "Addition"
         assert calculator.history[0].operand1 == Decimal("2")
         assert calculator.history[0].operand2 == Decimal("3")
-        assert calculator.history[0].result == "5"
+        assert calculator.history[0].result == Decimal("5")
     except OperationError:
         pytest.fail("Loading history failed due to OperationError")
         
@@ -178,3 +180,140 @@ def test_calculator_repl_help(mock_print, mock_input):
 def test_calculator_repl_addition(mock_print, mock_input):
     calculator_repl()
     mock_print.assert_any_call("\n2 + 3 = 5")
+
+# Test Concurrent Access
+
+def test_perform_op_with_operation_argument(calculator):
+    result = calculator.perform_op(2, 3, OperationFactory.create_operation('*'))
+    assert result == Decimal('6')
+    assert calculator.operation_strategy is None
+    assert calculator.history[0].operation == "Multiplication"
+
+def test_concurrent_perform_undo_save(calculator):
+    import threading
+
+    operations = [OperationFactory.create_operation(op) for op in ('+', '-', '*')]
+    performed = []
+    undone = []
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def worker(index):
+        try:
+            barrier.wait()
+            for i in range(50):
+                calculator.perform_op(index, i, operations[i % len(operations)])
+                performed.append(1)
+                if i % 5 == 0 and calculator.undo():
+                    undone.append(1)
+                if i % 10 == 0:
+                    calculator.save_history()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Every calculation pushes one memento and every undo consumes one
+    assert len(calculator.history) == len(performed) - len(undone)
+    assert len(calculator.undo_stack) == len(performed) - len(undone)
+    assert len(calculator.redo_stack) <= len(undone)
+
+    # The saved file is always a complete, loadable snapshot
+    calculator.save_history()
+    saved = len(calculator.history)
+    calculator.load_history()
+    assert len(calculator.history) == saved
+
+# Test Result Formatting
+
+def test_results_stay_numeric_until_displayed(calculator):
+    calculator.perform_op(1, 8, OperationFactory.create_operation('per'))
+    calculator.perform_op(2, 3, OperationFactory.create_operation('+'))
+    first, second = calculator.history
+    assert first.result == Decimal('12.50')
+    assert second.result + 1 == Decimal('6')
+    assert calculator.show_history()[0].endswith("result:12.50%")
+    assert first.to_dict()['result'] == '12.50%'
+    assert calculator.get_history_dataframe()['result'].sum() == Decimal('17.50')
+
+def test_save_and_load_round_trip_keeps_results(calculator):
+    calculator.perform_op(1, 8, OperationFactory.create_operation('per'))
+    calculator.perform_op('0.1', '0.2', OperationFactory.create_operation('+'))
+    calculator.save_history()
+    calculator.clear_history()
+    calculator.load_history()
+    assert [calc.result for calc in calculator.history] == [Decimal('12.50'), Decimal('0.3')]
+    assert calculator.history[0].formatted_result == '12.50%'
+
+def test_history_dataframe_follows_history(calculator):
+    add = OperationFactory.create_operation('+')
+    for i in range(5):
+        calculator.perform_op(i, 1, add)
+    calculator.undo()
+    assert calculator.get_history_dataframe()['operand1'].tolist() == [Decimal(i) for i in range(4)]
+    calculator.clear_history()
+    assert calculator.get_history_dataframe().empty
+    # Assigning history directly is picked up as well
+    calculator.history = [Calculation("Addition", Decimal(1), Decimal(1), Decimal(2))]
+    assert calculator.get_history_dataframe()['result'].tolist() == [Decimal(2)]
+
+def test_find_uses_indexes(calculator):
+    add = OperationFactory.create_operation('+')
+    power = OperationFactory.create_operation('pow')
+    calculator.perform_op(2, 3, add)
+    calculator.perform_op(2, 3, power)
+    calculator.perform_op(4, 4, add)
+    assert [calc.result for calc in calculator.find(operation='pow')] == [Decimal(8)]
+    assert [calc.result for calc in calculator.find(operation='addition')] == [Decimal(5), Decimal(8)]
+    assert len(calculator.find(result='8')) == 2
+    assert calculator.find(operation='+', operand=2) == [calculator.history[0]]
+    assert calculator.find(limit=1) == [calculator.history[-1]]
+    calculator.undo()
+    assert calculator.find(result=8) == [calculator.history[1]]
+    with pytest.raises(ValidationError):
+        calculator.find(result='abc')
+
+def test_reduction_is_one_calculation(calculator):
+    values = [Decimal(n) / 10 for n in range(1, 5001)]
+    total = calculator.perform_reduction(values, OperationFactory.create_operation('sum'))
+    assert total == Decimal('1250250.0')
+    assert calculator.perform_reduction(['2', 4, 9.5], OperationFactory.create_operation('max')) == Decimal('9.5')
+    assert len(calculator.history) == 2
+    assert calculator.history[0].operation == 'Sum'
+    assert calculator.history[0].count == 5000
+    assert calculator.history[0].operand1 is None
+    assert calculator.show_history()[0] == 'Sum of 5000 values\tresult:1250250.0'
+    # reductions have no operands to match
+    assert calculator.find(operand=0) == []
+    calculator.undo()
+    assert [calc.operation for calc in calculator.history] == ['Sum']
+
+def test_reduction_errors(calculator):
+    with pytest.raises(ValidationError):
+        calculator.perform_reduction([], OperationFactory.create_operation('mean'))
+    with pytest.raises(ValidationError):
+        calculator.perform_reduction([1, 'x'], OperationFactory.create_operation('sum'))
+    with pytest.raises(OperationError, match="cannot reduce"):
+        calculator.perform_reduction([1, 2, 3], OperationFactory.create_operation('+'))
+    assert calculator.history == []
+
+def test_construction_bootstraps_once(tmp_path, make_config):
+    config = make_config(base_dir=tmp_path / "one")
+    other = make_config(base_dir=tmp_path / "two")
+    Calculator(config)
+    assert config.log_dir.is_dir() and config.history_dir.is_dir()
+    with patch('app.calculator.logging.basicConfig') as basic_config, \
+         patch.object(Path, 'mkdir') as mkdir:
+        Calculator(config)
+    basic_config.assert_not_called()
+    mkdir.assert_not_called()
+
+    # Another log file switches logging over once
+    Calculator(other)
+    handlers = logging.getLogger().handlers
+    assert [h.baseFilename for h in handlers if isinstance(h, logging.FileHandler)] == [str(other.log_file)]
@@ -1,3 +1,4 @@
+import dataclasses
 import unittest
 import os
 from unittest.mock import patch, MagicMock
@@ -129,5 +130,46 @@ class TestCalculatorConfig(unittest.TestCase):
         with patch.dict(os.environ, {'CALCULATOR_AUTO_SAVE': 'true'}, clear=True):
             self.assertFalse(CalculatorConfig(auto_save=False).auto_save)
 
+    @patch.dict(os.environ, {'CALCULATOR_LOG_DIR': '/env/logs'}, clear=True)
+    def test_paths_resolved_once(self):
+        """Test that path properties read the snapshot instead of the environment."""
+        config = CalculatorConfig(base_dir=Path('/base'))
+        with patch('app.calculator_config.os.getenv') as mock_getenv, \
+             patch('app.calculator_config.Path.resolve') as mock_resolve:
+            for _ in range(3):
+                self.assertEqual(config.log_dir, Path('/env/logs'))
+                self.assertEqual(config.history_file, Path('/base/history/calculator_history.csv'))
+            mock_getenv.assert_not_called()
+            mock_resolve.assert_not_called()
+
+    def test_snapshot_is_immutable(self):
+        """Test that the resolved snapshot cannot be modified or extended."""
+        config = CalculatorConfig(base_dir=Path('/base'))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            config.snapshot.history_dir = Path('/elsewhere')
+        self.assertFalse(hasattr(config.snapshot, '__dict__'))
+        self.assertFalse(hasattr(config, '__dict__'))
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_paths_follow_base_dir(self):
+        """Test that assigning base_dir re-resolves the derived paths."""
+        config = CalculatorConfig(base_dir=Path('/base'))
+        config.base_dir = Path('/moved')
+        self.assertEqual(config.history_file, Path('/moved/history/calculator_history.csv'))
+        self.assertEqual(config.log_dir, Path('/moved/logs'))
+        self.assertEqual(config.plugin_dir, Path('/moved/plugins'))
+
+    def test_reload_picks_up_environment_changes(self):
+        """Test that reload() re-reads the environment but keeps explicit arguments."""
+        with patch.dict(os.environ, {'CALCULATOR_HISTORY_DIR': '/first'}, clear=True):
+            config = CalculatorConfig(base_dir=Path('/base'), max_history_size=7)
+        self.assertEqual(config.history_dir, Path('/first'))
+        with patch.dict(os.environ, {'CALCULATOR_HISTORY_DIR': '/second',
+                                     'CALCULATOR_MAX_HISTORY_SIZE': '99'}, clear=True):
+            config.reload()
+        self.assertEqual(config.history_dir, Path('/second'))
+        self.assertEqual(config.history_file, Path('/second/calculator_history.csv'))
+        self.assertEqual(config.max_history_size, 7)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -72,7 +72,7 @@ class TestCalculatorMemento(unittest.TestCase):
         self.assertIsInstance(restored_calc_1, Calculation)
         self.assertEqual(restored_calc_1.operation, 'Addition')
         self.assertEqual(restored_calc_1.operand1, Decimal('10'))
-        self.assertEqual(restored_calc_1.result, '15')
+        self.assertEqual(restored_calc_1.result, Decimal('15'))
         
         # Compare the full state using to_dict for comprehensive check
         self.assertEqual(restored_calc_1.to_dict(), CALC_ADD.to_dict())
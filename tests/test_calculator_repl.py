@@ -3,9 +3,17 @@ from unittest.mock import patch, MagicMock, ANY
 from decimal import Decimal
 import io
 import logging
+import os
+from pathlib import Path
+import tempfile
 
 # Adjust imports based on your actual project structure
-from app.calculator_repl import calculator_repl
+from app.calculator import Calculator
+from app.calculator_config import CalculatorConfig
+from app.calculator_repl import (
+    HISTORY_TAIL, calculator_repl, show_history_window, show_search_results, split_input, write_page
+)
+from app.opeartions import OperationFactory
 from app.exceptions import ValidationError, OperationError
 # Import observer classes for mocking
 from app.history import AutoSaveObserver, LoggingObserver 
@@ -203,6 +211,25 @@ class TestCalculatorREPL(unittest.TestCase):
         MockCalculator.return_value.save_history.assert_called()
 
 
+    @patch('app.calculator_repl.Calculator')
+    @patch('builtins.input', side_effect=['undo 5', 'redo 2', 'checkpoint base', 'restore base', 'restore gone', 'exit'])
+    def test_repl_multi_step_undo_and_checkpoints(self, mock_input, MockCalculator):
+        """Test undo/redo with a count and the checkpoint commands."""
+        mock_calc = MockCalculator.return_value
+        mock_calc.undo_steps.return_value = 5
+        mock_calc.redo_steps.return_value = 0
+        mock_calc.restore.side_effect = [3, OperationError("Unknown checkpoint: gone")]
+
+        calculator_repl()
+
+        mock_calc.undo_steps.assert_called_once_with(5)
+        mock_calc.redo_steps.assert_called_once_with(2)
+        mock_calc.checkpoint.assert_called_once_with('base')
+        self.assert_output_contains("5 operations undone")
+        self.assert_output_contains("Nothing to redo")
+        self.assert_output_contains("Restored checkpoint base (3 operations)")
+        self.assert_output_contains("Unknown checkpoint: gone")
+
     @patch('app.calculator_repl.OperationFactory')
     @patch('app.calculator_repl.Calculator')
     @patch('builtins.input', side_effect=['clear', 'history', 'exit'])
@@ -309,4 +336,82 @@ class TestCalculatorREPL(unittest.TestCase):
         self.assert_output_contains("Error: Error in history access")
         
         # FIX 4: Check for the prompt string "Enter command: " (appears twice: initial, and after error)
-        self.assert_output_contains("Enter command: ", count=2)
\ No newline at end of file
+        self.assert_output_contains("Enter command: ", count=2)
+
+class TestHistoryCommand(unittest.TestCase):
+    """history [n] / history tail / history page <k> against a real calculator."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        with patch.dict(os.environ, {}, clear=True):
+            config = CalculatorConfig(base_dir=Path(self.temp_dir.name))
+        self.calc = Calculator(config)
+        operation = OperationFactory.create_operation('+')
+        for i in range(45):
+            self.calc.perform_op(i, 1, operation)
+        self.stdout_patch = patch('sys.stdout', new_callable=io.StringIO)
+        self.mock_stdout = self.stdout_patch.start()
+
+    def tearDown(self):
+        self.stdout_patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_split_history_arguments(self):
+        self.assertEqual(split_input('history'), ['history'])
+        self.assertEqual(split_input('History 5'), ['history', '5'])
+        self.assertEqual(split_input('history tail'), ['history', 'tail'])
+        self.assertEqual(split_input('history page 2'), ['history', 'page', '2'])
+        with self.assertRaises(ValueError):
+            split_input('history page')
+
+    def test_history_count(self):
+        show_history_window(self.calc, ['3'])
+        output = self.mock_stdout.getvalue()
+        self.assertIn("last 3 of 45", output)
+        self.assertEqual(output.count("\tAddition\t"), 3)
+        self.assertIn("44\tAddition\t1\tresult:45", output)
+
+    def test_history_page(self):
+        show_history_window(self.calc, ['page', '3'])
+        output = self.mock_stdout.getvalue()
+        self.assertIn("page 3 of 3", output)
+        self.assertEqual(output.count("\tAddition\t"), 5)
+        show_history_window(self.calc, ['page', '4'])
+        self.assertIn("Page 4 out of range (1-3)", self.mock_stdout.getvalue())
+
+    def test_history_formats_only_the_window(self):
+        with patch.object(Calculator, 'format_history_entry', wraps=Calculator.format_history_entry) as spy:
+            show_history_window(self.calc, ['tail'])
+        self.assertEqual(spy.call_count, HISTORY_TAIL)
+
+    def test_history_writes_once_per_page(self):
+        with patch('app.calculator_repl.write_page', wraps=write_page) as spy:
+            show_history_window(self.calc, [])
+        # 45 entries in pages of 20; output is not a terminal, so no pauses
+        self.assertEqual(spy.call_count, 3)
+        self.assertEqual(self.mock_stdout.getvalue().count("\tAddition\t"), 45)
+
+    def test_split_word_operators(self):
+        # Plugin operators need no change to the parser
+        self.assertEqual(split_input('8 log 2'), ['8', 'log', '2'])
+        self.assertEqual(split_input('3 HYPOT 4 ='), ['3', 'hypot', '4'])
+
+    def test_split_reductions(self):
+        self.assertEqual(split_input('sum 1 2 3'), ['reduce', 'sum', '1', '2', '3'])
+        self.assertEqual(split_input('Mean 4, -5.5, 6'), ['reduce', 'mean', '4', '-5.5', '6'])
+        # Commands with a count keep their meaning
+        self.assertEqual(split_input('undo 3'), ['undo', '3'])
+
+    def test_split_search_arguments(self):
+        self.assertEqual(split_input('search pow'), ['search', 'pow'])
+        self.assertEqual(split_input('search op=+ result=8'), ['search', 'op=+', 'result=8'])
+
+    def test_search(self):
+        show_search_results(self.calc, ['op=+', 'operand=41'])
+        output = self.mock_stdout.getvalue()
+        self.assertIn("1 matching calculations", output)
+        self.assertIn("41\tAddition\t1\tresult:42", output)
+        show_search_results(self.calc, ['result=100'])
+        self.assertIn("No matching calculations", self.mock_stdout.getvalue())
+        show_search_results(self.calc, ['colour=red'])
+        self.assertIn("Unknown search criterion: colour=red", self.mock_stdout.getvalue())
@@ -0,0 +1,139 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import pytest
+
+from app.calculator_server import CalculatorServer
+
+
+async def _exchange(reader, writer, lines):
+    # Send every request before reading any response to exercise pipelining
+    writer.write(''.join(line + '\n' for line in lines).encode())
+    await writer.drain()
+    responses = [(await reader.readline()).decode().strip() for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def test_tcp_server_pipelines_requests_in_order(make_calculator):
+    calculator = make_calculator()
+
+    async def scenario():
+        server = CalculatorServer(calculator)
+        listener = await server.start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = await _exchange(reader, writer, ['1 + 2', '2 pow 10', '9 root 2', 'oops', '5 / 0', 'undo'])
+        await server.close()
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert responses[0] == 'OK 3'
+    assert responses[1] == 'OK 1024'
+    assert responses[2] == 'OK 3.0'
+    assert responses[3].startswith('ERR Invalid input')
+    assert responses[4] == 'ERR Division by zero is not allowed'
+    assert responses[5] == 'OK undone'
+    assert len(calculator.history) == 2
+
+
+def test_pipelined_requests_run_in_order(make_calculator):
+    calculator = make_calculator()
+
+    class SlowExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            def slow():
+                time.sleep(0.05)
+                return fn(*args, **kwargs)
+            return super().submit(slow)
+
+    async def scenario():
+        server = CalculatorServer(calculator, executor=SlowExecutor())
+        listener = await server.start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        # 'pow' goes to the executor; 'undo' must still wait for it
+        responses = await _exchange(reader, writer, ['1 + 1', '2 pow 8', 'undo'])
+        await server.close()
+        return responses
+
+    assert asyncio.run(scenario()) == ['OK 2', 'OK 256', 'OK undone']
+    assert [calc.operation for calc in calculator.history] == ['Addition']
+
+
+def test_server_evaluates_reductions(make_calculator):
+    calculator = make_calculator()
+    server = CalculatorServer(calculator)
+    with patch.object(server.executor, 'submit', wraps=server.executor.submit) as submit:
+        assert asyncio.run(server.evaluate('sum 1, 2, 3.5')) == 'OK 6.5'
+        assert asyncio.run(server.evaluate('product 2 3 4')) == 'OK 24'
+    # reductions run in the executor, not on the event loop
+    assert submit.call_count == 2
+    assert asyncio.run(server.evaluate('gcd 4 6 8')).startswith('ERR')
+    assert len(calculator.history) == 2
+
+
+def test_server_handles_many_concurrent_clients(make_calculator):
+    calculator = make_calculator()
+
+    async def client(port, index):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        return await _exchange(reader, writer, [f'{index} * 2', f'{index} - 1'])
+
+    async def scenario():
+        server = CalculatorServer(calculator)
+        listener = await server.start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        results = await asyncio.gather(*(client(port, i) for i in range(50)))
+        await server.close()
+        return results
+
+    results = asyncio.run(scenario())
+    for index, responses in enumerate(results):
+        assert [Decimal(response[3:]) for response in responses] == [index * 2, index - 1]
+    assert len(calculator.history) == 100
+
+
+@pytest.mark.skipif(not hasattr(asyncio, 'start_unix_server'), reason="Unix sockets unavailable")
+def test_unix_server_and_exit_command(make_calculator):
+    calculator = make_calculator()
+
+    async def scenario(path):
+        server = CalculatorServer(calculator)
+        await server.start_unix(path)
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b'4 abs 10\nexit\n1 + 1\n')
+        await writer.drain()
+        first = (await reader.readline()).decode().strip()
+        rest = await reader.read()
+        writer.close()
+        await server.close()
+        return first, rest
+
+    with TemporaryDirectory() as temp_dir:
+        first, rest = asyncio.run(scenario(os.path.join(temp_dir, 'calc.sock')))
+    assert first == 'OK 6'
+    # The connection closes after 'exit', later requests are never evaluated
+    assert rest == b''
+    assert len(calculator.history) == 1
+
+
+def test_oversized_request_is_rejected_and_pipeline_continues(make_calculator):
+    calculator = make_calculator()
+
+    async def scenario():
+        server = CalculatorServer(calculator, max_request_bytes=1024)
+        listener = await server.start_tcp()
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = await _exchange(reader, writer, ['1 + 1', 'sum ' + '1 ' * 5000, '2 + 2'])
+        await server.close()
+        return responses
+
+    assert asyncio.run(scenario()) == ['OK 2', 'ERR Request longer than 1024 bytes', 'OK 4']
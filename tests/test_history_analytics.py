@@ -0,0 +1,121 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.calculation import Calculation
+from app.history_analytics import HistoryAnalytics, RunningStats
+from app.opeartions import OperationFactory
+
+START = datetime.datetime(2025, 1, 1, 12, 0, 0)
+
+
+def _calc(operation, a, b, result, seconds=0):
+    return Calculation(operation=operation, operand1=Decimal(a), operand2=Decimal(b), result=Decimal(result),
+                       timestamp=START + datetime.timedelta(seconds=seconds))
+
+
+# Test cases for RunningStats
+
+def test_running_stats_exact_for_small_streams():
+    stats = RunningStats()
+    for value in [5, 1, 4, 2, 3]:
+        stats.add(Decimal(value))
+    assert (stats.count, stats.total, stats.minimum, stats.maximum) == (5, Decimal(15), Decimal(1), Decimal(5))
+    assert stats.mean == Decimal(3)
+    assert stats.percentile(50) == Decimal(3)
+    assert stats.percentile(100) == Decimal(5)
+    assert stats.percentile(0) == Decimal(1)
+
+def test_running_stats_remove():
+    stats = RunningStats()
+    for value in [5, 1, 4, 1]:
+        stats.add(Decimal(value))
+    stats.remove(Decimal(1))
+    stats.remove(Decimal(5))
+    assert (stats.count, stats.total, stats.minimum, stats.maximum) == (2, Decimal(5), Decimal(1), Decimal(4))
+    assert stats.percentile(100) == Decimal(4)
+    with pytest.raises(ValueError):
+        stats.remove(Decimal(7))
+
+def test_running_stats_empty():
+    stats = RunningStats()
+    assert stats.mean is None
+    assert stats.percentile(50) is None
+    with pytest.raises(ValueError):
+        stats.percentile(101)
+
+
+# Test cases for HistoryAnalytics
+
+def test_aggregates_by_operation():
+    analytics = HistoryAnalytics.from_history([
+        _calc("Addition", 1, 2, 3),
+        _calc("Addition", 3, 4, 7),
+        _calc("Power", 2, 3, 8),
+    ])
+    assert analytics.operations() == ["Addition", "Power"]
+    addition = analytics.by_operation("Addition")
+    assert addition.count == 2
+    assert addition.result.mean == Decimal(5)
+    assert addition.operand2.maximum == Decimal(4)
+    assert analytics.totals.result.total == Decimal(18)
+    assert analytics.by_operation("Division") is None
+    summary = analytics.summary()
+    assert summary['operations']['Power']['result']['p50'] == Decimal(8)
+    assert summary['total']['count'] == 3
+
+def test_counts_per_time_bucket():
+    analytics = HistoryAnalytics()
+    for seconds in [0, 10, 59, 60, 130]:
+        analytics.add(_calc("Power", 2, 2, 4, seconds))
+    analytics.add(_calc("Addition", 1, 1, 2, 61))
+    minute = datetime.timedelta(minutes=1)
+    assert analytics.by_bucket("Power") == [(START, 3), (START + minute, 1), (START + 2 * minute, 1)]
+    assert analytics.by_bucket() == [(START, 3), (START + minute, 2), (START + 2 * minute, 1)]
+    assert analytics.bucket(START + datetime.timedelta(seconds=75), "Addition").result.total == Decimal(2)
+
+def test_removed_calculations_leave_every_aggregate():
+    first = _calc("Addition", 1, 2, 3)
+    analytics = HistoryAnalytics.from_history([first, _calc("Power", 2, 3, 8, 90)])
+    analytics.remove(first)
+    assert analytics.operations() == ["Power"]
+    assert analytics.by_bucket() == [(START + datetime.timedelta(minutes=1), 1)]
+    assert analytics.totals.result.total == Decimal(8)
+    assert analytics.bucket(START, "Addition") is None
+
+def test_calculator_analytics_follow_the_history(make_calculator):
+    calc = make_calculator(max_history_size=2)
+    power = OperationFactory.create_operation('pow')
+    calc.perform_op(2, 10, power)
+    analytics = calc.analytics()
+    assert analytics.by_operation("Power").result.maximum == Decimal(1024)
+    calc.perform_op(2, 3, power)
+    calc.perform_op(2, 2, power)
+    # the first calculation was evicted
+    assert analytics.by_operation("Power").result.maximum == Decimal(8)
+    assert calc.undo()
+    assert analytics.by_operation("Power").result.maximum == Decimal(1024)
+    assert analytics.totals.count == 2
+    assert calc.redo()
+    assert analytics.summary()['total']['result']['sum'] == Decimal(12)
+    calc.clear_history()
+    assert calc.analytics().operations() == []
+    calc.perform_op(1, 1, OperationFactory.create_operation('+'))
+    assert calc.analytics().operations() == ["Addition"]
+
+def test_calculator_analytics_rebuilt_after_direct_replacement(make_calculator):
+    calc = make_calculator()
+    add = OperationFactory.create_operation('+')
+    calc.perform_op(1, 1, add)
+    calc.perform_op(2, 2, add)
+    analytics = calc.analytics()
+    assert calc.undo()
+    calc.perform_op(3, 3, add)
+    assert analytics.matches(calc.history)
+    assert analytics.totals.result.total == Decimal(8)
+    # same length, different last entry
+    calc.history[-1] = _calc("Power", 2, 3, 8, 0)
+    assert not analytics.matches(calc.history)
+    assert calc.analytics().operations() == ["Addition", "Power"]
+    assert calc.analytics().totals.result.total == Decimal(10)
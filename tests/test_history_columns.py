@@ -0,0 +1,58 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.calculation import Calculation
+from app.history_columns import HistoryColumns
+
+
+def _calcs(count, start=0):
+    return [
+        Calculation(operation="Addition", operand1=Decimal(i), operand2=Decimal(1), result=Decimal(i + 1),
+                    timestamp=datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=i))
+        for i in range(start, start + count)
+    ]
+
+
+# Test cases for HistoryColumns
+
+def test_dataframe_matches_history():
+    history = _calcs(3)
+    df = HistoryColumns(history).to_dataframe()
+    assert list(df.columns) == ['operation', 'operand1', 'operand2', 'result', 'timestamp', 'count']
+    assert df['result'].tolist() == [Decimal(1), Decimal(2), Decimal(3)]
+    assert df['result'].sum() == Decimal(6)
+    assert df['timestamp'].dtype == np.dtype('datetime64[us]')
+    assert df['timestamp'].iloc[2] == pd.Timestamp(history[2].timestamp)
+
+def test_dataframe_shares_buffers():
+    columns = HistoryColumns(_calcs(3))
+    df = columns.to_dataframe()
+    assert np.shares_memory(df['operand1'].to_numpy(), columns._columns['operand1'])
+    with pytest.raises(ValueError):
+        df.loc[0, 'operation'] = "Changed"
+
+def test_growth_and_trimming_keep_old_frames_intact():
+    columns = HistoryColumns()
+    for calc in _calcs(10):
+        columns.append(calc)
+    before = columns.to_dataframe()
+    for calc in _calcs(200, start=10):
+        columns.append(calc)
+        columns.pop_front()
+    after = columns.to_dataframe()
+    assert len(columns) == 10
+    assert after['operand1'].tolist() == [Decimal(i) for i in range(200, 210)]
+    assert before['operand1'].tolist() == [Decimal(i) for i in range(10)]
+
+def test_matches_detects_replaced_history():
+    history = _calcs(3)
+    columns = HistoryColumns(history)
+    assert columns.matches(history)
+    assert not columns.matches(history[:2])
+    assert not columns.matches(_calcs(3))
+    assert HistoryColumns().matches([])
+
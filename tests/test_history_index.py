@@ -0,0 +1,82 @@
+import datetime
+from decimal import Decimal
+
+from app.calculation import Calculation
+from app.history_index import HistoryIndex
+
+START = datetime.datetime(2025, 1, 1)
+OPERATIONS = ["Addition", "Power", "Division"]
+
+
+def _calcs(count, start=0):
+    return [
+        Calculation(operation=OPERATIONS[i % 3], operand1=Decimal(i % 5), operand2=Decimal(2),
+                    result=Decimal(i % 7), timestamp=START + datetime.timedelta(seconds=i))
+        for i in range(start, start + count)
+    ]
+
+
+def _scan(history, operation=None, operand=None, result=None, since=None, until=None):
+    return [
+        position for position, calc in enumerate(history)
+        if (operation is None or calc.operation == operation)
+        and (operand is None or operand in (calc.operand1, calc.operand2))
+        and (result is None or calc.result == result)
+        and (since is None or calc.timestamp >= since)
+        and (until is None or calc.timestamp <= until)
+    ]
+
+
+# Test cases for HistoryIndex
+
+def test_positions_match_a_full_scan():
+    history = _calcs(100)
+    index = HistoryIndex(history)
+    queries = [
+        {},
+        {'operation': "Power"},
+        {'operand': Decimal(3)},
+        {'operand': Decimal(2), 'result': Decimal(4)},
+        {'operation': "Addition", 'result': Decimal(0)},
+        {'since': START + datetime.timedelta(seconds=10), 'until': START + datetime.timedelta(seconds=20)},
+        {'operation': "Division", 'since': START + datetime.timedelta(seconds=50)},
+        {'operation': "Modulus"},
+    ]
+    for query in queries:
+        assert index.positions(**query) == _scan(history, **query), query
+
+def test_eviction_shifts_positions():
+    history = _calcs(10)
+    index = HistoryIndex(history)
+    for calc in _calcs(5, start=10):
+        history.append(calc)
+        history.pop(0)
+        index.append(calc)
+        index.pop_front()
+    assert len(index) == 10
+    assert index.positions(operation="Power") == _scan(history, operation="Power")
+    assert index.positions(until=START + datetime.timedelta(seconds=7)) == [0, 1, 2]
+
+def test_compaction_keeps_results(monkeypatch):
+    monkeypatch.setattr('app.history_index.COMPACT_AFTER', 4)
+    history = _calcs(6)
+    index = HistoryIndex(history)
+    for calc in _calcs(20, start=6):
+        history.append(calc)
+        history.pop(0)
+        index.append(calc)
+        index.pop_front()
+    assert all(seq >= index._first for seqs in index._by_operation.values() for seq in seqs)
+    assert index.positions(result=Decimal(3)) == _scan(history, result=Decimal(3))
+
+def test_pop_last_and_append_follow_undo_and_redo():
+    history = _calcs(5)
+    index = HistoryIndex(history)
+    with_undo = history[:-1]
+    index.pop_last()
+    assert index._next == 4  # popped, not rebuilt
+    assert index.positions(operation="Addition") == _scan(with_undo, operation="Addition")
+    index.append(history[-1])
+    assert index.positions(result=Decimal(4)) == [4]
+    assert index.matches(history)
+    assert not index.matches(_calcs(5))
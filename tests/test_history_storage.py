@@ -0,0 +1,437 @@
+import datetime
+import json
+import os
+import sqlite3
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.calculation import Calculation
+from app.calculator_config import CalculatorConfig
+from app.compression import Codec, compress_file, detect_codec, get_codec, open_text
+from app.exceptions import ConfigurationError, OperationError
+from app.history_storage import (
+    AtomicFileWriter, CsvHistoryStorage, DictionaryHistoryStorage, SegmentedHistoryStorage,
+    SqliteHistoryStorage, SqliteHistoryStore, create_history_storage, sibling_path
+)
+from app.opeartions import OperationFactory
+from app.undo_log import UndoLog
+
+CALCS = [
+    Calculation(operation="Addition", operand1=Decimal('2'), operand2=Decimal('3'), result=Decimal('5'),
+                timestamp=datetime.datetime(2025, 1, 1, 10, 0, 0)),
+    Calculation(operation="Percentage", operand1=Decimal('1'), operand2=Decimal('8'), result=Decimal('12.50'),
+                timestamp=datetime.datetime(2025, 1, 1, 10, 0, 1)),
+]
+
+
+# Test cases for AtomicFileWriter
+
+def test_atomic_write_replaces_file(tmp_path):
+    target = tmp_path / "data.txt"
+    target.write_text("old")
+    AtomicFileWriter('never').write(target, lambda handle: handle.write("new"))
+    assert target.read_text() == "new"
+    assert os.listdir(tmp_path) == ["data.txt"]
+
+def test_atomic_write_failure_keeps_old_file(tmp_path):
+    target = tmp_path / "data.txt"
+    target.write_text("old")
+
+    def crash(handle):
+        handle.write("partial")
+        raise RuntimeError("crash mid-write")
+
+    with pytest.raises(RuntimeError):
+        AtomicFileWriter('always').write(target, crash)
+    assert target.read_text() == "old"
+    # The temporary file is cleaned up
+    assert os.listdir(tmp_path) == ["data.txt"]
+
+def test_atomic_write_preserves_permissions(tmp_path):
+    target = tmp_path / "data.txt"
+    target.write_text("old")
+    os.chmod(target, 0o640)
+    AtomicFileWriter('never').write(target, lambda handle: handle.write("new"))
+    assert os.stat(target).st_mode & 0o777 == 0o640
+
+def test_atomic_write_recreates_missing_directory(tmp_path):
+    target = tmp_path / "missing" / "data.txt"
+    AtomicFileWriter('never').write(target, lambda handle: handle.write("new"))
+    assert target.read_text() == "new"
+
+@pytest.mark.parametrize("policy, writes, expected_fsyncs", [
+    ('always', 3, 6),   # file + directory on every write
+    ('batched', 5, 2),  # one file + directory sync after the 4th write
+    ('never', 3, 0),
+])
+def test_fsync_policy(tmp_path, policy, writes, expected_fsyncs):
+    writer = AtomicFileWriter(policy, batch_size=4)
+    with patch('app.history_storage.os.fsync') as mock_fsync:
+        for i in range(writes):
+            writer.write(tmp_path / "data.txt", lambda handle: handle.write(str(i)))
+    assert mock_fsync.call_count == expected_fsyncs
+
+
+# Test cases for CsvHistoryStorage
+
+def test_csv_storage_round_trip(make_config):
+    storage = CsvHistoryStorage(make_config())
+    assert storage.load() is None
+    storage.save(CALCS)
+    loaded = storage.load()
+    assert loaded == CALCS
+    assert loaded[1].formatted_result == '12.50%'
+    assert loaded[0].timestamp == CALCS[0].timestamp
+
+def test_csv_storage_empty_history(make_config):
+    storage = CsvHistoryStorage(make_config())
+    storage.save([])
+    assert storage.load() == []
+
+
+# Test cases for fsync configuration
+
+def test_fsync_policy_from_environment(tmp_path):
+    with patch.dict(os.environ, {'CALCULATOR_FSYNC_POLICY': 'Batched', 'CALCULATOR_FSYNC_BATCH_SIZE': '25'}):
+        config = CalculatorConfig(base_dir=tmp_path)
+    assert config.fsync_policy == 'batched'
+    assert config.fsync_batch_size == 25
+
+def test_invalid_fsync_policy(tmp_path):
+    with pytest.raises(ConfigurationError, match="fsync_policy must be one of"):
+        CalculatorConfig(base_dir=tmp_path, fsync_policy='sometimes').validate()
+
+
+# Test cases for compressed history
+
+@pytest.mark.parametrize("codec, suffix, magic", [
+    ('gzip', '.gz', b'\x1f\x8b'),
+    ('bz2', '.bz2', b'BZh'),
+    ('xz', '.xz', b'\xfd7zXZ'),
+])
+def test_compressed_round_trip(codec, suffix, magic, make_config):
+    storage = CsvHistoryStorage(make_config(history_compression=codec))
+    storage.save(CALCS * 200)
+    assert storage.path.name == 'calculator_history.csv' + suffix
+    assert storage.path.read_bytes().startswith(magic)
+    assert storage.load() == CALCS * 200
+
+def test_compression_shrinks_repetitive_history(make_config):
+    plain = CsvHistoryStorage(make_config())
+    packed = CsvHistoryStorage(make_config(history_compression='gzip'))
+    plain.save(CALCS * 500)
+    plain_size = plain.path.stat().st_size
+    packed.save(CALCS * 500)
+    assert packed.path.stat().st_size * 10 < plain_size
+
+def test_compressed_file_detected_without_configuration(make_config):
+    CsvHistoryStorage(make_config(history_compression='xz')).save(CALCS)
+    # A storage configured without compression still finds and reads the archive
+    assert CsvHistoryStorage(make_config()).load() == CALCS
+
+@pytest.mark.parametrize("storage_class, history_storage", [
+    (CsvHistoryStorage, 'csv'), (DictionaryHistoryStorage, 'dictionary')
+])
+def test_switching_codec_back_loads_latest_save(make_config, storage_class, history_storage):
+    storage_class(make_config(history_storage=history_storage, history_compression='gzip')).save(CALCS)
+    plain = storage_class(make_config(history_storage=history_storage))
+    plain.save(CALCS[:1])
+    gzipped = storage_class(make_config(history_storage=history_storage, history_compression='gzip'))
+    assert gzipped.load() == CALCS[:1]
+    gzipped.save(CALCS)
+    assert not plain.path.exists()
+    assert plain.load() == CALCS
+
+def test_detection_uses_content_not_suffix(make_config):
+    storage = CsvHistoryStorage(make_config(history_compression='gzip'))
+    storage.save(CALCS)
+    storage.path.rename(storage.config.history_file)
+    assert CsvHistoryStorage(make_config()).load() == CALCS
+
+def test_compress_file_archive(tmp_path):
+    source = tmp_path / "segment.csv"
+    source.write_text("a,b\n1,2\n")
+    target = tmp_path / "segment.csv.bz2"
+    compress_file(source, target, get_codec('bz2'))
+    assert detect_codec(target).name == 'bz2'
+    with open_text(target) as handle:
+        assert handle.read() == "a,b\n1,2\n"
+
+def test_unavailable_codec_rejected(make_config):
+    unavailable = Codec('fake', '.fake', b'FAKE', None)
+    with patch.dict('app.compression.CODECS', {'fake': unavailable}):
+        with pytest.raises(ConfigurationError, match="not installed"):
+            CsvHistoryStorage(make_config(history_compression='fake'))
+
+
+# Test cases for SegmentedHistoryStorage
+
+def _calcs(count, start=0):
+    return [
+        Calculation(operation="Addition", operand1=Decimal(i), operand2=Decimal(1), result=Decimal(i + 1),
+                    timestamp=datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=i))
+        for i in range(start, start + count)
+    ]
+
+def _segmented(make_config, **kwargs):
+    kwargs.setdefault('max_history_size', 1000)
+    return SegmentedHistoryStorage(make_config(history_storage='segmented', **kwargs))
+
+def _manifest(storage):
+    return json.loads(storage.manifest_path.read_text())
+
+def test_segmented_appends_only_new_records(make_config):
+    storage = _segmented(make_config)
+    assert storage.load() is None
+    history = _calcs(2)
+    storage.save(history)
+    history.append(_calcs(1, start=2)[0])
+    with patch.object(SegmentedHistoryStorage, '_seal') as mock_seal:
+        storage.save(history)
+    mock_seal.assert_not_called()
+    segments = _manifest(storage)['segments']
+    assert [entry['records'] for entry in segments] == [3]
+    assert _segmented(make_config).load() == history
+
+def test_segmented_rolls_over_by_records(make_config):
+    storage = _segmented(make_config, segment_max_records=3)
+    history = _calcs(10)
+    storage.save(history)
+    assert [entry['records'] for entry in _manifest(storage)['segments']] == [3, 3, 3, 1]
+
+    reader = _segmented(make_config, segment_max_records=3, max_history_size=4)
+    with patch.object(SegmentedHistoryStorage, '_read_segment', wraps=reader._read_segment) as spy:
+        loaded = reader.load()
+    # Only the two newest segments are read to fill four records
+    assert spy.call_count == 2
+    assert loaded == history[-4:]
+
+def test_segmented_rolls_over_by_bytes(make_config):
+    storage = _segmented(make_config, segment_max_bytes=200)
+    storage.save(_calcs(20))
+    segments = _manifest(storage)['segments']
+    assert len(segments) > 1
+    assert all(entry['bytes'] < 200 + 100 for entry in segments)
+    assert sum(entry['records'] for entry in segments) == 20
+
+def test_segmented_rewrite_starts_new_generation(make_config):
+    storage = _segmented(make_config)
+    history = _calcs(3)
+    storage.save(history)
+    # Undo: the last saved calculation is gone from the history
+    storage.save(history[:2])
+    manifest = _manifest(storage)
+    assert manifest['generation_start'] == 2
+    assert len(manifest['segments']) == 2
+    assert _segmented(make_config).load() == history[:2]
+
+def test_segmented_retention(make_config):
+    storage = _segmented(make_config, segment_max_records=2, segment_retention=3, max_history_size=4)
+    storage.save(_calcs(20))
+    segments = _manifest(storage)['segments']
+    assert [entry['id'] for entry in segments] == [8, 9, 10]
+    assert sorted(os.listdir(storage.directory)) == [
+        'manifest.json', 'segment-000008.csv', 'segment-000008.idx', 'segment-000009.csv',
+        'segment-000009.idx', 'segment-000010.csv', 'segment-000010.idx'
+    ]
+    assert _segmented(make_config, segment_max_records=2, max_history_size=4).load() == _calcs(20)[-4:]
+
+def test_segmented_compresses_sealed_segments(make_config):
+    storage = _segmented(make_config, segment_max_records=5, history_compression='gzip')
+    history = _calcs(12)
+    storage.save(history)
+    names = [entry['name'] for entry in _manifest(storage)['segments']]
+    assert names == ['segment-000001.csv.gz', 'segment-000002.csv.gz', 'segment-000003.csv']
+    assert _segmented(make_config, history_compression='gzip').load() == history
+
+def test_segmented_crash_before_manifest_keeps_history_loadable(make_config):
+    storage = _segmented(make_config, segment_max_records=5, segment_retention=1, history_compression='gzip')
+    history = _calcs(4)
+    storage.save(history)
+    history += _calcs(8, start=4)
+    with patch.object(SegmentedHistoryStorage, '_write_manifest', side_effect=OSError("crash")):
+        with pytest.raises(OSError):
+            storage.save(history)
+    # The old manifest still lists the plain segment, which must still be there
+    assert _segmented(make_config, history_compression='gzip').load() == history[:4]
+
+def test_segmented_ignores_interrupted_append(make_config):
+    storage = _segmented(make_config)
+    history = _calcs(2)
+    storage.save(history)
+    segment = storage.directory / _manifest(storage)['segments'][0]['name']
+    with open(segment, 'a') as handle:
+        handle.write("Addition,9,9,18,2025-01-0")  # torn write, never recorded
+    assert _segmented(make_config).load() == history
+
+    history.extend(_calcs(1, start=2))
+    storage.save(history)
+    assert _segmented(make_config).load() == history
+
+def test_calculator_uses_segmented_storage(make_config, make_calculator):
+    calc = make_calculator(history_storage='segmented', segment_max_records=2)
+    assert isinstance(calc.storage, SegmentedHistoryStorage)
+    for i in range(5):
+        calc.perform_op(i, 1, OperationFactory.create_operation('+'))
+        calc.save_history()
+    restored = make_calculator(history_storage='segmented', segment_max_records=2)
+    restored.load_history()
+    assert restored.history == calc.history
+
+
+# Test cases for DictionaryHistoryStorage
+
+def _repetitive(count):
+    return [
+        Calculation(operation=["Addition", "Power"][i % 2], operand1=Decimal(i % 3), operand2=Decimal(2),
+                    result=Decimal(i % 3) + 2 if i % 2 == 0 else Decimal(i % 3) ** 2,
+                    timestamp=datetime.datetime(2025, 1, 1) + datetime.timedelta(milliseconds=137 * i))
+        for i in range(count)
+    ]
+
+def test_dictionary_round_trip(make_config):
+    storage = DictionaryHistoryStorage(make_config(history_storage='dictionary'))
+    assert storage.load() is None
+    history = _repetitive(50) + CALCS
+    storage.save(history)
+    assert storage.path.name == 'calculator_history.dict.json'
+    loaded = storage.load()
+    assert loaded == history
+    assert [calc.timestamp for calc in loaded] == [calc.timestamp for calc in history]
+    assert loaded[-1].formatted_result == '12.50%'
+    # Equal values come back as one shared object
+    assert loaded[0].operand2 is loaded[1].operand2
+    data = json.loads(storage.path.read_text())
+    assert data['operations'] == ["Addition", "Power", "Percentage"]
+
+def test_dictionary_storage_is_smaller_than_csv(make_config):
+    history = _repetitive(1000)
+    csv_storage = CsvHistoryStorage(make_config())
+    dict_storage = DictionaryHistoryStorage(make_config(history_storage='dictionary'))
+    csv_storage.save(history)
+    dict_storage.save(history)
+    assert dict_storage.path.stat().st_size * 2 < csv_storage.path.stat().st_size
+
+def test_dictionary_storage_compressed(make_config):
+    storage = DictionaryHistoryStorage(make_config(history_storage='dictionary', history_compression='gzip'))
+    storage.save(CALCS)
+    assert storage.path.name == 'calculator_history.dict.json.gz'
+    assert DictionaryHistoryStorage(make_config(history_storage='dictionary')).load() == CALCS
+
+def test_dictionary_storage_empty_and_invalid(make_config):
+    storage = DictionaryHistoryStorage(make_config(history_storage='dictionary'))
+    storage.save([])
+    assert storage.load() == []
+    storage.path.write_text('{"format": "something-else"}')
+    with pytest.raises(OperationError, match="Unsupported"):
+        storage.load()
+
+def test_calculator_uses_dictionary_storage(make_config, make_calculator):
+    calc = make_calculator(history_storage='dictionary')
+    assert isinstance(calc.storage, DictionaryHistoryStorage)
+    calc.perform_op(2, 3, OperationFactory.create_operation('+'))
+    calc.save_history()
+    restored = make_calculator(history_storage='dictionary')
+    restored.load_history()
+    assert restored.history == calc.history
+
+
+# Test cases for SqliteHistoryStore
+
+def test_sqlite_sessions_round_trip(tmp_path):
+    store = SqliteHistoryStore(tmp_path / "histories.sqlite3", fsync_policy='never')
+    try:
+        assert store.session("one").load() is None
+        store.session("one").save(CALCS)
+        store.session("two").save([])
+        loaded = store.session("one").load()
+        assert [c.to_dict() for c in loaded] == [c.to_dict() for c in CALCS]
+        assert store.session("two").load() == []
+        store.session("one").save(CALCS[:1])
+        assert len(store.session("one").load()) == 1
+        assert store.session_ids() == ["one", "two"]
+    finally:
+        store.close()
+
+def test_sqlite_storage_from_config(make_config):
+    storage = create_history_storage(make_config(history_storage='sqlite'))
+    assert isinstance(storage, SqliteHistoryStorage)
+    storage.save(CALCS)
+    assert storage.store.path.name == "calculator_history.sqlite3"
+    storage.store.close()
+
+def test_sibling_files_use_history_stem(tmp_path):
+    history_file = tmp_path / "calc.v2.csv"
+    with patch.dict(os.environ, {'CALCULATOR_HISTORY_FILE': str(history_file)}):
+        config = CalculatorConfig(base_dir=tmp_path)
+    assert SegmentedHistoryStorage(config).directory.name == "calc.v2_segments"
+    assert DictionaryHistoryStorage(config).base_path.name == "calc.v2.dict.json"
+    store = SqliteHistoryStore.for_config(config)
+    assert store.path.name == "calc.v2.sqlite3"
+    store.close()
+    assert UndoLog(config, AtomicFileWriter()).path.name == "calc.v2.undo.jsonl"
+    assert sibling_path(history_file, "-s1.csv").name == "calc.v2-s1.csv"
+
+
+# Test cases for reductions in every storage
+
+REDUCTION = Calculation(operation="Sum", operand1=None, operand2=None, result=Decimal('10'),
+                        timestamp=datetime.datetime(2025, 1, 1, 10, 0, 2), count=4)
+
+@pytest.mark.parametrize("history_storage", ['csv', 'segmented', 'dictionary', 'sqlite'])
+def test_reduction_round_trip(history_storage, make_config):
+    history = CALCS + [REDUCTION]
+    storage = create_history_storage(make_config(history_storage=history_storage))
+    storage.save(history)
+    loaded = create_history_storage(make_config(history_storage=history_storage)).load()
+    assert loaded == history
+    assert (loaded[-1].count, loaded[-1].operand1, loaded[-1].operand2) == (4, None, None)
+    assert loaded[0].count is None
+
+def test_csv_without_count_column_loads(config):
+    config.history_file.parent.mkdir(parents=True, exist_ok=True)
+    config.history_file.write_text(
+        "operation,operand1,operand2,result,timestamp\n"
+        "Addition,2,3,5,2025-01-01T10:00:00\n"
+    )
+    assert CsvHistoryStorage(config).load() == CALCS[:1]
+
+def test_segmented_does_not_append_to_old_segments(make_config):
+    storage = _segmented(make_config)
+    storage.save(_calcs(2))
+    manifest = _manifest(storage)
+    del manifest['segments'][0]['columns']
+    segment = storage.directory / manifest['segments'][0]['name']
+    lines = segment.read_text().splitlines()
+    segment.write_text("\n".join(line.rsplit(',', 1)[0] for line in lines) + "\n")
+    manifest['segments'][0]['bytes'] = segment.stat().st_size
+    storage.manifest_path.write_text(json.dumps(manifest))
+
+    reader = _segmented(make_config)
+    history = reader.load() + [REDUCTION]
+    reader.save(history)
+    assert [entry['records'] for entry in _manifest(reader)['segments']] == [2, 1]
+    assert _segmented(make_config).load() == history
+
+def test_sqlite_adds_count_to_old_databases(tmp_path):
+    path = tmp_path / "old.sqlite3"
+    connection = sqlite3.connect(str(path))
+    connection.executescript(
+        "CREATE TABLE sessions (session TEXT PRIMARY KEY);"
+        "CREATE TABLE calculations (session TEXT NOT NULL, seq INTEGER NOT NULL, operation TEXT NOT NULL,"
+        " operand1 TEXT NOT NULL, operand2 TEXT NOT NULL, result TEXT NOT NULL, timestamp TEXT NOT NULL,"
+        " PRIMARY KEY (session, seq));"
+        "INSERT INTO sessions VALUES ('one');"
+        "INSERT INTO calculations VALUES ('one', 0, 'Addition', '2', '3', '5', '2025-01-01T10:00:00');"
+    )
+    connection.commit()
+    connection.close()
+    store = SqliteHistoryStore(path, fsync_policy='never')
+    try:
+        assert store.session("one").load() == CALCS[:1]
+        store.session("one").save([REDUCTION])
+        assert store.session("one").load() == [REDUCTION]
+    finally:
+        store.close()
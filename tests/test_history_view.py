@@ -0,0 +1,99 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+
+from app.calculation import Calculation
+from app.calculator_repl import show_history_window
+from app.history_storage import SegmentedHistoryStorage
+from app.history_view import MmapHistoryView
+from app.opeartions import OperationFactory
+from app.repl_output import TerminalWriter
+
+
+def _calcs(count, start=0):
+    return [
+        Calculation(operation="Addition", operand1=Decimal(i), operand2=Decimal(1), result=Decimal(i + 1),
+                    timestamp=datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=i))
+        for i in range(start, start + count)
+    ]
+
+def _saved_in_steps(storage, history, step, max_history_size):
+    # Save the way a calculator does: its in-memory history is capped, so the
+    # deep history only exists in the segments
+    for end in range(step, len(history) + 1, step):
+        storage.save(history[max(0, end - max_history_size):end])
+    return history[-max_history_size:]
+
+
+# Test cases for MmapHistoryView
+
+@pytest.mark.parametrize("compression", ['none', 'gzip'])
+def test_view_reaches_history_beyond_memory(make_config, compression):
+    config = make_config(history_storage='segmented', max_history_size=10, segment_max_records=4,
+                         history_compression=compression)
+    storage = SegmentedHistoryStorage(config)
+    history = _calcs(30)
+    in_memory = _saved_in_steps(storage, history, 5, 10)
+    with storage.open_view(in_memory) as view:
+        assert len(view) == view.saved == 30
+        assert view[0] == history[0]
+        assert view[-1] == history[-1]
+        assert view[7:13] == history[7:13]
+        assert view.tail(3) == history[-3:]
+        with pytest.raises(IndexError):
+            view[30]
+
+def test_view_without_offset_index_scans_segments(make_config):
+    storage = SegmentedHistoryStorage(make_config(history_storage='segmented', max_history_size=10,
+                                                  segment_max_records=4))
+    history = _calcs(20)
+    in_memory = _saved_in_steps(storage, history, 5, 10)
+    for index in storage.directory.glob("*.idx"):
+        index.unlink()
+    with storage.open_view(in_memory) as view:
+        assert list(view) == history
+
+def test_view_continues_with_unsaved_calculations(make_config):
+    storage = SegmentedHistoryStorage(make_config(history_storage='segmented', max_history_size=10))
+    history = _calcs(12)
+    in_memory = _saved_in_steps(storage, history, 6, 10)
+    in_memory = in_memory[2:] + _calcs(2, start=12)
+    with storage.open_view(in_memory) as view:
+        assert len(view) == 14
+        assert view.saved == 12
+        assert list(view) == history + _calcs(2, start=12)
+
+def test_no_view_after_history_diverges(make_config):
+    storage = SegmentedHistoryStorage(make_config(history_storage='segmented'))
+    storage.save(_calcs(3))
+    assert storage.open_view(_calcs(2)) is None
+
+def test_history_command_pages_through_saved_history(make_calculator):
+    calc = make_calculator(history_storage='segmented', max_history_size=5, segment_max_records=3)
+    add = OperationFactory.create_operation('+')
+    for a in range(12):
+        calc.perform_op(a, 1, add)
+        calc.save_history()
+    calc.perform_op(21, 1, add)
+    view = calc.open_history_view()
+    assert isinstance(view, MmapHistoryView)
+    assert len(view) == 13
+    view.close()
+
+    stream = io.StringIO()
+    out = TerminalWriter(stream)
+    show_history_window(calc, ['page', '1'], out)
+    out.flush()
+    lines = stream.getvalue().splitlines()
+    assert lines[1] == "Calculation History (page 1 of 1):"
+    assert lines[2] == "0\tAddition\t1\tresult:1"
+    assert lines[-1] == "21\tAddition\t1\tresult:22"
+    assert len(lines) == 15
+
+def test_csv_storage_has_no_view(make_calculator):
+    calc = make_calculator()
+    calc.perform_op(1, 1, OperationFactory.create_operation('+'))
+    calc.save_history()
+    assert calc.open_history_view() is None
@@ -0,0 +1,50 @@
+import datetime
+from decimal import Decimal
+
+from app.calculation import Calculation
+from app.interning import ValueInterner
+from app.opeartions import OperationFactory
+
+
+# Test cases for ValueInterner
+
+def test_equal_values_are_shared():
+    interner = ValueInterner()
+    first = interner.intern(Decimal('2.5'))
+    second = interner.intern(Decimal('2.5'))
+    assert first is second
+    assert len(interner) == 1
+
+def test_representation_is_preserved():
+    interner = ValueInterner()
+    two = interner.intern(Decimal('2'))
+    two_point_zero = interner.intern(Decimal('2.0'))
+    assert str(two) == '2'
+    assert str(two_point_zero) == '2.0'
+    assert interner.intern(Decimal('2.0')) is two_point_zero
+    assert interner.intern(Decimal('2')) is two
+
+def test_max_values_bounds_memory():
+    interner = ValueInterner(max_values=2)
+    for value in range(10):
+        interner.intern(Decimal(value))
+    assert len(interner) == 2
+    assert interner.intern(Decimal(9)) == Decimal(9)
+
+def test_intern_history_shares_fields():
+    history = [
+        Calculation("Addition", Decimal('2'), Decimal('3'), Decimal('5'), datetime.datetime(2025, 1, 1))
+        for _ in range(3)
+    ]
+    history = ValueInterner().intern_history(history)
+    assert history[0].operand1 is history[2].operand1
+    assert history[1].result is history[2].result
+
+def test_calculator_interns_operands(make_calculator):
+    calc = make_calculator()
+    add = OperationFactory.create_operation('+')
+    calc.perform_op('2', '3', add)
+    calc.perform_op(2, 3, add)
+    first, second = calc.history
+    assert first.operand1 is second.operand1
+    assert first.result is second.result
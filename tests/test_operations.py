@@ -1,9 +1,12 @@
+import sys
 import pytest
 from decimal import Decimal
+from importlib.metadata import EntryPoint
 from app.opeartions import (
-    OperationFactory, Addition, Subtraction, Multiplication, Division,
-    Modulus, Int_Division, Power, Root, Percentage, AbsDiff
+    PLUGIN_ENTRY_POINT_GROUP, OperationFactory, Addition, Subtraction, Multiplication, Division,
+    Modulus, Int_Division, Power, Root, Percentage, AbsDiff, ReductionOperation
 )
+from app.calculator import Calculator
 # 假设您的自定义异常在 app/exceptions.py 中定义
 from app.exceptions import ValidationError, UnknownOperationError, OperationError
 
@@ -41,9 +44,9 @@ def test_basic_operations(operation_class, a, b, expected_result):
     """测试基本的加减乘除、模、整除和幂运算。"""
     op = operation_class()
     result = op.execute(a, b)
-    # 确保结果是字符串，且数值正确
-    assert isinstance(result, str)
-    assert result == expected_result
+    # 结果保持为 Decimal，格式化后数值正确
+    assert isinstance(result, Decimal)
+    assert op.format_result(result) == expected_result
 
 
 # --------------------------------------------------------------------------
@@ -68,20 +71,20 @@ def test_abs_diff():
     """测试 AbsDiff (绝对差) 操作。"""
     op = AbsDiff()
     # a > b
-    assert op.execute(D('10'), D('4')) == '6'
+    assert op.execute(D('10'), D('4')) == D('6')
     # a < b
-    assert op.execute(D('4'), D('10')) == '6'
+    assert op.execute(D('4'), D('10')) == D('6')
     # a = b
-    assert op.execute(D('5'), D('5')) == '0'
+    assert op.execute(D('5'), D('5')) == D('0')
 
 def test_percentage():
     """测试 Percentage (百分比) 操作。"""
     op = Percentage()
     # 10 / 50 * 100 = 20.00%
-    assert op.execute(D('10'), D('50')) == '20.00%'
+    assert op.format_result(op.execute(D('10'), D('50'))) == '20.00%'
     # 1 / 3 * 100 = 33.333... -> 量化为 33.33%
     # 注意：这里依赖于 Decimal('1.00') 的量化行为
-    assert op.execute(D('1'), D('3')) == '33.33%'
+    assert op.format_result(op.execute(D('1'), D('3'))) == '33.33%'
     # 除零
     with pytest.raises(ValidationError):
         op.execute(D('10'), D('0'))
@@ -94,11 +97,11 @@ def test_root_valid_calculations():
     """测试有效的开根号计算。"""
     op = Root()
     # 平方根 (4 ** (1/2))
-    assert op.execute(D('4'), D('2')) == '2.0'
+    assert op.format_result(op.execute(D('4'), D('2'))) == '2.0'
     # 立方根 (8 ** (1/3))
-    assert op.execute(D('8'), D('3')) == '2.0'
+    assert op.format_result(op.execute(D('8'), D('3'))) == '2.0'
     # 负数的奇数根 (-8 ** (1/3) = -2)
-    assert op.execute(D('-8'), D('3')) == '-2.0'
+    assert op.format_result(op.execute(D('-8'), D('3'))) == '-2.0'
 
 def test_root_validation_errors():
     """测试开根号的验证错误。"""
@@ -128,7 +131,7 @@ def test_factory_create_valid_operation():
     # 测试加法
     op = OperationFactory.create_operation('+')
     assert isinstance(op, Addition)
-    assert op.execute(D('1'), D('2')) == '3'
+    assert op.execute(D('1'), D('2')) == D('3')
     
     # 测试乘法
     op = OperationFactory.create_operation('*')
@@ -184,4 +187,147 @@ def test_operation_str_representation():
     assert str(op) == 'Addition'
     
     op = Root()
-    assert str(op) == 'Root'
\ No newline at end of file
+    assert str(op) == 'Root'
+def test_factory_returns_shared_instances():
+    """测试工厂为同一操作符返回同一个共享实例。"""
+    assert OperationFactory.create_operation('pow') is OperationFactory.create_operation('pow')
+    assert OperationFactory.create_operation('pow').name == 'Power'
+
+def test_factory_dispatch_table(plugin_registry):
+    """测试操作符到 execute 的直接分发表。"""
+    table = OperationFactory.get_dispatch_table()
+    assert table['+'](D('1'), D('2')) == D('3')
+    assert table['div'](D('7'), D('2')) == D('3')
+
+    class Triple(Addition):
+        def execute(self, a, b):
+            return a * 3
+
+    OperationFactory.register_operation('triple', Triple)
+    assert OperationFactory.get_dispatch_table()['triple'](D('2'), D('0')) == D('6')
+    assert OperationFactory.create_operation('triple').name == 'Triple'
+
+def test_factory_format_result_by_name():
+    """测试按显示名称格式化结果。"""
+    assert OperationFactory.format_result('Percentage', D('12.50')) == '12.50%'
+    assert OperationFactory.format_result('Addition', D('3')) == '3'
+    assert OperationFactory.format_result('NotRegistered', D('1.5')) == '1.5'
+
+# --------------------------------------------------------------------------
+# 多元归约运算 (N-ary Reductions)
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("symbol, values, expected", [
+    ('sum', [D('0.1')] * 10, D('1.0')),
+    ('mean', [D('1'), D('2'), D('4')], D('7') / 3),
+    ('min', [D('3'), D('-2.5'), D('7')], D('-2.5')),
+    ('max', [D('3'), D('-2.5'), D('7')], D('7')),
+    ('product', [D('1.5'), D('2'), D('-3')], D('-9.0')),
+])
+def test_reductions(symbol, values, expected):
+    """测试归约运算一次处理整个序列，且没有浮点误差。"""
+    operation = OperationFactory.create_operation(symbol)
+    assert isinstance(operation, ReductionOperation)
+    assert operation.reduce(values) == expected
+
+def test_reduction_as_binary_operation():
+    """测试归约运算作为二元运算时归约两个操作数。"""
+    assert OperationFactory.create_operation('max').execute(D('2'), D('5')) == D('5')
+    assert OperationFactory.create_operation('mean').execute(D('2'), D('5')) == D('3.5')
+
+def test_reduction_needs_values():
+    with pytest.raises(ValidationError, match="Minimum needs at least one value"):
+        OperationFactory.create_operation('min').reduce([])
+
+
+# --------------------------------------------------------------------------
+# 插件操作：按名称注册，首次使用时才导入 (Plugin Operations)
+# --------------------------------------------------------------------------
+
+@pytest.fixture
+def plugin_registry(monkeypatch):
+    """隔离每个测试对工厂注册表的修改。"""
+    monkeypatch.setattr(OperationFactory, '_operations', dict(OperationFactory._operations))
+    monkeypatch.setattr(OperationFactory, '_lazy', dict(OperationFactory._lazy))
+    monkeypatch.setattr(OperationFactory, '_instances', {})
+    monkeypatch.setattr(OperationFactory, '_dispatch', None)
+    monkeypatch.setattr(OperationFactory, '_by_name', None)
+    monkeypatch.setattr(OperationFactory, '_entry_points_scanned', True)
+
+@pytest.mark.parametrize("symbol, a, b, expected", [
+    ('log', D('1000'), D('10'), D('3')),
+    ('gcd', D('12'), D('18'), D('6')),
+    ('hypot', D('3'), D('4'), D('5')),
+])
+def test_builtin_plugins(plugin_registry, symbol, a, b, expected):
+    """测试随附的插件操作。"""
+    assert symbol in OperationFactory.symbols()
+    assert OperationFactory.create_operation(symbol).execute(a, b) == expected
+
+def test_plugin_validation(plugin_registry):
+    with pytest.raises(ValidationError):
+        OperationFactory.create_operation('log').execute(D('-1'), D('2'))
+    with pytest.raises(ValidationError):
+        OperationFactory.create_operation('gcd').execute(D('1.5'), D('2'))
+
+def test_plugin_imported_on_first_use(plugin_registry, monkeypatch):
+    """测试插件模块直到第一次使用才被导入。"""
+    monkeypatch.delitem(sys.modules, 'app.plugins.hypot', raising=False)
+    OperationFactory.register_lazy_operation('hypot', 'app.plugins.hypot:Hypotenuse')
+    assert 'hypot' in OperationFactory.symbols()
+    assert OperationFactory.resolve_name('+') == 'Addition'
+    assert 'app.plugins.hypot' not in sys.modules
+
+    assert OperationFactory.resolve_name('hypot') == 'Hypotenuse'
+    assert 'app.plugins.hypot' in sys.modules
+    assert OperationFactory.symbols().count('hypot') == 1
+
+def test_resolve_plugin_by_name(plugin_registry, monkeypatch):
+    """测试未使用过的插件也能按显示名称解析。"""
+    monkeypatch.delitem(sys.modules, 'app.plugins.log', raising=False)
+    assert OperationFactory.resolve_name('logarithm') == 'Logarithm'
+    assert OperationFactory.resolve_name('Hypotenuse') == 'Hypotenuse'
+    with pytest.raises(UnknownOperationError):
+        OperationFactory.resolve_name('Cosine')
+
+def test_plugins_directory(plugin_registry, tmp_path):
+    """测试插件目录：文件名即操作符，模块定义 OPERATION。"""
+    (tmp_path / "twice.py").write_text(
+        "from app.opeartions import Operation\n"
+        "class Twice(Operation):\n"
+        "    def execute(self, a, b):\n"
+        "        return (a + b) * 2\n"
+        "OPERATION = Twice\n"
+    )
+    # Plugins cannot shadow existing operators
+    (tmp_path / "pow.py").write_text("raise RuntimeError('must not be imported')\n")
+
+    assert OperationFactory.discover_plugins(tmp_path) == ['twice']
+    assert OperationFactory.create_operation('twice').execute(D('1'), D('2')) == D('6')
+    assert OperationFactory.create_operation('pow').name == 'Power'
+
+def test_broken_plugin(plugin_registry, tmp_path):
+    (tmp_path / "broken.py").write_text("OPERATION = int\n")
+    OperationFactory.discover_plugins(tmp_path)
+    with pytest.raises(OperationError, match="Failed to load operation 'broken'"):
+        OperationFactory.create_operation('broken')
+
+def test_entry_point_plugins(plugin_registry, monkeypatch, config):
+    """测试通过 entry points 发布的操作在首次需要时才被发现。"""
+    entry_point = EntryPoint('half', 'app.opeartions:Division', PLUGIN_ENTRY_POINT_GROUP)
+    lookups = []
+
+    def fake_entry_points(group):
+        lookups.append(group)
+        return [entry_point]
+
+    monkeypatch.setattr('app.opeartions.entry_points', fake_entry_points)
+    monkeypatch.setattr(OperationFactory, '_entry_points_scanned', False)
+    # Startup only scans the plugins directory
+    Calculator.setup_environment(config)
+    assert OperationFactory.create_operation('+').name == 'Addition'
+    assert lookups == []
+
+    assert OperationFactory.create_operation('half').execute(D('1'), D('2')) == D('0.5')
+    OperationFactory.symbols()
+    assert lookups == [PLUGIN_ENTRY_POINT_GROUP]
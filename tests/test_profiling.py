@@ -0,0 +1,69 @@
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from app.calculator_repl import calculator_repl, split_input
+from app.exceptions import OperationError
+from app.opeartions import OperationFactory
+from app.profiling import SessionProfiler
+
+
+def test_dump_after_stop_reports_calculator_activity(tmp_path, make_calculator):
+    calc = make_calculator()
+    profiler = SessionProfiler(tmp_path / "profiles", top=10)
+    profiler.start()
+    for a in range(50):
+        calc.perform_op(a, 2, OperationFactory.create_operation('pow'))
+    calc.get_history_dataframe()
+    profiler.stop()
+    assert not tracemalloc.is_tracing()
+
+    stats_path, report_path = profiler.dump()
+    assert stats_path.parent == tmp_path / "profiles"
+    assert stats_path.stat().st_size > 0
+    report = report_path.read_text(encoding='utf-8')
+    assert "perform_op" in report
+    assert "allocation sites" in report
+
+def test_dump_while_running(tmp_path):
+    profiler = SessionProfiler(tmp_path)
+    profiler.start()
+    try:
+        sum(range(1000))
+        _, report_path = profiler.dump()
+        assert profiler.active
+        assert report_path.exists()
+    finally:
+        profiler.stop()
+
+def test_misuse_raises(tmp_path):
+    profiler = SessionProfiler(tmp_path)
+    with pytest.raises(OperationError):
+        profiler.dump()
+    with pytest.raises(OperationError):
+        profiler.stop()
+    profiler.start()
+    try:
+        with pytest.raises(OperationError):
+            profiler.start()
+    finally:
+        profiler.stop()
+
+@pytest.mark.parametrize("ending", [EOFError, KeyboardInterrupt])
+def test_session_profile_written_without_exit(ending, make_calculator):
+    calc = make_calculator()
+    with patch('app.calculator_repl.Calculator', return_value=calc), \
+         patch('builtins.input', side_effect=['1 + 2', ending]):
+        try:
+            calculator_repl(profile=True)
+        except KeyboardInterrupt:
+            pass
+    assert len(list(calc.config.log_dir.glob("profile-*.pstats"))) == 1
+    assert not tracemalloc.is_tracing()
+
+def test_profile_commands_are_parsed():
+    assert split_input("profile start") == ['profile', 'start']
+    assert split_input("PROFILE dump") == ['profile', 'dump']
+    with pytest.raises(ValueError):
+        split_input("profile now")
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.calculator_repl import completion_words
+from app.opeartions import OperationFactory
+from app import repl_input
+from app.repl_input import ReplInput
+
+
+def _all(completer, text):
+    matches = []
+    while (match := completer.complete(text, len(matches))) is not None:
+        matches.append(match)
+    return matches
+
+
+def test_completes_commands_and_operators():
+    completer = ReplInput(None, completion_words)
+    assert _all(completer, "re") == ["redo", "restore"]
+    assert _all(completer, "po") == ["pow"]
+    assert _all(completer, "HIS") == ["history"]
+    assert _all(completer, "zzz") == []
+
+def test_completion_sees_registered_operators():
+    words = set(completion_words())
+    assert set(OperationFactory.symbols()) <= words
+    assert {"undo", "checkpoint", "profile"} <= words
+
+def test_not_installed_without_terminal(tmp_path):
+    completer = ReplInput(tmp_path / "input_history", completion_words)
+    with patch('sys.stdin') as stdin:
+        stdin.isatty.return_value = False
+        assert not completer.install()
+    completer.close()
+    assert not (tmp_path / "input_history").exists()
+
+@pytest.mark.skipif(repl_input.readline is None, reason="readline is not available")
+def test_history_file_round_trip(tmp_path):
+    history_file = tmp_path / "history" / "input_history"
+    completer = ReplInput(history_file, completion_words)
+    with patch('sys.stdin') as stdin, patch.object(repl_input.readline, 'parse_and_bind'):
+        stdin.isatty.return_value = True
+        assert completer.install()
+    repl_input.readline.clear_history()
+    repl_input.readline.add_history("2 pow 10")
+    completer.close()
+    assert history_file.exists()
+
+    repl_input.readline.clear_history()
+    with patch('sys.stdin') as stdin, patch.object(repl_input.readline, 'parse_and_bind'):
+        stdin.isatty.return_value = True
+        ReplInput(history_file, completion_words).install()
+    assert repl_input.readline.get_history_item(1) == "2 pow 10"
+    repl_input.readline.clear_history()
@@ -0,0 +1,73 @@
+import io
+from unittest.mock import patch
+
+from colorama import Fore, Style
+
+from app.repl_output import CLEAR_SCREEN, FLUSH_THRESHOLD, TerminalWriter, writer_for
+
+
+class _Terminal(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def isatty(self):
+        return True
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_plain_when_not_a_terminal():
+    stream = io.StringIO()
+    out = TerminalWriter(stream)
+    out.write('success', "saved")
+    out.lines('entry', ["a", "b"])
+    assert stream.getvalue() == ""  # nothing until flushed
+    out.flush()
+    assert stream.getvalue() == "saved\na\nb\n"
+
+def test_colors_on_a_terminal_with_one_write_per_flush():
+    stream = _Terminal()
+    out = TerminalWriter(stream)
+    out.write('error', "bad input")
+    out.write('plain', "x")
+    out.flush()
+    assert stream.getvalue() == f"{Fore.RED}bad input{Style.RESET_ALL}\nx\n"
+    assert stream.writes == 1
+
+def test_color_can_be_forced():
+    stream = io.StringIO()
+    out = TerminalWriter(stream, color=True)
+    out.write('success', "ok")
+    out.flush()
+    assert stream.getvalue().startswith(Fore.GREEN)
+
+def test_clear_screen_only_on_a_terminal():
+    stream = _Terminal()
+    out = TerminalWriter(stream)
+    out.clear_screen()
+    out.write('plain', "x")
+    out.flush()
+    assert stream.getvalue() == f"{CLEAR_SCREEN}x\n"
+    piped = io.StringIO()
+    out = TerminalWriter(piped)
+    out.clear_screen()
+    out.flush()
+    assert piped.getvalue() == ""
+
+def test_large_output_is_flushed_early():
+    stream = io.StringIO()
+    out = TerminalWriter(stream)
+    out.lines('entry', ("x" * 99 for _ in range(FLUSH_THRESHOLD // 100 + 1)))
+    assert len(stream.getvalue()) >= FLUSH_THRESHOLD
+
+def test_writer_for_defaults_to_stdout():
+    with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+        with writer_for(None) as out:
+            out.write('heading', "title")
+        assert stdout.getvalue() == "title\n"
+        shared = TerminalWriter()
+        with writer_for(shared) as out:
+            assert out is shared
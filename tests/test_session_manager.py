@@ -0,0 +1,48 @@
+import pytest
+
+from app.exceptions import OperationError
+from app.opeartions import OperationFactory
+from app.session_manager import SessionManager
+
+
+def test_sessions_keep_separate_histories(config):
+    with SessionManager(config) as manager:
+        alice, bob = manager.session("alice"), manager.session("bob")
+        assert manager.session("alice") is alice
+        alice.perform_op(2, 3, OperationFactory.create_operation('+'))
+        bob.perform_op(2, 3, OperationFactory.create_operation('*'))
+        bob.perform_op(2, 2, OperationFactory.create_operation('*'))
+        assert [c.operation for c in alice.history] == ["Addition"]
+        assert len(bob.history) == 2
+        assert manager.sessions() == ["alice", "bob"]
+
+    with SessionManager(config) as manager:
+        assert manager.store.session_ids() == ["alice", "bob"]
+        bob = manager.session("bob")
+        assert [c.result for c in bob.history] == [6, 4]
+        # Undo history is kept per session as well
+        assert bob.undo()
+        assert len(bob.history) == 1
+        assert manager.session("carol").history == []
+
+def test_sessions_share_one_database(tmp_path, config):
+    with SessionManager(config) as manager:
+        manager.session("a").perform_op(1, 1, OperationFactory.create_operation('+'))
+        manager.session("b").perform_op(1, 1, OperationFactory.create_operation('+'))
+        assert manager.session("a").storage.store is manager.session("b").storage.store
+    history_dir = tmp_path / "history"
+    assert (history_dir / "calculator_history.sqlite3").exists()
+    assert not (history_dir / "calculator_history.csv").exists()
+    assert (history_dir / "calculator_history-a.undo.jsonl").exists()
+
+def test_close_without_saving(config):
+    with SessionManager(config) as manager:
+        manager.session("temp").perform_op(1, 1, OperationFactory.create_operation('+'))
+        manager.close("temp", save=False)
+        assert manager.sessions() == []
+        assert manager.session("temp").history == []
+
+def test_invalid_session_id(config):
+    with SessionManager(config) as manager:
+        with pytest.raises(OperationError):
+            manager.session("../escape")
@@ -0,0 +1,205 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.calculation import Calculation
+from app.calculator_memento import HistoryDelta
+from app.exceptions import OperationError
+from app.history_storage import AtomicFileWriter
+from app.opeartions import OperationFactory
+from app.undo_log import UndoLog, history_fingerprint
+
+
+def _calc(a, b, seconds=0):
+    return Calculation(operation="Addition", operand1=Decimal(a), operand2=Decimal(b), result=Decimal(a + b),
+                       timestamp=datetime.datetime(2025, 1, 1, 10, 0, seconds))
+
+
+# Test cases for HistoryDelta
+
+def test_delta_apply_and_revert():
+    old, a, b = _calc(1, 1), _calc(2, 2), _calc(3, 3)
+    history = [old, a]
+    delta = HistoryDelta((old,), (b,))
+    delta.apply(history)
+    assert history == [a, b]
+    delta.revert(history)
+    assert history == [old, a]
+
+
+# Test cases for UndoLog
+
+def test_log_replays_stacks(config):
+    log = UndoLog(config, AtomicFileWriter('never'))
+    one, two = HistoryDelta((), (_calc(1, 2),)), HistoryDelta((), (_calc(3, 4, 1),))
+    log.append([('push', one), ('push', two), ('undo',)], "1:x")
+    fingerprint, end = log.tail()
+    assert fingerprint == "1:x"
+    undo_stack, redo_stack, count = log.replay(end, lambda calc: calc)
+    assert count == 3
+    assert [d.added[0].result for d in undo_stack] == [Decimal(3)]
+    assert [d.added[0].result for d in redo_stack] == [Decimal(7)]
+
+def test_rewrite_rebuilds_same_stacks(config):
+    log = UndoLog(config, AtomicFileWriter('never'))
+    deltas = [HistoryDelta((), (_calc(n, n, n),)) for n in range(4)]
+    assert log.rewrite(deltas[:2], [deltas[3], deltas[2]], "2:y") == 5
+    undo_stack, redo_stack, _ = log.replay(log.tail()[1], lambda calc: calc)
+    assert [d.added[0].operand1 for d in undo_stack] == [0, 1]
+    assert [d.added[0].operand1 for d in redo_stack] == [3, 2]
+
+def test_torn_append_is_ignored(config):
+    log = UndoLog(config, AtomicFileWriter('never'))
+    log.append([('push', HistoryDelta((), (_calc(1, 2),)))], "1:x")
+    with open(log.path, 'a', encoding='utf-8') as handle:
+        handle.write('["p",[],[["Addi')
+    fingerprint, end = log.tail()
+    assert fingerprint == "1:x"
+    log.truncate(end)
+    assert log.path.stat().st_size == end
+
+
+# Test cases for resuming undo history across sessions
+
+def test_new_session_resumes_undo_and_redo(make_calculator):
+    first = make_calculator(load_history=True)
+    for a in range(1, 5):
+        first.perform_op(a, 1, OperationFactory.create_operation('+'))
+    first.undo()
+    first.save_history()
+
+    second = make_calculator(load_history=True)
+    assert [c.operand1 for c in second.history] == [1, 2, 3]
+    assert second.undo_stack == []  # loaded lazily
+    assert second.undo()
+    assert [c.operand1 for c in second.history] == [1, 2]
+    assert second.redo() and second.redo()
+    assert [c.operand1 for c in second.history] == [1, 2, 3, 4]
+    assert not second.redo()
+
+def test_redo_after_undoing_everything_and_restarting(make_calculator):
+    first = make_calculator(load_history=True)
+    for a in range(1, 4):
+        first.perform_op(a, 1, OperationFactory.create_operation('+'))
+    assert first.undo_steps(3) == 3
+    first.save_history()
+
+    second = make_calculator(load_history=True)
+    assert second.history == []
+    assert second.redo_steps(3) == 3
+    assert [c.operand1 for c in second.history] == [1, 2, 3]
+
+def test_operations_after_load_sit_on_saved_stacks(make_calculator):
+    first = make_calculator(load_history=True)
+    first.perform_op(1, 1, OperationFactory.create_operation('+'))
+    first.save_history()
+
+    second = make_calculator(load_history=True)
+    second.perform_op(2, 1, OperationFactory.create_operation('+'))
+    second.save_history()
+
+    third = make_calculator(load_history=True)
+    while third.undo():
+        pass
+    assert third.history == []
+    assert third.find(operation='+') == []
+
+def test_stale_log_is_not_resumed(make_calculator):
+    first = make_calculator(load_history=True)
+    first.perform_op(1, 1, OperationFactory.create_operation('+'))
+    first.save_history()
+    # The history changes behind the log's back
+    history = [_calc(5, 5)]
+    first.storage.save(history)
+    assert history_fingerprint(history) != first._undo_log.tail()[0]
+
+    second = make_calculator(load_history=True)
+    assert not second.undo()
+    assert len(second.history) == 1
+
+def test_evictions_are_undone(make_calculator):
+    calc = make_calculator(load_history=True, max_history_size=3)
+    for a in range(1, 6):
+        calc.perform_op(a, 1, OperationFactory.create_operation('+'))
+    calc.save_history()
+
+    resumed = make_calculator(load_history=True, max_history_size=3)
+    assert resumed.undo() and resumed.undo()
+    assert [c.operand1 for c in resumed.history] == [1, 2, 3]
+    assert [c.operand1 for c in resumed.find(operation='+')] == [1, 2, 3]
+    assert list(resumed.get_history_dataframe()['operand1']) == [1, 2, 3]
+
+def test_log_grows_with_changes_not_history(make_calculator):
+    calc = make_calculator(load_history=True)
+    sizes = []
+    for a in range(1, 41):
+        calc.perform_op(a, 1, OperationFactory.create_operation('+'))
+        calc.save_history()
+        sizes.append(calc._undo_log.path.stat().st_size)
+    growth = [after - before for before, after in zip(sizes, sizes[1:])]
+    # Each save adds one delta and a marker, whatever the history length
+    assert max(growth) - min(growth) < 20
+
+
+# Test cases for multi-step undo and checkpoints
+
+def test_undo_and_redo_several_steps(make_calculator):
+    calc = make_calculator(load_history=True)
+    for a in range(1, 11):
+        calc.perform_op(a, 1, OperationFactory.create_operation('+'))
+    assert calc.undo_steps(7) == 7
+    assert [c.operand1 for c in calc.history] == [1, 2, 3]
+    assert calc.redo_steps(100) == 7
+    assert len(calc.history) == 10
+    assert calc.undo_steps(4) == 4
+    calc.save_history()
+
+    resumed = make_calculator(load_history=True)
+    assert len(resumed.history) == 6
+    assert resumed.redo_steps(4) == 4
+    assert [c.operand1 for c in resumed.find(operand=10)] == [10]
+
+def test_restore_checkpoint_both_ways(make_calculator):
+    calc = make_calculator(load_history=True)
+    for a in range(1, 4):
+        calc.perform_op(a, 1, OperationFactory.create_operation('+'))
+    calc.checkpoint('three')
+    for a in range(4, 9):
+        calc.perform_op(a, 1, OperationFactory.create_operation('+'))
+    calc.checkpoint('eight')
+    assert calc.restore('three') == 5
+    assert len(calc.history) == 3
+    assert calc.restore('eight') == 5
+    assert len(calc.history) == 8
+    assert calc.checkpoints() == ['three', 'eight']
+
+def test_checkpoint_on_discarded_branch(make_calculator):
+    calc = make_calculator(load_history=True)
+    calc.perform_op(1, 1, OperationFactory.create_operation('+'))
+    calc.perform_op(2, 1, OperationFactory.create_operation('+'))
+    calc.checkpoint('two')
+    calc.undo()
+    calc.perform_op(3, 1, OperationFactory.create_operation('+'))
+    with pytest.raises(OperationError):
+        calc.restore('two')
+    with pytest.raises(OperationError):
+        calc.restore('missing')
+
+
+# Test cases for dumping the undo state
+
+def test_dump_undo_state_replays(tmp_path, make_calculator, config):
+    calc = make_calculator(load_history=True)
+    for a in range(1, 6):
+        calc.perform_op(a, 1, OperationFactory.create_operation('+'))
+    calc.undo_steps(2)
+    dump = tmp_path / "undo-dump.jsonl"
+    with open(dump, 'w', encoding='utf-8') as handle:
+        assert calc.dump_undo_state(handle) == 6
+
+    log = UndoLog(config, AtomicFileWriter('never'))
+    log.path = dump
+    undo_stack, redo_stack, _ = log.replay(dump.stat().st_size, lambda calc: calc)
+    assert [d.added[0].operand1 for d in undo_stack] == [1, 2, 3]
+    assert [d.added[0].operand1 for d in redo_stack] == [5, 4]
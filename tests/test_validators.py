@@ -71,3 +71,35 @@ def test_validate_number_none_value():
 def test_validate_number_non_numeric_type():
     with pytest.raises(ValidationError, match="Invalid number format: "):
         InputValidator.validate_number([], config)
+
+# Test cases for the configured InputValidator instance
+
+validator = InputValidator(config)
+
+def test_validator_precomputes_bound():
+    assert validator.max_bound == Decimal('1000000')
+    assert InputValidator(CalculatorConfig(max_input_value=5)).max_bound == Decimal('5')
+
+def test_validate_decimal_fast_path():
+    assert validator.validate(Decimal('1.50')) == Decimal('1.5')
+    assert str(validator.validate(Decimal('100'))) == str(InputValidator.validate_number(Decimal('100'), config))
+
+def test_validate_int_fast_path():
+    assert validator.validate(42) == Decimal('42')
+    with pytest.raises(ValidationError, match="Value exceeds maximum allowed"):
+        validator.validate(1000001)
+
+def test_validate_bool_rejected():
+    with pytest.raises(ValidationError, match="Invalid number format: True"):
+        validator.validate(True)
+
+def test_validate_nan_rejected():
+    with pytest.raises(ValidationError, match="Invalid number format: NaN"):
+        validator.validate(Decimal('NaN'))
+
+def test_validate_many():
+    assert validator.validate_many([1, "2.5", Decimal('3'), 4.25]) == [
+        Decimal('1'), Decimal('2.5'), Decimal('3'), Decimal('4.25')
+    ]
+    with pytest.raises(ValidationError, match="Invalid number format: x"):
+        validator.validate_many([1, "x"])